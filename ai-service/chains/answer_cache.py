@@ -0,0 +1,96 @@
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from utils.config import RAG_ANSWER_CACHE_SIZE, RAG_ANSWER_CACHE_MIN_SIMILARITY, RAG_ANSWER_CACHE_MATCH_CHUNKS
+from utils.metrics import ANSWER_CACHE, ANSWER_CACHE_SAVED_SECONDS
+
+
+class SemanticAnswerCache:
+    """
+    Answers to earlier questions about the loaded document, found by meaning rather
+    than exact text: "main topic?" and "what is this doc about?" embed close together.
+    A cached answer is served only when the new question is within min_similarity
+    (cosine) of a stored one AND retrieval picked the same top chunks, so a
+    paraphrase that lands on different passages still goes to the LLM.
+
+    Entries belong to one index version and are dropped as soon as another version
+    is seen (a new upload, or the next page batch of a progressive ingest), since
+    chunk ids and rankings can change between versions. The vectors sit in one small
+    matrix, so a lookup is a single matrix-vector product; when full, the oldest
+    entry is overwritten.
+    """
+
+    def __init__(self, size: int = RAG_ANSWER_CACHE_SIZE, min_similarity: float = RAG_ANSWER_CACHE_MIN_SIMILARITY,
+                 match_chunks: int = RAG_ANSWER_CACHE_MATCH_CHUNKS):
+        self.size = size
+        self.min_similarity = min_similarity
+        self.match_chunks = match_chunks
+        self._lock = threading.Lock()
+        self._reset(None)
+        self.hits = 0
+        self.misses = 0
+        self.llm_seconds_saved = 0.0
+
+    def _reset(self, version: Optional[int]):
+        self.version = version
+        self._vectors = None  # (size, d) once the first entry arrives
+        self._entries = [None] * self.size  # (top chunk ids, answer, llm_seconds) per row
+        self._next = 0
+        self._count = 0
+
+    def _top(self, chunk_ids: List[int]) -> tuple:
+        return tuple(sorted(int(i) for i in chunk_ids[:self.match_chunks]))
+
+    def lookup(self, version: int, vector: np.ndarray, chunk_ids: List[int], operation: str = "query_pdf") -> Optional[str]:
+        """The cached answer for a paraphrase of an earlier question retrieving the same chunks, or None"""
+        top = self._top(chunk_ids)
+        with self._lock:
+            if version != self.version:
+                self._reset(version)
+            answer = None
+            if self._count:
+                similarity = self._vectors[:self._count] @ vector
+                # Best match among the rows that retrieved the same chunks
+                for row in np.argsort(-similarity):
+                    if similarity[row] < self.min_similarity:
+                        break
+                    entry_top, entry_answer, llm_seconds = self._entries[row]
+                    if entry_top == top:
+                        answer = entry_answer
+                        self.hits += 1
+                        self.llm_seconds_saved += llm_seconds
+                        break
+            if answer is None:
+                self.misses += 1
+        if answer is None:
+            ANSWER_CACHE.labels(operation=operation, outcome="miss").inc()
+            return None
+        ANSWER_CACHE.labels(operation=operation, outcome="hit").inc()
+        ANSWER_CACHE_SAVED_SECONDS.labels(operation=operation).inc(llm_seconds)
+        return answer
+
+    def store(self, version: int, vector: np.ndarray, chunk_ids: List[int], answer: str, llm_seconds: float):
+        with self._lock:
+            if version != self.version:
+                return  # Answered from an index that has since been replaced
+            if self._vectors is None:
+                self._vectors = np.zeros((self.size, len(vector)), dtype=np.float32)
+            row = self._next
+            self._vectors[row] = vector
+            self._entries[row] = (self._top(chunk_ids), answer, llm_seconds)
+            self._next = (row + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "llm_seconds_saved": self.llm_seconds_saved,
+            }
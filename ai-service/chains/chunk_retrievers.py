@@ -0,0 +1,367 @@
+import json
+import os
+from collections import Counter
+from typing import Any, Callable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.config import RAG_VECTOR_PRECISION, RAG_RESCORE_FACTOR
+from utils.tracing import stage_timer
+
+
+# rank_bm25.BM25Okapi defaults, so rankings match the BM25Retriever this replaces
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+RRF_C = 60
+SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+# Function words left out of BM25Index.reference_score: a question's phrasing ("what is",
+# "how do I") says nothing about whether the document covers its subject
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself no nor not of off
+on once only or other our ours ourselves out over own same she should so some such than that the their theirs
+them themselves then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk ids with the postings in CSR arrays (term -> chunk ids,
+    term frequencies) rather than one dict per chunk plus a second copy of the text.
+    """
+
+    def __init__(self, vocab: dict, indptr: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray,
+                 idf: np.ndarray, doc_len: np.ndarray, tokenize: Callable[[str], List[str]]):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.idf = idf
+        self.doc_len = doc_len
+        self.tokenize = tokenize
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+        # Per-chunk length normalisation is query independent, so compute it once
+        self.norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / max(self.avgdl, 1e-9))
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, texts: List[str], tokenize: Callable[[str], List[str]]) -> "BM25Index":
+        return cls.from_counts([Counter(tokenize(text)) for text in texts], tokenize)
+
+    @classmethod
+    def from_counts(cls, counts: List[Counter], tokenize: Callable[[str], List[str]]) -> "BM25Index":
+        """From per-chunk term counts, so a growing index doesn't re-tokenize chunks it has seen"""
+        vocab = {}
+        postings = []
+        for doc_id, doc_counts in enumerate(counts):
+            for term, tf in doc_counts.items():
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, tf))
+
+        df = np.fromiter((len(p) for p in postings), dtype=np.int64, count=len(postings))
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+        doc_ids = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=int(indptr[-1]))
+        tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.float32, count=int(indptr[-1]))
+
+        n = len(counts)
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            # Terms in more than half the chunks get a small positive idf, as in BM25Okapi
+            idf[idf < 0] = BM25_EPSILON * idf.mean()
+        doc_len = np.fromiter((sum(c.values()) for c in counts), dtype=np.float32, count=n)
+        return cls(vocab, indptr, doc_ids, tfs, idf, doc_len, tokenize)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.doc_len), dtype=np.float64)
+        for term in self.tokenize(query):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            scores[rows] += self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + self.norm[rows])
+        return scores
+
+    def scores_batch(self, queries: List[str]) -> np.ndarray:
+        """One row of scores per query; each distinct term's contribution is computed once per batch"""
+        scores = np.zeros((len(queries), len(self.doc_len)), dtype=np.float64)
+        contributions = {}
+        for row, query in enumerate(queries):
+            for term in self.tokenize(query):
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    continue
+                if term_id not in contributions:
+                    start, end = self.indptr[term_id], self.indptr[term_id + 1]
+                    rows = self.doc_ids[start:end]
+                    tf = self.tfs[start:end]
+                    contributions[term_id] = (rows, self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + self.norm[rows]))
+                rows, contribution = contributions[term_id]
+                scores[row, rows] += contribution
+        return scores
+
+    def reference_score(self, query: str) -> float:
+        """
+        Score of an average-length chunk containing every query content word once,
+        where the BM25 saturation term is exactly 1, so this is the summed idf of
+        those words. Punctuation and stopwords are left out: they carry no topic,
+        and charging them at full idf would sink every naturally phrased question.
+        Content words missing from the index count at the idf of a term in no chunk:
+        a question about something the document never mentions can't look well
+        covered just because its few common words matched.
+        """
+        missing_idf = np.log(len(self.doc_len) + 0.5) - np.log(0.5)
+        reference = 0.0
+        for term in self.tokenize(query):
+            if term.lower() in STOPWORDS or not any(c.isalnum() for c in term):
+                continue
+            term_id = self.vocab.get(term)
+            reference += self.idf[term_id] if term_id is not None else missing_idf
+        return float(reference)
+
+    def search(self, query: str, k: int) -> np.ndarray:
+        # Same ordering as BM25Okapi.get_top_n, zero scores included
+        return np.argsort(self.scores(query))[::-1][:k]
+
+    def search_batch(self, queries: List[str], k: int) -> np.ndarray:
+        return np.argsort(self.scores_batch(queries), axis=1)[:, ::-1][:, :k]
+
+    def nbytes(self) -> int:
+        arrays = (self.indptr, self.doc_ids, self.tfs, self.idf, self.doc_len, self.norm)
+        return sum(a.nbytes for a in arrays) + sum(len(t) + 60 for t in self.vocab)
+
+    def save(self, path: str):
+        for name in ("indptr", "doc_ids", "tfs", "idf", "doc_len"):
+            np.save(os.path.join(path, f"bm25_{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "bm25_vocab.json"), "w") as f:
+            json.dump(self.vocab, f)
+
+    @classmethod
+    def load(cls, path: str, tokenize: Callable[[str], List[str]], mmap: bool = True) -> "BM25Index":
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"bm25_{name}.npy"), mmap_mode=mode)
+            for name in ("indptr", "doc_ids", "tfs", "idf", "doc_len")
+        }
+        with open(os.path.join(path, "bm25_vocab.json")) as f:
+            vocab = json.load(f)
+        return cls(vocab, tokenize=tokenize, **arrays)
+
+
+class DenseIndex:
+    """
+    FAISS index over the chunk vectors. At fp16 / int8 the resident index holds
+    scalar-quantized codes (2x / 4x smaller) and the fp32 vectors stay on disk:
+    the index proposes k * RAG_RESCORE_FACTOR candidates, and only those rows of
+    the memory-mapped fp32 array are read to rescore them exactly.
+    """
+
+    def __init__(self, index: faiss.Index, full: Optional[np.ndarray] = None,
+                 rescore_factor: int = RAG_RESCORE_FACTOR):
+        self.index = index
+        self.full = full  # None at fp32, where the index itself is exact
+        self.rescore_factor = rescore_factor
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def d(self) -> int:
+        return self.index.d
+
+    @property
+    def precision(self) -> str:
+        if self.full is None:
+            return "fp32"
+        qtype = faiss.downcast_index(self.index).sq.qtype
+        return next(name for name, q in SCALAR_QUANTIZERS.items() if q == qtype)
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.full is None:
+            return self.index.search(vectors, k)
+        candidates = min(k * self.rescore_factor, self.ntotal)
+        _, ids = self.index.search(vectors, candidates)
+        distances = np.full((len(vectors), k), np.inf, dtype=np.float32)
+        top = np.full((len(vectors), k), -1, dtype=np.int64)
+        for row, (vector, row_ids) in enumerate(zip(vectors, ids)):
+            row_ids = np.sort(row_ids[row_ids >= 0])  # Sorted ids read the mapped file in order
+            exact = ((np.asarray(self.full[row_ids]) - vector) ** 2).sum(axis=1)
+            order = np.argsort(exact, kind="stable")[:k]
+            distances[row, :len(order)] = exact[order]
+            top[row, :len(order)] = row_ids[order]
+        return distances, top
+
+    def nbytes(self) -> int:
+        """Resident bytes: the index codes. The fp32 rescoring copy is mapped and mostly untouched"""
+        return self.ntotal * self.index.sa_code_size()
+
+    def save(self, path: str):
+        faiss.write_index(self.index, os.path.join(path, "dense.faiss"))
+        if self.full is not None:
+            np.save(os.path.join(path, "dense_full.npy"), self.full)
+
+    @classmethod
+    def load(cls, path: str, io_flags: int = 0, mmap: bool = True) -> "DenseIndex":
+        index = faiss.read_index(os.path.join(path, "dense.faiss"), io_flags)
+        full_path = os.path.join(path, "dense_full.npy")
+        full = np.load(full_path, mmap_mode="r" if mmap else None) if os.path.exists(full_path) else None
+        return cls(index, full)
+
+
+def build_dense_index(vectors, precision: str = RAG_VECTOR_PRECISION) -> DenseIndex:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    # Same metric as langchain's FAISS wrapper; rankings equal cosine on the normalized e5 vectors
+    if precision == "fp32":
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        return DenseIndex(index)
+    if precision not in SCALAR_QUANTIZERS:
+        raise ValueError(f"Unknown vector precision: {precision}")
+    index = faiss.IndexScalarQuantizer(vectors.shape[1], SCALAR_QUANTIZERS[precision], faiss.METRIC_L2)
+    index.train(vectors)  # int8 learns per-dimension ranges; fp16 needs none
+    index.add(vectors)
+    return DenseIndex(index, vectors)
+
+
+def embed_queries(embeddings, queries: List[str], operation: str = "query_pdf") -> np.ndarray:
+    """(len(queries), d) float32 query vectors"""
+    if len(queries) == 1:
+        with stage_timer(operation, "embed_query"):
+            return np.asarray([embeddings.embed_query(queries[0])], dtype=np.float32)
+    # One forward pass for the whole list; e5 queries get the same encoding as documents either way.
+    # The batcher's embed_queries keeps them at query priority, ahead of queued ingestion
+    embed = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+    with stage_timer(operation, "embed_query", queries=len(queries)):
+        return np.asarray(embed(queries), dtype=np.float32)
+
+
+def dense_search(index: faiss.Index, embeddings, query: str, k: int,
+                 vector: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest chunk ids and distances; pass `vector` when the query is already embedded"""
+    vectors = embed_queries(embeddings, [query]) if vector is None else vector.reshape(1, -1)
+    with stage_timer("query_pdf", "faiss"):
+        distances, ids = index.search(vectors, k)
+    keep = ids[0] >= 0
+    return ids[0][keep], distances[0][keep]
+
+
+def dense_search_batch(index, embeddings, queries: List[str], k: int, operation: str = "query_pdf",
+                       vectors: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    if vectors is None:
+        vectors = embed_queries(embeddings, queries, operation)
+    with stage_timer(operation, "faiss", queries=len(queries)):
+        distances, ids = index.search(vectors, k)
+    return [(row_ids[row_ids >= 0], row_distances[row_ids >= 0]) for row_ids, row_distances in zip(ids, distances)]
+
+
+def retrieval_confidence(dense_distances: np.ndarray, sparse_top: float, sparse_reference: float) -> dict:
+    """
+    How well the best hits match the query, on scales that mean the same thing for
+    every document (RRF scores only encode ranks, so they can't tell a good top
+    hit from a poor one). dense_similarity is the cosine of the nearest chunk;
+    squared L2 on the normalized e5 vectors is 2 - 2 cos. sparse_score is the best
+    BM25 score relative to BM25Index.reference_score, capped at 1.
+    """
+    dense = 1.0 - float(dense_distances[0]) / 2 if len(dense_distances) else 0.0
+    sparse = min(sparse_top / sparse_reference, 1.0) if sparse_reference > 0 else 0.0
+    return {"dense_similarity": round(dense, 4), "sparse_score": round(sparse, 4)}
+
+
+class BM25ChunkRetriever(BaseRetriever):
+    """Lexical retrieval straight off the BM25 arrays"""
+
+    store: Any
+    bm25: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with stage_timer("query_pdf", "bm25"):
+            ids = self.bm25.search(query, self.k)
+        return self.store.documents(ids)
+
+
+class DenseChunkRetriever(BaseRetriever):
+    """Semantic retrieval straight off the FAISS index"""
+
+    store: Any
+    index: Any
+    embeddings: Any
+    k: int = 3
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        ids, _ = dense_search(self.index, self.embeddings, query, self.k)
+        return self.store.documents(ids)
+
+
+class HybridChunkRetriever(BaseRetriever):
+    """
+    Weighted reciprocal rank fusion of BM25 and FAISS, as EnsembleRetriever does,
+    but fused on chunk ids: Documents are built only for the chunks that are returned.
+    """
+
+    store: Any
+    bm25: Any
+    index: Any
+    embeddings: Any
+    k_sparse: int = 4
+    k_dense: int = 3
+    weights: List[float] = [0.45, 0.55]
+
+    def ranked_ids(self, query: str) -> List[int]:
+        return self.search(query)[0]
+
+    def search(self, query: str, vector: Optional[np.ndarray] = None) -> Tuple[List[int], dict]:
+        """Fused chunk ids plus the retrieval_confidence of the underlying hits"""
+        with stage_timer("query_pdf", "bm25"):
+            scores = self.bm25.scores(query)
+            sparse_ids = np.argsort(scores)[::-1][:self.k_sparse]
+            sparse_top = float(scores[sparse_ids[0]]) if len(sparse_ids) else 0.0
+            sparse_reference = self.bm25.reference_score(query)
+        dense_ids, distances = dense_search(self.index, self.embeddings, query, self.k_dense, vector)
+        return self._fuse(sparse_ids, dense_ids), retrieval_confidence(distances, sparse_top, sparse_reference)
+
+    def ranked_ids_batch(self, queries: List[str], operation: str = "query_pdf") -> List[List[int]]:
+        return [ids for ids, _ in self.search_batch(queries, operation)]
+
+    def search_batch(self, queries: List[str], operation: str = "query_pdf",
+                     vectors: Optional[np.ndarray] = None) -> List[Tuple[List[int], dict]]:
+        """search for many queries: one embedding pass, one FAISS search, shared BM25 term work"""
+        with stage_timer(operation, "bm25", queries=len(queries)):
+            scores = self.bm25.scores_batch(queries)
+            sparse_ids = np.argsort(scores, axis=1)[:, ::-1][:, :self.k_sparse]
+            references = [self.bm25.reference_score(query) for query in queries]
+        dense = dense_search_batch(self.index, self.embeddings, queries, self.k_dense, operation, vectors)
+        results = []
+        for row, (dense_ids, distances) in enumerate(dense):
+            sparse_top = float(scores[row, sparse_ids[row, 0]]) if sparse_ids.shape[1] else 0.0
+            results.append((self._fuse(sparse_ids[row], dense_ids),
+                            retrieval_confidence(distances, sparse_top, references[row])))
+        return results
+
+    def _fuse(self, sparse_ids, dense_ids) -> List[int]:
+        fused = {}
+        for ranked, weight in zip((sparse_ids, dense_ids), self.weights):
+            for rank, chunk_id in enumerate(ranked, start=1):
+                chunk_id = int(chunk_id)
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + weight / (rank + RRF_C)
+        # Stable sort: ties keep first-seen order, sparse list first, like EnsembleRetriever
+        return sorted(fused, key=fused.get, reverse=True)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.store.documents(self.ranked_ids(query))
@@ -0,0 +1,84 @@
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class ChunkStore:
+    """
+    All chunks of one document as a single UTF-8 blob plus offset / length / page
+    arrays, instead of one Document (str + metadata dict) per chunk. Chunks are
+    addressed by integer id; Documents are only built for the few that reach the
+    prompt. Saved as raw files so a loaded store can be memory-mapped read-only.
+    """
+
+    def __init__(self, blob, offsets: np.ndarray, lengths: np.ndarray, pages: np.ndarray, metadata: dict):
+        self.blob = blob  # bytes, or a read-only uint8 memmap
+        self.offsets = offsets
+        self.lengths = lengths
+        self.pages = pages
+        self.metadata = metadata  # Shared by every chunk (source, title, ...)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def from_documents(cls, chunks: List[Document]) -> "ChunkStore":
+        encoded = [chunk.page_content.encode("utf-8") for chunk in chunks]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int32, count=len(encoded))
+        offsets = np.zeros(len(encoded), dtype=np.int64)
+        if len(encoded) > 1:
+            np.cumsum(lengths[:-1], out=offsets[1:])
+        pages = np.fromiter((chunk.metadata.get("page", -1) for chunk in chunks), dtype=np.int32, count=len(chunks))
+        metadata = {k: v for k, v in (chunks[0].metadata if chunks else {}).items() if k != "page"}
+        return cls(b"".join(encoded), offsets, lengths, pages, metadata)
+
+    def text(self, chunk_id: int) -> str:
+        start = int(self.offsets[chunk_id])
+        raw = self.blob[start:start + int(self.lengths[chunk_id])]
+        return (raw.tobytes() if isinstance(raw, np.ndarray) else raw).decode("utf-8")
+
+    def texts(self) -> List[str]:
+        return [self.text(i) for i in range(len(self))]
+
+    def document(self, chunk_id: int, score: Optional[float] = None) -> Document:
+        metadata = {**self.metadata, "page": int(self.pages[chunk_id]), "chunk_id": int(chunk_id)}
+        if score is not None:
+            metadata["score"] = score
+        return Document(page_content=self.text(chunk_id), metadata=metadata)
+
+    def documents(self, chunk_ids) -> List[Document]:
+        return [self.document(int(i)) for i in chunk_ids]
+
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.nbytes + self.lengths.nbytes + self.pages.nbytes
+
+    def save(self, path: str):
+        with open(os.path.join(path, "chunks.bin"), "wb") as f:
+            f.write(bytes(self.blob))
+        np.save(os.path.join(path, "chunk_offsets.npy"), self.offsets)
+        np.save(os.path.join(path, "chunk_lengths.npy"), self.lengths)
+        np.save(os.path.join(path, "chunk_pages.npy"), self.pages)
+        with open(os.path.join(path, "chunk_meta.json"), "w") as f:
+            json.dump(self.metadata, f, default=str)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ChunkStore":
+        mode = "r" if mmap else None
+        blob_path = os.path.join(path, "chunks.bin")
+        if mmap and os.path.getsize(blob_path) > 0:
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            with open(blob_path, "rb") as f:
+                blob = f.read()
+        with open(os.path.join(path, "chunk_meta.json")) as f:
+            metadata = json.load(f)
+        return cls(
+            blob,
+            np.load(os.path.join(path, "chunk_offsets.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "chunk_lengths.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "chunk_pages.npy"), mmap_mode=mode),
+            metadata,
+        )
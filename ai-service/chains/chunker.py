@@ -0,0 +1,81 @@
+import bisect
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+from utils.config import EMBED_MODEL_NAME, EMBED_MAX_TOKENS, RAG_CHUNK_TOKENS, RAG_CHUNK_OVERLAP_TOKENS
+
+
+# Preferred chunk ends, strongest first (the same order RecursiveCharacterTextSplitter tries)
+SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", " "]
+# Offline fallback: a word piece is rarely longer than ~6 characters, so this over- rather than under-counts
+APPROX_TOKEN = re.compile(r"\w{1,6}|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def load_tokenizer():
+    """The embedding model's own tokenizer, or None when it can't be loaded (offline, no local cache)"""
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(EMBED_MODEL_NAME)
+    except (ImportError, OSError) as e:
+        print(f"Tokenizer for {EMBED_MODEL_NAME} unavailable, approximating token counts: {e!r}")
+        return None
+
+
+def token_starts_ends(text: str, tokenizer) -> Tuple[List[int], List[int]]:
+    """Character offsets of each model token in text, from one tokenizer pass"""
+    if tokenizer is None:
+        matches = list(APPROX_TOKEN.finditer(text))
+        return [m.start() for m in matches], [m.end() for m in matches]
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                        return_attention_mask=False, verbose=False)["offset_mapping"]
+    return [start for start, _ in offsets], [end for _, end in offsets]
+
+
+def chunk_spans(text: str, tokenizer, max_tokens: int = RAG_CHUNK_TOKENS,
+                overlap: int = RAG_CHUNK_OVERLAP_TOKENS) -> List[Tuple[int, int]]:
+    """
+    (start, end) character offsets of chunks of at most max_tokens model tokens,
+    consecutive chunks sharing about `overlap` tokens. One left-to-right pass over
+    the token offsets; each chunk ends at the strongest separator in the back half
+    of its window, and the next one starts on a word boundary.
+    """
+    # Leave room for [CLS] / [SEP] so nothing is truncated at embed time
+    max_tokens = max(1, min(max_tokens, EMBED_MAX_TOKENS - 2))
+    overlap = min(overlap, max_tokens // 2)
+    starts, ends = token_starts_ends(text, tokenizer)
+    spans = []
+    first = 0
+    while first < len(starts):
+        last = min(first + max_tokens, len(starts))  # Exclusive
+        if last < len(starts):
+            low, high = starts[first + max_tokens // 2], starts[last]
+            for separator in SEPARATORS:
+                cut = text.rfind(separator, low, high)
+                if cut != -1:
+                    # Keep sentence punctuation with the chunk it ends
+                    last = bisect.bisect_left(starts, cut + len(separator.rstrip()), first + 1, last)
+                    break
+        spans.append((starts[first], ends[last - 1]))
+        if last >= len(starts):
+            break
+        next_first = max(last - overlap, first + 1)
+        while next_first < last and starts[next_first] > 0 and not text[starts[next_first] - 1].isspace():
+            next_first += 1  # Don't start inside a word
+        first = next_first
+    return spans
+
+
+def split_documents(docs: List[Document], tokenizer=None, max_tokens: int = RAG_CHUNK_TOKENS,
+                    overlap: int = RAG_CHUNK_OVERLAP_TOKENS) -> List[Document]:
+    """Token-bounded chunks of every page; each chunk's text is sliced from its page exactly once"""
+    tokenizer = load_tokenizer() if tokenizer is None else tokenizer
+    chunks = []
+    for doc in docs:
+        text = doc.page_content
+        for start, end in chunk_spans(text, tokenizer, max_tokens, overlap):
+            # Chunks of a page share its metadata dict; nothing downstream mutates it
+            chunks.append(Document(page_content=text[start:end], metadata=doc.metadata))
+    return chunks
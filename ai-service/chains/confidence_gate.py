@@ -0,0 +1,49 @@
+import json
+import logging
+
+from utils.config import (RAG_CONFIDENCE_GATE, RAG_GATE_MIN_DENSE_SIMILARITY, RAG_GATE_MIN_SPARSE_SCORE,
+                          RAG_GATE_PASSAGES)
+from utils.metrics import RETRIEVAL_GATE, RETRIEVAL_CONFIDENCE
+
+logger = logging.getLogger(__name__)
+
+
+NOT_FOUND_ANSWER = "The document doesn't appear to cover this question."
+NOT_FOUND_PARTIAL_ANSWER = "The pages indexed so far don't appear to cover this question; the rest of the document is still being processed."
+
+
+def is_answerable(confidence: dict, min_dense: float = RAG_GATE_MIN_DENSE_SIMILARITY,
+                  min_sparse: float = RAG_GATE_MIN_SPARSE_SCORE) -> bool:
+    """Either retriever finding a convincing hit is enough; both have to come up empty to skip the LLM"""
+    return confidence["dense_similarity"] >= min_dense or confidence["sparse_score"] >= min_sparse
+
+
+def skip_llm(confidence: dict, operation: str, mode: str = RAG_CONFIDENCE_GATE) -> bool:
+    """Record the gate decision for one question; True when it should be answered without the LLM"""
+    if mode == "off":
+        return False
+    answerable = is_answerable(confidence)
+    if answerable:
+        decision = "answer"
+    else:
+        decision = "not_found" if mode == "enforce" else "shadow_not_found"
+    RETRIEVAL_GATE.labels(operation=operation, decision=decision).inc()
+    for signal, score in confidence.items():
+        RETRIEVAL_CONFIDENCE.labels(signal=signal, answerable=str(answerable).lower()).observe(score)
+    logger.info("retrieval_gate %s", json.dumps({"operation": operation, "decision": decision, **confidence}))
+    return decision == "not_found"
+
+
+def not_found(index, chunk_ids, confidence: dict, passages: int = RAG_GATE_PASSAGES) -> dict:
+    """The fast response for a gated question, with the nearest passages in case they still help"""
+    coverage = index.coverage()
+    return {
+        "answer": NOT_FOUND_ANSWER if coverage["complete"] else NOT_FOUND_PARTIAL_ANSWER,
+        "found": False,
+        "confidence": confidence,
+        "passages": [
+            {"text": doc.page_content, "page": doc.metadata.get("page")}
+            for doc in index.chunks.documents(chunk_ids[:passages])
+        ],
+        "coverage": coverage,
+    }
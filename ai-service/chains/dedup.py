@@ -0,0 +1,100 @@
+import hashlib
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from utils.config import BOILERPLATE_MIN_PAGE_FRACTION, BOILERPLATE_MIN_PAGES, NEAR_DUPLICATE_MIN_JACCARD
+
+
+DIGITS = re.compile(r"\d+")
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0)  # Fixed, so signatures are stable across processes
+_HASH_A = _rng.integers(1, MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+# Headers, footers and template lines are short and sit at the top or bottom of the page;
+# wrapped fragments of body text can repeat too, but only these edge lines are ever stripped
+MAX_BOILERPLATE_LINE_CHARS = 120
+EDGE_LINES = 3
+
+
+def _line_key(line: str) -> str:
+    # Page numbers and dates vary from page to page ("Page 3 of 40"), so they don't count
+    return DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _edge_lines(page: str) -> List[Tuple[int, str]]:
+    lines = [(i, line) for i, line in enumerate(page.splitlines()) if line.strip()]
+    edges = lines if len(lines) <= 2 * EDGE_LINES else lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+    return [(i, line) for i, line in edges if len(line) <= MAX_BOILERPLATE_LINE_CHARS]
+
+
+def strip_boilerplate(docs: List[Document]) -> Tuple[List[Document], dict]:
+    """
+    Drop lines that repeat on a large share of pages (running headers, footers,
+    slide templates, copyright notices) before the pages are chunked.
+    """
+    report = {"boilerplate_lines": 0, "boilerplate_chars": 0}
+    if len(docs) < BOILERPLATE_MIN_PAGES:
+        return docs, report
+
+    pages_with_line = Counter()
+    for doc in docs:
+        pages_with_line.update({_line_key(line) for _, line in _edge_lines(doc.page_content)})
+    threshold = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_PAGE_FRACTION * len(docs))
+    boilerplate = {key for key, pages in pages_with_line.items() if pages >= threshold}
+    report["boilerplate_lines"] = len(boilerplate)
+    if not boilerplate:
+        return docs, report
+
+    cleaned = []
+    for doc in docs:
+        lines = doc.page_content.splitlines()
+        for i, line in _edge_lines(doc.page_content):
+            if _line_key(line) in boilerplate:
+                report["boilerplate_chars"] += len(line)
+                lines[i] = None
+        cleaned.append(Document(page_content="\n".join(l for l in lines if l is not None), metadata=doc.metadata))
+    return cleaned, report
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of the chunk's word 3-grams; equal positions estimate Jaccard similarity"""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # a < 2**31 and x < 2**32, so a * x + b fits in uint64 without overflow
+    return ((_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+def drop_near_duplicates(chunks: List[Document],
+                         min_similarity: float = NEAR_DUPLICATE_MIN_JACCARD) -> Tuple[List[Document], dict]:
+    """
+    Keep the first of every group of chunks whose estimated shingle Jaccard similarity
+    is at least min_similarity. Candidates come from LSH band buckets (16 bands of
+    4 rows), which find pairs at 0.8 similarity with probability > 0.999.
+    """
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    buckets = [{} for _ in range(LSH_BANDS)]
+    kept, signatures = [], []
+    removed_chars = 0
+    for chunk in chunks:
+        signature = minhash(chunk.page_content)
+        keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(LSH_BANDS)]
+        candidates = {other for band, key in enumerate(keys) for other in buckets[band].get(key, ())}
+        if any(np.mean(signature == signatures[other]) >= min_similarity for other in candidates):
+            removed_chars += len(chunk.page_content)
+            continue
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(len(kept))
+        kept.append(chunk)
+        signatures.append(signature)
+    return kept, {"near_duplicate_chunks": len(chunks) - len(kept), "near_duplicate_chars": removed_chars}
@@ -0,0 +1,118 @@
+import math
+import re
+from collections import Counter
+from typing import List
+
+import numpy as np
+from scipy import sparse
+from utils.config import hf_embeddings, FAST_PATH_MAX_CHARS, FAST_PATH_EMBEDDINGS, FAST_PATH_HARD_MAX_CHARS
+
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n\s*\n|\n\s*[-•*]\s+')
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-']*")
+
+
+def should_use_fast_path(text: str, mode: str = "auto") -> bool:
+    """
+    Route short notes (or explicit mode=fast) to the local extractive engine. mode=fast
+    is honoured up to FAST_PATH_HARD_MAX_CHARS; longer texts go to the LLM, which runs
+    under admission control and the request deadline.
+    """
+    mode = (mode or "auto").lower()
+    if mode == "llm":
+        return False
+    length = len(text.strip())
+    if mode == "fast":
+        return length <= FAST_PATH_HARD_MAX_CHARS
+    return length < FAST_PATH_MAX_CHARS
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = SENTENCE_SPLIT.split(text.strip())
+    sentences = [" ".join(s.split()) for s in sentences]
+    return [s.lstrip("-•* ") for s in sentences if len(s.split()) > 1]
+
+
+def _tfidf_matrix(sentences: List[str]) -> sparse.csr_matrix:
+    """Row-normalised TF-IDF, sparse: memory follows the words in the text, not sentences x vocabulary"""
+    vocab = {}
+    rows, cols, counts = [], [], []
+    for row, sentence in enumerate(sentences):
+        for token, count in Counter(WORD_PATTERN.findall(sentence.lower())).items():
+            rows.append(row)
+            cols.append(vocab.setdefault(token, len(vocab)))
+            counts.append(count)
+
+    n = len(sentences)
+    tf = sparse.csr_matrix((np.asarray(counts, dtype=np.float32), (rows, cols)), shape=(n, len(vocab)))
+    df = np.bincount(cols, minlength=len(vocab))
+    idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+    matrix = tf @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(1.0 / np.maximum(norms, 1e-9).astype(np.float32)) @ matrix
+
+
+def _textrank(similarity, damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """PageRank over a sentence similarity matrix (dense or sparse); sentences similar to none spread evenly"""
+    n = similarity.shape[0]
+    similarity = sparse.csr_matrix(similarity, dtype=np.float32)
+    similarity.setdiag(0.0)
+    similarity.eliminate_zeros()
+    row_sums = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = row_sums <= 0
+    inverse = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=~dangling)
+    transition_t = (sparse.diags(inverse) @ similarity).T.tocsr()
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition_t @ scores + scores[dangling].sum() / n)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def score_sentences(sentences: List[str], use_embeddings: bool = FAST_PATH_EMBEDDINGS) -> np.ndarray:
+    """TextRank over TF-IDF cosine similarity, optionally blended with e5 embedding centrality"""
+    tfidf = _tfidf_matrix(sentences)
+    scores = _textrank(tfidf @ tfidf.T)
+
+    if use_embeddings:
+        vectors = np.asarray(hf_embeddings.embed_documents(sentences), dtype=np.float32)
+        centrality = _textrank(vectors @ vectors.T)
+        scores = 0.5 * scores + 0.5 * centrality
+
+    # Slight lead bias: notes tend to open with the topic sentence
+    position = 1.0 / np.sqrt(np.arange(1, len(sentences) + 1))
+    return scores * (1.0 + 0.1 * position)
+
+
+def _ranked(sentences: List[str]) -> List[int]:
+    return list(np.argsort(-score_sentences(sentences), kind="stable"))
+
+
+def extract_keypoints_fast(text: str) -> str:
+    sentences = split_sentences(text)
+    if not sentences:
+        return text.strip()
+
+    count = min(len(sentences), max(1, min(7, math.ceil(len(sentences) * 0.6))))
+    selected = sorted(_ranked(sentences)[:count])
+    return "\n".join(f"- {sentences[i]}" for i in selected)
+
+
+def summarize_text_fast(text: str) -> str:
+    """Pick top-ranked sentences up to ~45% of the original length, in original order"""
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return " ".join(text.split())
+
+    target_length = int(len(text.strip()) * 0.45)
+    selected, length = [], 0
+    for i in _ranked(sentences):
+        if selected and length + len(sentences[i]) > target_length:
+            continue
+        selected.append(i)
+        length += len(sentences[i]) + 1
+
+    return " ".join(sentences[i] for i in sorted(selected))
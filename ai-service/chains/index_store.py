@@ -0,0 +1,210 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import faiss
+from nltk.tokenize import word_tokenize
+from chains.chunk_store import ChunkStore
+from chains.chunk_retrievers import BM25Index, DenseIndex
+from utils.config import RAG_INDEX_DIR, RAG_INDEX_KEEP_VERSIONS
+
+
+# Map the vectors read-only instead of copying them into every worker's heap
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+POINTER_FILE = "CURRENT"
+# Ticket of the newest build; a build whose ticket has been passed may no longer publish
+BUILD_FILE = "BUILD"
+LOCK_FILE = ".lock"
+# Bumped when the on-disk layout changes; older versions are treated as empty
+INDEX_FORMAT = 2
+
+
+class LoadedIndex:
+    """Immutable view of one published index version; swapped wholesale, never mutated"""
+
+    def __init__(self, version: int, chunks: Optional[ChunkStore], dense: Optional[DenseIndex],
+                 bm25: Optional[BM25Index], meta: dict):
+        self.version = version
+        self.chunks = chunks
+        self.dense = dense
+        self.bm25 = bm25
+        self.meta = meta
+        self.loaded_at = time.time()
+        self.last_access = self.loaded_at
+        self._memory = None
+
+    def memory_usage(self) -> dict:
+        """Bytes per component, measured once per loaded version"""
+        if self._memory is None:
+            self._memory = self._measure_memory()
+        return self._memory
+
+    def _measure_memory(self) -> dict:
+        usage = {"vectors": 0, "text": 0, "chunk_arrays": 0, "bm25": 0}
+        if self.chunks is not None:
+            usage["vectors"] = self.dense.nbytes()
+            usage["text"] = len(self.chunks.blob)
+            usage["chunk_arrays"] = self.chunks.nbytes() - len(self.chunks.blob)
+            usage["bm25"] = self.bm25.nbytes()
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def coverage(self) -> dict:
+        """How much of the document this version covers; early versions of a progressive ingest cover the first pages"""
+        total = self.meta.get("pages", 0)
+        indexed = self.meta.get("pages_indexed", total)
+        return {"pages_indexed": indexed, "pages_total": total, "complete": indexed >= total}
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "doc_id": self.meta.get("doc_id"),
+            "filename": self.meta.get("filename"),
+            "pages": self.meta.get("pages", 0),
+            "chunks": self.meta.get("chunks", 0),
+            "build_seconds": self.meta.get("build_seconds"),
+            "first_batch_seconds": self.meta.get("first_batch_seconds"),
+            # Cumulative over the page batches: embedding new chunks vs rebuilding the indexes over all of them
+            "embed_seconds": self.meta.get("embed_seconds"),
+            "index_seconds": self.meta.get("index_seconds"),
+            "coverage": self.coverage(),
+            "published_at": self.meta.get("published_at"),
+            "loaded_at": self.loaded_at,
+            "last_access": self.last_access,
+            # Vectors, text and BM25 arrays are memory-mapped when loaded from the store, so their pages are shared
+            "mapped": self.meta.get("mapped", False),
+            "vector_precision": self.dense.precision if self.dense is not None else None,
+            "memory_bytes": self.memory_usage(),
+            "ingest_allocations": self.meta.get("tracemalloc"),
+            "dedup": self.meta.get("dedup"),
+        }
+
+
+class IndexStore:
+    """
+    Versioned on-disk RAG indexes shared by every uvicorn worker.
+
+    The ingesting worker writes a complete version directory, then atomically
+    repoints CURRENT at it. Other workers notice the new number on their next
+    query, attach to it read-only (vectors, chunk text and BM25 arrays are all
+    memory-mapped) and swap
+    their reference; queries already running keep the version they started with.
+
+    Every upload or delete first takes a build ticket. Publishing checks the
+    ticket under a file lock, so a slower build on any worker can never repoint
+    CURRENT over a newer upload or a delete.
+    """
+
+    def __init__(self, root: str = RAG_INDEX_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version}")
+
+    def current_version(self) -> int:
+        try:
+            with open(os.path.join(self.root, POINTER_FILE)) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _reserve_version(self) -> int:
+        # mkdir is atomic, so two workers ingesting at once never share a version
+        version = self.current_version() + 1
+        while True:
+            try:
+                os.mkdir(self._version_dir(version))
+                return version
+            except FileExistsError:
+                version += 1
+
+    def _write_atomic(self, name: str, value: int):
+        tmp_path = os.path.join(self.root, f".{name}.{os.getpid()}")
+        with open(tmp_path, "w") as f:
+            f.write(str(value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, name))
+
+    def _point_to(self, version: int):
+        self._write_atomic(POINTER_FILE, version)
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def current_build(self) -> int:
+        try:
+            with open(os.path.join(self.root, BUILD_FILE)) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def begin_build(self) -> int:
+        """A ticket for a new upload or delete; every build holding an older ticket is superseded"""
+        with self._locked():
+            ticket = self.current_build() + 1
+            self._write_atomic(BUILD_FILE, ticket)
+        return ticket
+
+    def publish(self, chunks: Optional[ChunkStore], dense: Optional[DenseIndex], bm25: Optional[BM25Index],
+                meta: dict, build: Optional[int] = None) -> Optional[dict]:
+        """Write a new version and point CURRENT at it; None (nothing published) if `build` was superseded"""
+        version = self._reserve_version()
+        path = self._version_dir(version)
+
+        if chunks is not None:
+            chunks.save(path)
+            dense.save(path)
+            bm25.save(path)
+
+        meta = {**meta, "version": version, "format": INDEX_FORMAT, "published_at": time.time()}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        with self._locked():
+            superseded = build is not None and build != self.current_build()
+            if not superseded:
+                self._point_to(version)
+        if superseded:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        self._prune(version)
+        return meta
+
+    def publish_empty(self, build: Optional[int] = None) -> Optional[dict]:
+        """Publish a version with no document so every worker drops the current one"""
+        return self.publish(None, None, None, {"deleted": True}, build)
+
+    def load(self, version: int) -> Optional[LoadedIndex]:
+        if version <= 0:
+            return None
+        path = self._version_dir(version)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("deleted") or meta.get("format") != INDEX_FORMAT:
+            # Nothing to serve: deleted, or written by an older release (re-upload to rebuild)
+            return LoadedIndex(version, None, None, None, meta)
+
+        chunks = ChunkStore.load(path)
+        dense = DenseIndex.load(path, MMAP_FLAGS)
+        bm25 = BM25Index.load(path, word_tokenize)
+        return LoadedIndex(version, chunks, dense, bm25, {**meta, "mapped": True})
+
+    def _prune(self, latest: int):
+        # Older versions stay around briefly for workers still attached to them;
+        # unlinking a mapped file is safe, the pages live until the last unmap.
+        for name in os.listdir(self.root):
+            if name.startswith("v") and name[1:].isdigit():
+                if int(name[1:]) <= latest - RAG_INDEX_KEEP_VERSIONS:
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
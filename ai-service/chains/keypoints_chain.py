@@ -1,10 +1,12 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from utils.config import llm_model
+from utils.deadline import bind_deadline, deadline_config
+from utils.tracing import traced_config
 
 
-def extract_keypoints(text: str):
-    llm = llm_model
+def build_keypoints_chain():
+    llm = bind_deadline(llm_model)
     prompt = PromptTemplate.from_template(
         """Analyze the following notes and extract the most crucial information, organizing it into clear, memorable one line key points:
         {text}
@@ -29,6 +31,16 @@ def extract_keypoints(text: str):
     parser = StrOutputParser()
     chain = prompt | llm | parser
 
-    result = chain.invoke({"text": text})
+    return chain
+
+
+def extract_keypoints(text: str):
+    result = build_keypoints_chain().invoke({"text": text}, config=traced_config(deadline_config()))
+
+    return result
+
+
+async def aextract_keypoints(text: str):
+    result = await build_keypoints_chain().ainvoke({"text": text}, config=traced_config(deadline_config()))
 
     return result
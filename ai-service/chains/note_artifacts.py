@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from chains.extractive_chain import should_use_fast_path, extract_keypoints_fast, summarize_text_fast
+from chains.keypoints_chain import aextract_keypoints
+from chains.notes_index import note_text
+from chains.summarization_chain import asummarize_text_notes
+from utils.config import (
+    NOTE_ARTIFACTS_DB, NOTE_ARTIFACT_DEBOUNCE_SECONDS, NOTE_ARTIFACT_CONCURRENCY, NOTE_ARTIFACT_TOMBSTONE_SECONDS,
+)
+from utils.metrics import NOTE_ARTIFACTS
+
+logger = logging.getLogger(__name__)
+
+
+KINDS = ("summary", "keypoints")
+
+
+async def generate_artifact(kind: str, text: str) -> dict:
+    """Same routing as /summarize_text and /keypoints in auto mode"""
+    if kind == "summary":
+        if should_use_fast_path(text):
+            return {"summary": summarize_text_fast(text), "engine": "extractive"}
+        return {"summary": await asummarize_text_notes(text), "engine": "llm"}
+    if should_use_fast_path(text):
+        return {"keypoints": extract_keypoints_fast(text), "engine": "extractive"}
+    return {"keypoints": await aextract_keypoints(text), "engine": "llm"}
+
+
+class ArtifactStore:
+    """
+    Precomputed artifacts per (user, note, kind) in SQLite, shared by every worker.
+    Deleting a note leaves a tombstone for a while, and writes for tombstoned notes
+    are dropped, so a precomputation still running on any worker can't put the
+    note's artifacts back after the delete.
+    """
+
+    def __init__(self, path: str = NOTE_ARTIFACTS_DB, tombstone_seconds: float = NOTE_ARTIFACT_TOMBSTONE_SECONDS):
+        self.path = path
+        self.tombstone_seconds = tombstone_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            # WAL: readers never block on a worker writing a fresh artifact
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " user_id TEXT, note_id TEXT, kind TEXT, content_hash TEXT, result TEXT, computed_at REAL,"
+                " PRIMARY KEY (user_id, note_id, kind))"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS deleted_notes ("
+                " user_id TEXT, note_id TEXT, deleted_at REAL, PRIMARY KEY (user_id, note_id))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, user_id: str, note_id: str, kind: str) -> Optional[dict]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT content_hash, result, computed_at FROM artifacts WHERE user_id = ? AND note_id = ? AND kind = ?",
+                (user_id, note_id, kind),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "result": json.loads(row[1]), "computed_at": row[2]}
+
+    def put(self, user_id: str, note_id: str, kind: str, content_hash: str, result: dict):
+        with self._connect() as db:
+            # One statement, so a concurrent delete lands either before (no write) or after (row removed)
+            db.execute(
+                "INSERT OR REPLACE INTO artifacts SELECT ?, ?, ?, ?, ?, ?"
+                " WHERE NOT EXISTS (SELECT 1 FROM deleted_notes WHERE user_id = ? AND note_id = ?)",
+                (user_id, note_id, kind, content_hash, json.dumps(result), time.time(), user_id, note_id),
+            )
+
+    def delete(self, user_id: str, note_id: str):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO deleted_notes VALUES (?, ?, ?)", (user_id, note_id, now))
+            db.execute("DELETE FROM deleted_notes WHERE deleted_at < ?", (now - self.tombstone_seconds,))
+            db.execute("DELETE FROM artifacts WHERE user_id = ? AND note_id = ?", (user_id, note_id))
+
+
+class NoteArtifacts:
+    """
+    Precomputes summaries and keypoints when notes change, so opening a note's
+    summary is a cache read. Events are debounced per note (an editor autosaving
+    every few seconds triggers one computation once it goes quiet) and skipped
+    when the note's content hash matches what is already stored. Debouncing is
+    per worker; the hash check keeps the rare cross-worker duplicate cheap. A
+    newer save or a delete cancels the note's running precomputation.
+    """
+
+    def __init__(self, store: ArtifactStore = None, debounce: float = NOTE_ARTIFACT_DEBOUNCE_SECONDS,
+                 concurrency: int = NOTE_ARTIFACT_CONCURRENCY):
+        self.store = store or ArtifactStore()
+        self.debounce = debounce
+        self._timers = {}  # (user_id, note_id) -> asyncio.TimerHandle
+        self._tasks = {}  # (user_id, note_id) -> asyncio.Task
+        # Background work only: keeps precomputation from crowding out interactive LLM calls
+        self._slots = asyncio.Semaphore(concurrency)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def note_changed(self, user_id: str, note_id: str, title: str, desc: str):
+        """Schedule precomputation; must be called on the event loop"""
+        key = (user_id, note_id)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        text = note_text(title, desc)
+        if not text:
+            return
+        self._timers[key] = asyncio.get_running_loop().call_later(self.debounce, self._start, key, text)
+
+    async def note_deleted(self, user_id: str, note_id: str):
+        key = (user_id, note_id)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # A put already handed to a thread may still finish; the store's tombstone drops it
+        await asyncio.to_thread(self.store.delete, user_id, note_id)
+
+    def _start(self, key, text: str):
+        self._timers.pop(key, None)
+        running = self._tasks.pop(key, None)
+        if running is not None:
+            running.cancel()  # Computing from content that has since changed
+        task = asyncio.create_task(self._precompute(*key, text))
+        self._tasks[key] = task
+        task.add_done_callback(lambda done: self._tasks.pop(key) if self._tasks.get(key) is done else None)
+
+    async def _precompute(self, user_id: str, note_id: str, text: str):
+        content_hash = self.content_hash(text)
+        async with self._slots:
+            for kind in KINDS:
+                stored = await asyncio.to_thread(self.store.get, user_id, note_id, kind)
+                if stored is not None and stored["content_hash"] == content_hash:
+                    NOTE_ARTIFACTS.labels(kind=kind, outcome="unchanged").inc()
+                    continue
+                try:
+                    result = await generate_artifact(kind, text)
+                except Exception:
+                    # The lookup endpoint falls back to generating on demand
+                    NOTE_ARTIFACTS.labels(kind=kind, outcome="error").inc()
+                    logger.exception("Precomputing %s for note %s failed", kind, note_id)
+                    continue
+                await asyncio.to_thread(self.store.put, user_id, note_id, kind, content_hash, result)
+                NOTE_ARTIFACTS.labels(kind=kind, outcome="computed").inc()
+
+    async def lookup(self, user_id: str, note_id: str, kind: str, title: str = "", desc: str = "") -> Optional[dict]:
+        """
+        The stored artifact, or None. When the note's content is supplied, an
+        artifact computed from older content doesn't count.
+        """
+        stored = await asyncio.to_thread(self.store.get, user_id, note_id, kind)
+        text = note_text(title, desc)
+        if stored is None or (text and stored["content_hash"] != self.content_hash(text)):
+            NOTE_ARTIFACTS.labels(kind=kind, outcome="miss").inc()
+            return None
+        NOTE_ARTIFACTS.labels(kind=kind, outcome="hit").inc()
+        return {**stored["result"], "cached": True, "computed_at": stored["computed_at"]}
+
+    async def generate(self, user_id: str, note_id: str, kind: str, title: str, desc: str) -> dict:
+        """On-demand fallback for a lookup miss; the result is stored for next time"""
+        text = note_text(title, desc)
+        result = await generate_artifact(kind, text)
+        await asyncio.to_thread(self.store.put, user_id, note_id, kind, self.content_hash(text), result)
+        return {**result, "cached": False, "computed_at": time.time()}
@@ -0,0 +1,368 @@
+import fcntl
+import hashlib
+import math
+import os
+import pickle
+import re
+import struct
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+from utils.config import hf_embeddings, NOTES_INDEX_DIR, NOTES_INDEX_CACHE_USERS, NOTES_MIN_SIMILARITY, NOTES_JOURNAL_MIN_RECORDS
+
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_C = 60
+# Same lexical / dense split as the PDF hybrid retriever
+LEXICAL_WEIGHT = 0.45
+DENSE_WEIGHT = 0.55
+# Journal records are length-prefixed pickles of (note_id, vector, text); a delete has no vector
+RECORD_HEADER = struct.Struct("<I")
+
+
+def note_text(title: str, desc: str) -> str:
+    # Note bodies come from the rich-text editor as HTML
+    return f"{title}\n{TAG_PATTERN.sub(' ', desc or '')}".strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class UserNotesIndex:
+    """
+    One user's notes: a dense matrix of normalized embeddings plus an inverted
+    index for BM25. Upserts overwrite a row in place and deletes swap the last
+    row into the hole, so updates never rebuild the index. New rows go into
+    spare capacity (doubled when full), so adding a note doesn't copy the matrix.
+    """
+
+    def __init__(self, dim: int):
+        self.note_ids: List[str] = []
+        self.rows = {}
+        self._buffer = np.zeros((0, dim), dtype=np.float32)
+        self.vectors = self._buffer  # The used rows of _buffer
+        self.term_counts: List[Counter] = []
+        self.lengths: List[int] = []
+        self.postings = {}  # term -> {row: tf}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.note_ids)
+
+    def __getstate__(self):
+        # Only the used rows are pickled
+        state = self.__dict__.copy()
+        del state["_buffer"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buffer = self.vectors
+
+    def _append_vector(self, vector: np.ndarray):
+        used = len(self.vectors)
+        if used == len(self._buffer):
+            buffer = np.zeros((max(2 * used, 16), self._buffer.shape[1]), dtype=np.float32)
+            buffer[:used] = self.vectors
+            self._buffer = buffer
+        self._buffer[used] = vector
+        self.vectors = self._buffer[:used + 1]
+
+    def _index_terms(self, row: int, counts: Counter):
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[row] = tf
+        self.total_length += self.lengths[row]
+
+    def _unindex_terms(self, row: int):
+        counts = self.term_counts[row]
+        for term in counts:
+            rows = self.postings[term]
+            del rows[row]
+            if not rows:
+                del self.postings[term]
+        self.total_length -= self.lengths[row]
+
+    def upsert(self, note_id: str, vector: np.ndarray, text: str):
+        counts = Counter(tokenize(text))
+        row = self.rows.get(note_id)
+        if row is None:
+            row = len(self.note_ids)
+            self.rows[note_id] = row
+            self.note_ids.append(note_id)
+            self.term_counts.append(counts)
+            self.lengths.append(sum(counts.values()))
+            self._append_vector(vector)
+        else:
+            self._unindex_terms(row)
+            self.term_counts[row] = counts
+            self.lengths[row] = sum(counts.values())
+            self.vectors[row] = vector
+        self._index_terms(row, counts)
+
+    def delete(self, note_id: str) -> bool:
+        row = self.rows.pop(note_id, None)
+        if row is None:
+            return False
+        self._unindex_terms(row)
+
+        last = len(self.note_ids) - 1
+        if row != last:
+            moved_id = self.note_ids[last]
+            moved_counts = self.term_counts[last]
+            for term in moved_counts:
+                rows = self.postings[term]
+                rows[row] = rows.pop(last)
+            self.note_ids[row] = moved_id
+            self.term_counts[row] = moved_counts
+            self.lengths[row] = self.lengths[last]
+            self.vectors[row] = self.vectors[last]
+            self.rows[moved_id] = row
+
+        self.note_ids.pop()
+        self.term_counts.pop()
+        self.lengths.pop()
+        self.vectors = self.vectors[:last]
+        return True
+
+    def _bm25(self, query: str) -> dict:
+        n = len(self.note_ids)
+        avg_length = self.total_length / n if n else 0
+        scores = {}
+        for term in set(tokenize(query)):
+            rows = self.postings.get(term)
+            if not rows:
+                continue
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            for row, tf in rows.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[row] / max(avg_length, 1e-9))
+                scores[row] = scores.get(row, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    def search(self, query_vector: np.ndarray, query: str, k: int) -> List[dict]:
+        if not self.note_ids:
+            return []
+
+        # Only the query terms' postings and one matrix-vector product are touched,
+        # never the note text itself
+        candidates = min(len(self.note_ids), max(k * 4, 20))
+        similarity = self.vectors @ query_vector
+        dense_rows = np.argpartition(-similarity, candidates - 1)[:candidates]
+        dense_rows = dense_rows[np.argsort(-similarity[dense_rows])]
+        # Without a lexical hit, a note needs real semantic closeness to be returned at all
+        dense_rows = dense_rows[similarity[dense_rows] >= NOTES_MIN_SIMILARITY]
+
+        lexical = self._bm25(query)
+        lexical_rows = sorted(lexical, key=lexical.get, reverse=True)[:candidates]
+
+        # Weighted reciprocal rank fusion, as in EnsembleRetriever
+        fused = {}
+        for rank, row in enumerate(dense_rows):
+            fused[int(row)] = fused.get(int(row), 0.0) + DENSE_WEIGHT / (rank + 1 + RRF_C)
+        for rank, row in enumerate(lexical_rows):
+            fused[row] = fused.get(row, 0.0) + LEXICAL_WEIGHT / (rank + 1 + RRF_C)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [
+            {
+                "note_id": self.note_ids[row],
+                "score": round(fused[row], 6),
+                "semantic_score": round(float(similarity[row]), 4),
+                "lexical_score": round(lexical.get(row, 0.0), 4),
+            }
+            for row in ranked
+        ]
+
+
+class CachedIndex:
+    """A worker's copy of one user's index and how far into the journal it has replayed"""
+
+    def __init__(self, snapshot_mtime_ns, journal_inode, index: Optional[UserNotesIndex]):
+        self.snapshot_mtime_ns = snapshot_mtime_ns
+        self.journal_inode = journal_inode
+        self.index = index
+        self.offset = 0  # Bytes of the journal already applied
+        self.records = 0
+
+    def __len__(self):
+        return len(self.index) if self.index is not None else 0
+
+    def apply(self, note_id: str, vector: Optional[np.ndarray], text: Optional[str]):
+        if vector is None:
+            if self.index is not None:
+                self.index.delete(note_id)
+            return
+        if self.index is None:
+            self.index = UserNotesIndex(vector.shape[0])
+        self.index.upsert(note_id, vector, text)
+
+
+class NotesIndex:
+    """
+    Per-user note indexes persisted under NOTES_INDEX_DIR so that every worker
+    serves the same data. Each user has a snapshot (a pickled UserNotesIndex) and
+    an append-only journal of the upserts and deletes made since, so a save
+    appends one record rather than rewriting the whole index. Writers take a
+    per-user file lock; each worker replays just the journal records it hasn't
+    seen. Once the journal holds as many records as the index has notes it is
+    folded into a new snapshot, which keeps saves O(1) amortized.
+    """
+
+    def __init__(self, root: str = NOTES_INDEX_DIR, embeddings=hf_embeddings):
+        self.root = root
+        self.embeddings = embeddings
+        self._cache = OrderedDict()  # user_id -> CachedIndex
+        # Replays mutate the cached index in place, so searches and replays take turns
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, user_id: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(user_id.encode()).hexdigest()[:32] + ".pkl")
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-9)
+
+    def _remember(self, user_id: str, cached: CachedIndex):
+        self._cache[user_id] = cached
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > NOTES_INDEX_CACHE_USERS:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, user_id: str) -> Optional[CachedIndex]:
+        """The user's index with every journal record applied; call with self._lock held"""
+        path = self._path(user_id)
+        snapshot, journal = self._stat(path), self._stat(path + ".journal")
+        if snapshot is None and journal is None:
+            self._cache.pop(user_id, None)
+            return None
+        snapshot_mtime_ns = snapshot.st_mtime_ns if snapshot else None
+        journal_inode = journal.st_ino if journal else None
+
+        cached = self._cache.get(user_id)
+        if cached is None or (cached.snapshot_mtime_ns, cached.journal_inode) != (snapshot_mtime_ns, journal_inode):
+            # First load, or another worker compacted or rebuilt the index since
+            index = None
+            if snapshot is not None:
+                with open(path, "rb") as f:
+                    index = pickle.load(f)
+            cached = CachedIndex(snapshot_mtime_ns, journal_inode, index)
+        if journal is not None and journal.st_size > cached.offset:
+            self._replay(path + ".journal", cached)
+        self._remember(user_id, cached)
+        return cached
+
+    @staticmethod
+    def _replay(journal_path: str, cached: CachedIndex):
+        with open(journal_path, "rb") as f:
+            if os.fstat(f.fileno()).st_ino != cached.journal_inode:
+                return  # Replaced since we looked; the next load starts over from the new files
+            f.seek(cached.offset)
+            data = f.read()
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            (size,) = RECORD_HEADER.unpack_from(data, position)
+            end = position + RECORD_HEADER.size + size
+            if end > len(data):
+                break  # A writer is mid-append; picked up on the next load
+            cached.apply(*pickle.loads(data[position + RECORD_HEADER.size:end]))
+            cached.records += 1
+            position = end
+        cached.offset += position
+
+    @contextmanager
+    def _locked(self, user_id: str):
+        path = self._path(user_id)
+        with open(path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_snapshot(self, user_id: str, path: str, index: UserNotesIndex) -> CachedIndex:
+        """Replace the snapshot and start an empty journal; call with both locks held"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # A new file rather than a truncate, so readers can tell the journal was restarted
+        open(tmp_path, "wb").close()
+        os.replace(tmp_path, path + ".journal")
+        cached = CachedIndex(os.stat(path).st_mtime_ns, os.stat(path + ".journal").st_ino, index)
+        self._remember(user_id, cached)
+        return cached
+
+    def _append(self, user_id: str, path: str, note_id: str, vector: Optional[np.ndarray] = None,
+                text: Optional[str] = None) -> CachedIndex:
+        """Journal one upsert (or a delete, without a vector); call with the file lock held"""
+        payload = pickle.dumps((note_id, vector, text), protocol=pickle.HIGHEST_PROTOCOL)
+        with open(path + ".journal", "ab") as f:
+            f.write(RECORD_HEADER.pack(len(payload)) + payload)
+        with self._lock:
+            cached = self._load(user_id)
+            if cached.records >= max(NOTES_JOURNAL_MIN_RECORDS, len(cached)) and cached.index is not None:
+                cached = self._write_snapshot(user_id, path, cached.index)
+            return cached
+
+    def upsert(self, user_id: str, note_id: str, title: str, desc: str) -> int:
+        text = note_text(title, desc)
+        vector = self._embed(text)
+        with self._locked(user_id) as path:
+            return len(self._append(user_id, path, note_id, vector, text))
+
+    def delete(self, user_id: str, note_id: str) -> bool:
+        with self._locked(user_id) as path:
+            with self._lock:
+                cached = self._load(user_id)
+                if cached is None or cached.index is None or note_id not in cached.index.rows:
+                    return False
+            self._append(user_id, path, note_id)
+            return True
+
+    def reindex(self, user_id: str, notes: List[tuple]) -> int:
+        """
+        Replace the user's index with exactly these (note_id, title, desc) notes:
+        backfills notes saved before indexing existed, or whose sync was lost.
+        """
+        if not notes:
+            with self._locked(user_id) as path, self._lock:
+                for stale in (path, path + ".journal"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                self._cache.pop(user_id, None)
+            return 0
+        texts = [note_text(title, desc) for _, title, desc in notes]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32).reshape(len(texts), -1)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        index = UserNotesIndex(vectors.shape[1])
+        for (note_id, _, _), vector, text in zip(notes, vectors, texts):
+            index.upsert(note_id, vector, text)
+        with self._locked(user_id) as path, self._lock:
+            return len(self._write_snapshot(user_id, path, index))
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return len(self._load(user_id) or ())
+
+    def search(self, user_id: str, query: str, k: int = 10) -> List[dict]:
+        query_vector = self._embed(query)
+        with self._lock:
+            cached = self._load(user_id)
+            if cached is None or cached.index is None:
+                return []
+            return cached.index.search(query_vector, query, k)
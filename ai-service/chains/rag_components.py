@@ -1,38 +1,134 @@
+import asyncio
 import os
-import shutil
 from tempfile import NamedTemporaryFile
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_classic.chains import RetrievalQA
 from langchain_classic.retrievers import ContextualCompressionRetriever
 from langchain_classic.retrievers.document_compressors import LLMChainExtractor
 from langchain_core.prompts import PromptTemplate
-from utils.config import llm_model, hf_embeddings
-from langchain_community.retrievers import BM25Retriever
+from utils.config import (llm_model, hf_embeddings, RAG_TRACEMALLOC, RAG_DEDUP, QUERY_PDF_BATCH_LLM_CONCURRENCY,
+                          RAG_FIRST_BATCH_PAGES, RAG_BATCH_PAGES, RAG_CHUNKER, RAG_ANSWER_CACHE,
+                          RAG_K_SPARSE, RAG_K_DENSE, RAG_DENSE_WEIGHT)
 from langchain_core.retrievers import BaseRetriever
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
 import numpy as np
-from langchain_community.retrievers import BM25Retriever
-from langchain_classic.retrievers import EnsembleRetriever
 import nltk
 from nltk.tokenize import word_tokenize
-from langchain_classic.retrievers import ContextualCompressionRetriever 
 from langchain_classic.retrievers.document_compressors import CrossEncoderReranker
 from langchain_community.cross_encoders import HuggingFaceCrossEncoder
 from fastapi import UploadFile
+from utils.deadline import bind_deadline, check_deadline, deadline_config
+from chains.index_store import IndexStore, LoadedIndex
+from chains.chunk_store import ChunkStore
+from chains.dedup import strip_boilerplate, drop_near_duplicates
+from chains import chunker as token_chunker
+from chains.confidence_gate import skip_llm, not_found
+from chains.answer_cache import SemanticAnswerCache
+from chains.chunk_retrievers import BM25Index, BM25ChunkRetriever, DenseChunkRetriever, HybridChunkRetriever, build_dense_index, embed_queries
+from utils.metrics import StageMetricsHandler, LOADED_INDEXES, INDEX_MEMORY_BYTES, INGEST_FAILURES
+from utils.tracing import stage_timer, span, current_span, traced_config
+from utils.memory import allocation_diff, nltk_cache_stats, rss_bytes
+from utils.admission import admission
+from collections import Counter
+from contextlib import nullcontext
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class IndexBuild:
+    """A PDF being indexed page batch by page batch; kept until its last batch is published"""
+
+    def __init__(self, meta: dict, pages_total: int, ticket: int):
+        self.meta = meta
+        self.pages_total = pages_total
+        self.ticket = ticket  # From IndexStore.begin_build
+        self.chunks = []
+        self.vectors = []  # One fp32 array per batch
+        self.term_counts = []  # BM25 term counts per chunk
+        self.pages_indexed = 0
+        self.embed_seconds = 0.0
+        self.index_seconds = 0.0
+        self.started = time.perf_counter()
 
 
 class RAGPipeline:
 
-    def __init__(self):
-        self.vectorstore = None
-        self.syntactic_retriever = None
+    def __init__(self, store: IndexStore = None, answer_cache: bool = RAG_ANSWER_CACHE):
+        # Indexes live in a shared versioned store so every worker process sees
+        # the PDF that any one of them ingested
+        self.store = store or IndexStore()
+        self.active = None
+        # Shared by every batch on this worker, so concurrent batches don't multiply the LLM fan-out
+        self._batch_llm_slots = asyncio.Semaphore(QUERY_PDF_BATCH_LLM_CONCURRENCY)
+        # Answers to earlier questions, reused for paraphrases that retrieve the same chunks
+        self.answer_cache = SemanticAnswerCache() if answer_cache else None
+        # Progressive ingestion: the background task appending page batches. Superseded builds
+        # (on any worker) are stopped by the store's build tickets
+        self._ingestion = None
+
+    def current_index(self):
+        """The latest published index, hot-swapped without locking when a new version appears"""
+        version = self.store.current_version()
+        active = self.active
+        hit = active is not None and active.version == version
+        request_span = current_span()
+        if request_span is not None:
+            request_span.set_attribute("index.cache_hit", hit)
+        if hit:
+            active.last_access = time.time()
+            return active
+        with stage_timer("query_pdf", "load_index"):
+            try:
+                active = self.store.load(version)
+            except FileNotFoundError:
+                # Version pruned between reading CURRENT and loading it; take the newer one
+                active = self.store.load(self.store.current_version())
+        self._activate(active)
+        return active
+
+    def _activate(self, index):
+        self.active = index
+        loaded = index is not None and index.chunks is not None
+        LOADED_INDEXES.set(1 if loaded else 0)
+
+        sizes = index.memory_usage() if index is not None else {}
+        for component in ("vectors", "text", "chunk_arrays", "bm25"):
+            INDEX_MEMORY_BYTES.labels(component=component).set(sizes.get(component, 0))
+
+    def stats(self) -> dict:
+        """Loaded documents with their memory breakdown, for the /stats endpoint"""
+        index = self.current_index()
+        documents = [index.stats()] if index is not None and index.chunks is not None else []
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "current_version": self.store.current_version(),
+            "documents": documents,
+            "answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None,
+            "nltk": nltk_cache_stats(),
+        }
+
+    @property
+    def vectorstore(self):
+        """The loaded FAISS index, or None when no PDF is loaded"""
+        index = self.current_index()
+        return index.dense if index else None
+
+    @property
+    def syntactic_retriever(self):
+        """The loaded BM25 index, or None when no PDF is loaded"""
+        index = self.current_index()
+        return index.bm25 if index else None
                 
     async def process_pdf(self, file: UploadFile):
         # Read file content (async-safe)
-        content = await file.read()
+        with stage_timer("process_pdf", "read_upload"):
+            content = await file.read()
 
         # Save to a temporary file
         with NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
@@ -40,41 +136,181 @@ class RAGPipeline:
             temp_path = temp_pdf.name
 
         try:
-            # Load and chunk PDF 
-            docs = PyMuPDFLoader(temp_path).load()
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=800,
-                chunk_overlap=150,
-                separators=["\n\n", "\n", ".", "!", "?", " ", ""],
-                length_function=len
-            )
-            chunks = splitter.split_documents(docs)
-
-            # Create vectorstore + BM25 retriever
-            self.vectorstore = FAISS.from_documents(chunks, hf_embeddings)
-            self.syntactic_retriever = BM25Retriever.from_documents(
-                documents=chunks,
-                preprocess_func=word_tokenize
-            )
-
-            return {"message": "PDF processed successfully"}
-
+            # Parsing, embedding and index builds are CPU bound: keep them off the event loop
+            # so interactive requests are still served while a PDF ingests
+            docs, chunks, dedup = await asyncio.to_thread(self._load_chunks, temp_path)
         finally:
             # Ensure temp file is removed even if processing fails
             if os.path.exists(temp_path):
                 os.remove(temp_path)
-    
 
+        meta = {
+            "filename": file.filename,
+            "doc_id": hashlib.sha256(content).hexdigest()[:16],
+            "dedup": dedup,
+        }
+        build = self._start_build(meta, len(docs))
+        batches = self.page_batches(chunks, len(docs))
 
-    def query_pdf(self, query: str):
-        if not self.vectorstore:
-            return {"error": "No PDF loaded. Please upload a PDF first."}
-            
-        #Setup retriever with compression
+        # The first pages are published before we answer, so the PDF is queryable right away;
+        # later batches are appended in the background, each as a new version
+        pages_end, first_chunks = next(batches)
+        index = await asyncio.to_thread(self._publish_batch, build, first_chunks, pages_end)
+        if index is None:
+            return {"error": "Superseded by a newer upload"}
+        self._activate(index)
+        if pages_end < len(docs):
+            self._ingestion = asyncio.create_task(self._ingest_remaining(build, batches))
+
+        return {"message": "PDF processed successfully", "version": index.version, "coverage": index.coverage()}
+
+    def _load_chunks(self, temp_path: str):
+        with stage_timer("process_pdf", "load_pdf"):
+            docs = PyMuPDFLoader(temp_path).load()
+        with stage_timer("process_pdf", "split") as stage:
+            chunks, dedup = self.prepare_chunks(docs)
+            stage.set_attribute("pages", len(docs))
+            stage.set_attribute("chunks", len(chunks))
+        return docs, chunks, dedup
+
+    @staticmethod
+    def page_batches(chunks: List[Document], pages_total: int):
+        """(pages covered so far, chunks of the next page range): RAG_FIRST_BATCH_PAGES, then doubling batches"""
+        end = min(RAG_FIRST_BATCH_PAGES, pages_total)
+        position = 0
+        while True:
+            batch = []
+            while position < len(chunks) and chunks[position].metadata.get("page", 0) < end:
+                batch.append(chunks[position])
+                position += 1
+            yield end, batch
+            if end >= pages_total:
+                return
+            end = min(max(2 * end, end + RAG_BATCH_PAGES), pages_total)
+
+    def _start_build(self, meta: dict, pages_total: int) -> "IndexBuild":
+        return IndexBuild(meta, pages_total, self._supersede())
+
+    def _supersede(self) -> int:
+        """A new upload or a delete replaces whatever is still being indexed in the background, on any worker"""
+        ticket = self.store.begin_build()
+        if self._ingestion is not None:
+            self._ingestion.cancel()
+            self._ingestion = None
+        return ticket
+
+    async def _ingest_remaining(self, build: "IndexBuild", batches):
+        try:
+            for pages_end, chunks in batches:
+                # Background batches queue behind uploads for the same slots, but are never shed
+                async with admission.slot("process-pdf", shed=False):
+                    if self.store.current_build() != build.ticket:
+                        return  # Another worker took a newer upload or a delete
+                    index = await asyncio.to_thread(self._publish_batch, build, chunks, pages_end)
+                if index is None:
+                    return
+                self._activate(index)
+        except Exception:
+            # Queries keep working on the pages indexed so far; coverage shows where it stopped
+            INGEST_FAILURES.inc()
+            logger.exception("Background indexing of %s stopped at page %d of %d",
+                             build.meta["filename"], build.pages_indexed, build.pages_total)
+
+    async def wait_for_ingestion(self):
+        """Until the latest upload is fully indexed (evaluation runs query the whole document)"""
+        if self._ingestion is not None:
+            await self._ingestion
+
+    def _publish_batch(self, build: "IndexBuild", chunks: List[Document], pages_end: int) -> Optional[LoadedIndex]:
+        """Embed one page batch and publish a version over everything indexed so far; None if superseded"""
+        # Opt-in: what the build allocated, to spot leaks and plan capacity
+        with (allocation_diff() if RAG_TRACEMALLOC else nullcontext()) as allocations:
+            texts = [chunk.page_content for chunk in chunks]
+            if texts:
+                with stage_timer("process_pdf", "embed", texts=len(texts)):
+                    embed_started = time.perf_counter()
+                    build.vectors.append(np.asarray(hf_embeddings.embed_documents(texts), dtype=np.float32))
+                    build.embed_seconds += time.perf_counter() - embed_started
+            build.chunks.extend(chunks)
+            build.term_counts.extend(Counter(word_tokenize(text)) for text in texts)
+
+            # Earlier batches keep their vectors and term counts; the compact store and both indexes
+            # are rebuilt over all chunks
+            index_started = time.perf_counter()
+            store = ChunkStore.from_documents(build.chunks)
+            with stage_timer("process_pdf", "faiss_build"):
+                dense = build_dense_index(np.vstack(build.vectors))
+            with stage_timer("process_pdf", "bm25_build"):
+                bm25 = BM25Index.from_counts(build.term_counts, word_tokenize)
+            build.index_seconds += time.perf_counter() - index_started
+
+        elapsed = time.perf_counter() - build.started
+        build.meta.setdefault("first_batch_seconds", elapsed)
+        dedup = build.meta.get("dedup")
+        if dedup:
+            # Removed chunks would have cost the same per chunk as the ones we kept
+            removed = dedup["near_duplicate_chunks"]
+            per_chunk = 1 / max(len(store), 1)
+            dedup = {
+                **dedup,
+                "embed_seconds_saved": build.embed_seconds * removed * per_chunk,
+                "index_bytes_saved": int((dense.nbytes() + bm25.nbytes() + store.nbytes()) * removed * per_chunk),
+            }
+        meta = {**build.meta, "pages": build.pages_total, "pages_indexed": pages_end, "chunks": len(store),
+                "build_seconds": elapsed, "embed_seconds": build.embed_seconds, "index_seconds": build.index_seconds,
+                "dedup": dedup}
+        if allocations is not None:
+            meta["tracemalloc"] = allocations
+
+        with stage_timer("process_pdf", "publish"):
+            meta = self.store.publish(store, dense, bm25, meta, build.ticket)
+        del store, dense, bm25
+        if meta is None:
+            return None
+        build.pages_indexed = pages_end
+        # Attach to the published files like every other worker, so the build's heap copies
+        # (including fp32 vectors kept for rescoring) are dropped rather than held resident
+        return self.store.load(meta["version"])
+
+    @staticmethod
+    def split_documents(docs: List[Document]) -> List[Document]:
+        if RAG_CHUNKER == "token":
+            return token_chunker.split_documents(docs)
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=800,
+            chunk_overlap=150,
+            separators=["\n\n", "\n", ".", "!", "?", " ", ""],
+            length_function=len
+        )
+        return splitter.split_documents(docs)
+
+    @classmethod
+    def prepare_chunks(cls, docs: List[Document]):
+        """Split pages into chunks, first stripping repeated page boilerplate and then dropping near-duplicate chunks"""
+        if not RAG_DEDUP:
+            return cls.split_documents(docs), None
+        docs, report = strip_boilerplate(docs)
+        chunks = cls.split_documents(docs)
+        report["chunks_before"] = len(chunks)
+        chunks, near_duplicates = drop_near_duplicates(chunks)
+        report.update(near_duplicates)
+        return chunks, report
+
+    @staticmethod
+    def build_retrievers(index: LoadedIndex):
+        """(BM25, FAISS, hybrid) retrievers over one index version"""
         #base_retriever = self.vectorstore.as_retriever(search_kwargs={"k": 6})
-        semantic_retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})  
-        hybrid_retriever = EnsembleRetriever(retrievers = [self.syntactic_retriever, semantic_retriever],
-                                             weights = [0.45, 0.55])  
+        syntactic_retriever = BM25ChunkRetriever(store=index.chunks, bm25=index.bm25, k=RAG_K_SPARSE)
+        semantic_retriever = DenseChunkRetriever(store=index.chunks, index=index.dense, embeddings=hf_embeddings,
+                                                 k=RAG_K_DENSE)
+        hybrid_retriever = HybridChunkRetriever(store=index.chunks, bm25=index.bm25, index=index.dense,
+                                                embeddings=hf_embeddings, k_sparse=RAG_K_SPARSE, k_dense=RAG_K_DENSE,
+                                                weights=[1 - RAG_DENSE_WEIGHT, RAG_DENSE_WEIGHT])
+        return syntactic_retriever, semantic_retriever, hybrid_retriever
+
+    def _build_qa_chain(self, index: LoadedIndex):
+        #Setup retriever with compression
+        _, _, hybrid_retriever = self.build_retrievers(index)
         
         
         #compressor = LLMChainExtractor.from_llm(llm_model)
@@ -112,7 +348,7 @@ class RAGPipeline:
         Reasoned Answer:"""
 
         qa_chain = RetrievalQA.from_chain_type(
-            llm=llm_model,
+            llm=bind_deadline(llm_model),
             retriever=compression_retriever,
             chain_type="stuff",
             chain_type_kwargs={
@@ -123,14 +359,183 @@ class RAGPipeline:
             }
         )
 
-        result = qa_chain.invoke({"query": query})
-        return {"answer": result["result"]}
+        return qa_chain
+
+    def query_pdf(self, query: str):
+        index = self.current_index()
+        if not index or index.chunks is None:
+            return {"error": "No PDF loaded. Please upload a PDF first."}
+
+        with span("query_pdf.answer", **self._span_attributes(index)) as answer_span:
+            vector, chunk_ids, confidence = self._retrieve(index, query)
+            if self._gate(answer_span, confidence, "query_pdf"):
+                return not_found(index, chunk_ids, confidence)
+            cached = self._cached_answer(answer_span, index, vector, chunk_ids, "query_pdf")
+            if cached is not None:
+                return {"answer": cached, "found": True, "cached": True, "confidence": confidence,
+                        "coverage": index.coverage()}
+            # What RetrievalQA does after retrieving, so the gate and cache can sit in between
+            llm_started = time.perf_counter()
+            result = self._build_qa_chain(index).combine_documents_chain.invoke(
+                {"input_documents": index.chunks.documents(chunk_ids), "question": query}, config=self._run_config()
+            )
+            self._cache_answer(index, vector, chunk_ids, result["output_text"], time.perf_counter() - llm_started)
+        return {"answer": result["output_text"], "found": True, "cached": False, "confidence": confidence,
+                "coverage": index.coverage()}
+
+    async def aquery_pdf(self, query: str):
+        # Loading a new version reads and maps it from disk, so keep it off the event loop
+        index = await asyncio.to_thread(self.current_index)
+        if not index or index.chunks is None:
+            return {"error": "No PDF loaded. Please upload a PDF first."}
+
+        check_deadline("retrieval")
+        with span("query_pdf.answer", **self._span_attributes(index)) as answer_span:
+            vector, chunk_ids, confidence = await asyncio.to_thread(self._retrieve, index, query)
+            if self._gate(answer_span, confidence, "query_pdf"):
+                return not_found(index, chunk_ids, confidence)
+            cached = self._cached_answer(answer_span, index, vector, chunk_ids, "query_pdf")
+            if cached is not None:
+                return {"answer": cached, "found": True, "cached": True, "confidence": confidence,
+                        "coverage": index.coverage()}
+            check_deadline("llm call")
+            llm_started = time.perf_counter()
+            result = await self._build_qa_chain(index).combine_documents_chain.ainvoke(
+                {"input_documents": index.chunks.documents(chunk_ids), "question": query}, config=self._run_config()
+            )
+            self._cache_answer(index, vector, chunk_ids, result["output_text"], time.perf_counter() - llm_started)
+        return {"answer": result["output_text"], "found": True, "cached": False, "confidence": confidence,
+                "coverage": index.coverage()}
+
+    async def aquery_pdf_batch(self, questions: List[str]):
+        """
+        Answer many questions about the loaded PDF. Retrieval is done once for the
+        whole batch (one embedding pass, one FAISS search, shared BM25 scoring);
+        the per-question LLM calls then run concurrently, capped by
+        QUERY_PDF_BATCH_LLM_CONCURRENCY. Answers come back in question order; a
+        question whose LLM call fails gets an "error" entry instead of an answer.
+        """
+        index = await asyncio.to_thread(self.current_index)
+        if not index or index.chunks is None:
+            return {"error": "No PDF loaded. Please upload a PDF first."}
+
+        check_deadline("retrieval")
+        started = time.perf_counter()
+        _, _, hybrid_retriever = self.build_retrievers(index)
+
+        def retrieve():
+            vectors = embed_queries(hf_embeddings, questions, "query_pdf_batch")
+            return vectors, hybrid_retriever.search_batch(questions, "query_pdf_batch", vectors)
+
+        with span("query_pdf_batch.retrieve", questions=len(questions), **self._span_attributes(index)):
+            vectors, retrieved = await asyncio.to_thread(retrieve)
+        retrieval_seconds = time.perf_counter() - started
+
+        # The same prompt as /query-pdf, fed the documents retrieved above
+        combine_chain = self._build_qa_chain(index).combine_documents_chain
+        config = self._run_config("query_pdf_batch")
+
+        async def answer(question: str, vector, chunk_ids: List[int], confidence: dict):
+            if skip_llm(confidence, "query_pdf_batch"):
+                gated = not_found(index, chunk_ids, confidence)
+                del gated["coverage"]  # Reported once for the batch
+                return {"question": question, **gated, "queued_seconds": 0.0, "llm_seconds": 0.0,
+                        "seconds": time.perf_counter() - started}
+            cached = self._cached_answer(None, index, vector, chunk_ids, "query_pdf_batch")
+            if cached is not None:
+                return {"question": question, "answer": cached, "found": True, "cached": True,
+                        "confidence": confidence, "queued_seconds": 0.0, "llm_seconds": 0.0,
+                        "seconds": time.perf_counter() - started}
+            queued_at = time.perf_counter()
+            async with self._batch_llm_slots:
+                check_deadline("llm call")
+                llm_started = time.perf_counter()
+                result = await combine_chain.ainvoke(
+                    {"input_documents": index.chunks.documents(chunk_ids), "question": question}, config=config
+                )
+            finished = time.perf_counter()
+            self._cache_answer(index, vector, chunk_ids, result["output_text"], finished - llm_started)
+            return {
+                "question": question,
+                "answer": result["output_text"],
+                "found": True,
+                "cached": False,
+                "confidence": confidence,
+                "queued_seconds": llm_started - queued_at,
+                "llm_seconds": finished - llm_started,
+                "seconds": finished - started,
+            }
+
+        async def answer_or_error(position: int, question: str, vector, chunk_ids: List[int], confidence: dict):
+            # One failed or timed-out LLM call shouldn't cost the rest of the batch its answers
+            try:
+                return await answer(question, vector, chunk_ids, confidence)
+            except Exception as e:
+                # The position identifies the question without copying user text into the logs
+                logger.warning("query_pdf_batch question %d of %d failed: %r", position + 1, len(questions), e)
+                return {"question": question, "error": str(e) or type(e).__name__, "found": False,
+                        "confidence": confidence, "seconds": time.perf_counter() - started}
+
+        answers = await asyncio.gather(*(
+            answer_or_error(position, q, vector, ids, confidence)
+            for position, (q, vector, (ids, confidence)) in enumerate(zip(questions, vectors, retrieved))
+        ))
+        return {
+            "answers": answers,
+            "retrieval_seconds": retrieval_seconds,
+            "total_seconds": time.perf_counter() - started,
+            "coverage": index.coverage(),
+        }
     
 
 
 
+    def _retrieve(self, index: LoadedIndex, query: str):
+        """(query vector, fused chunk ids, retrieval confidence); the vector is kept for the answer cache"""
+        _, _, hybrid_retriever = self.build_retrievers(index)
+        with stage_timer("query_pdf", "retrieval"):
+            vector = embed_queries(hf_embeddings, [query])[0]
+            chunk_ids, confidence = hybrid_retriever.search(query, vector)
+        return vector, chunk_ids, confidence
+
+    def _cached_answer(self, answer_span, index: LoadedIndex, vector, chunk_ids: List[int], operation: str):
+        if self.answer_cache is None:
+            return None
+        answer = self.answer_cache.lookup(index.version, vector, chunk_ids, operation)
+        if answer_span is not None:
+            answer_span.set_attribute("answer_cache.hit", answer is not None)
+        return answer
+
+    def _cache_answer(self, index: LoadedIndex, vector, chunk_ids: List[int], answer: str, llm_seconds: float):
+        if self.answer_cache is not None:
+            self.answer_cache.store(index.version, vector, chunk_ids, answer, llm_seconds)
+
+    @staticmethod
+    def _gate(answer_span, confidence: dict, operation: str) -> bool:
+        for signal, score in confidence.items():
+            answer_span.set_attribute(f"retrieval.{signal}", score)
+        skip = skip_llm(confidence, operation)
+        answer_span.set_attribute("retrieval.gated", skip)
+        return skip
+
+    def _span_attributes(self, index: LoadedIndex) -> dict:
+        return {
+            "index.version": index.version,
+            "index.chunks": index.meta.get("chunks", 0),
+            "retriever.k": RAG_K_DENSE,
+            "retriever.k_sparse": RAG_K_SPARSE,
+            "retriever.weights": f"{1 - RAG_DENSE_WEIGHT:g},{RAG_DENSE_WEIGHT:g}",
+        }
+
+    def _run_config(self, operation: str = "query_pdf"):
+        config = deadline_config()
+        config["callbacks"] = config.get("callbacks", []) + [StageMetricsHandler(operation)]
+        return traced_config(config)
+
     def delete_pdf(self):
-        if self.vectorstore:
-            self.vectorstore = None
+        ticket = self._supersede()
+        if self.vectorstore is not None:
+            self.store.publish_empty(ticket)
+            self._activate(None)
             return {"message": "PDF removed successfully"}
         return {"message": "No PDF loaded"}
\ No newline at end of file
@@ -1,6 +1,8 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from utils.config import llm_model
+from utils.deadline import bind_deadline, deadline_config
+from utils.tracing import traced_config
 import json
 
 
@@ -49,7 +51,7 @@ STYLE_PROMPTS = {
 }
 
 
-def stylize_text(text: str, style: str, options: dict = None) -> str:
+def build_stylization_chain(text: str, style: str):
     style = style.lower()
     
     if style not in STYLE_PROMPTS:
@@ -77,11 +79,23 @@ Rewritten text (ONLY the rewritten version, no explanations):"""
         template=template
     )
 
-    chain = prompt | llm_model | StrOutputParser()
+    chain = prompt | bind_deadline(llm_model) | StrOutputParser()
 
-    result = chain.invoke({
+    inputs = {
         'text': text,
         'style_instruction': STYLE_PROMPTS[style]
-    })
+    }
     
+    return chain, inputs
+
+
+def stylize_text(text: str, style: str, options: dict = None) -> str:
+    chain, inputs = build_stylization_chain(text, style)
+    result = chain.invoke(inputs, config=traced_config(deadline_config()))
+    return result.strip()
+
+
+async def astylize_text(text: str, style: str, options: dict = None) -> str:
+    chain, inputs = build_stylization_chain(text, style)
+    result = await chain.ainvoke(inputs, config=traced_config(deadline_config()))
     return result.strip()
@@ -1,10 +1,12 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from utils.config import llm_model
+from utils.deadline import bind_deadline, deadline_config
+from utils.tracing import traced_config
 
 
-def summarize_text_notes(text: str) -> str:
-    """Summarize text to 40-50% of original length"""
+def build_summarization_chain(text: str):
+    """Prompt | LLM chain plus its inputs for summarizing text to 40-50% of original length"""
     
     template = """You are a summarization expert. Reduce the following text to 40-50% of its original length.
 
@@ -32,12 +34,25 @@ Summary (plain text, no formatting):"""
         template=template
     )
 
-    chain = prompt | llm_model | StrOutputParser()
+    chain = prompt | bind_deadline(llm_model) | StrOutputParser()
     
-    summary = chain.invoke({
+    inputs = {
         'text': text,
         'original_length': original_length,
         'target_length': target_length
-    })
+    }
     
+    return chain, inputs
+
+
+def summarize_text_notes(text: str) -> str:
+    """Summarize text to 40-50% of original length"""
+    chain, inputs = build_summarization_chain(text)
+    summary = chain.invoke(inputs, config=traced_config(deadline_config()))
+    return summary.strip()
+
+
+async def asummarize_text_notes(text: str) -> str:
+    chain, inputs = build_summarization_chain(text)
+    summary = await chain.ainvoke(inputs, config=traced_config(deadline_config()))
     return summary.strip()
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, UploadFile, File
+import os
+
+if __name__ == "__main__":
+    import shutil
+    # Each uvicorn worker keeps its own metrics; a shared directory lets /metrics sum them all.
+    # prometheus_client picks its storage when first imported, so this has to run before the
+    # imports below, and files left by an earlier run would be counted again, so start empty
+    multiproc_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prometheus")
+    )
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir)
+
+from fastapi import FastAPI, UploadFile, File, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from models.schemas import TextRequest, stylizeRequest
-from chains.keypoints_chain import extract_keypoints
-from chains.stylization_chain import stylize_text
-from chains.summarization_chain import summarize_text_notes
+from models.schemas import TextRequest, stylizeRequest, NoteUpsertRequest, NoteDeleteRequest, NoteSearchRequest, NoteReindexRequest, QueryBatchRequest, NoteArtifactRequest
+from chains.keypoints_chain import aextract_keypoints
+from chains.stylization_chain import astylize_text
+from chains.summarization_chain import asummarize_text_notes
+from chains.extractive_chain import should_use_fast_path, extract_keypoints_fast, summarize_text_fast
 from chains.rag_components import RAGPipeline
-import os
+from chains.notes_index import NotesIndex
+from chains.note_artifacts import NoteArtifacts
+import asyncio
+from utils.deadline import run_with_deadline
+from utils.admission import admitted
+from utils.metrics import render_metrics, MetricsMiddleware
+from utils.tracing import TracingMiddleware
+from utils.config import PROFILE_TOKEN
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
 
 
 rag_pipeline = RAGPipeline()
+notes_index = NotesIndex()
+note_artifacts = NoteArtifacts()
 
 
 
@@ -21,6 +44,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+if PROFILE_TOKEN:
+    from utils.profiling import ProfilingMiddleware
+    # Registered first, so it sits innermost and the profile shows the handler rather than other middleware
+    app.add_middleware(ProfilingMiddleware)
+
 # Enable CORS so browser-based frontends can call this API during development.
 # For production, restrict `allow_origins` to your frontend domain(s).
 app.add_middleware(
@@ -30,6 +58,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so the root span covers the whole request including metrics
+app.add_middleware(TracingMiddleware)
 
 @app.get("/")
 async def root():
@@ -38,28 +69,45 @@ async def root():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/stats")
+async def stats():
+    # Per worker: each process holds its own view of the loaded documents
+    return await asyncio.to_thread(rag_pipeline.stats)
+
+
 # API Routes for Plain Notes
 
 @app.post("/keypoints")
-async def keypoints(req: TextRequest):
-    points = extract_keypoints(req.text)
-    return {"keypoints": points}
+async def keypoints(req: TextRequest, request: Request):
+    if should_use_fast_path(req.text, req.mode):
+        # CPU bound: off the event loop so other requests keep being served
+        return {"keypoints": await asyncio.to_thread(extract_keypoints_fast, req.text), "engine": "extractive"}
+    points = await run_with_deadline(request, "keypoints", admitted("keypoints", aextract_keypoints(req.text)))
+    return {"keypoints": points, "engine": "llm"}
 
 
 @app.post("/stylize")
-async def stylize(req: stylizeRequest):
-    result = stylize_text(
+async def stylize(req: stylizeRequest, request: Request):
+    result = await run_with_deadline(request, "stylize", admitted("stylize", astylize_text(
         text=req.text,
         style=req.style,
         options=req.options.dict() if req.options else {}
-    )
+    )))
     return {"stylized_text": result}
 
 
 @app.post("/summarize_text")
-async def summarize(req: TextRequest):
-    summary = summarize_text_notes(req.text)
-    return {"summary": summary}
+async def summarize(req: TextRequest, request: Request):
+    if should_use_fast_path(req.text, req.mode):
+        return {"summary": await asyncio.to_thread(summarize_text_fast, req.text), "engine": "extractive"}
+    summary = await run_with_deadline(request, "summarize_text", admitted("summarize_text", asummarize_text_notes(req.text)))
+    return {"summary": summary, "engine": "llm"}
 
 
 # API Routes for RAG Component
@@ -71,17 +119,79 @@ async def summarize(req: TextRequest):
 @app.post("/process-pdf")
 async def process_pdf(file: UploadFile = File(...)):
     print("Received file:", file.filename)
-    result = await rag_pipeline.process_pdf(file)
+    result = await admitted("process-pdf", rag_pipeline.process_pdf(file))
     print("Result:", result)
     return result
 
 
 @app.post("/query-pdf")
-async def query_pdf(request: TextRequest):
-    return rag_pipeline.query_pdf(request.text)
+async def query_pdf(req: TextRequest, request: Request):
+    return await run_with_deadline(request, "query-pdf", admitted("query-pdf", rag_pipeline.aquery_pdf(req.text)))
+
+
+@app.post("/query-pdf/batch")
+async def query_pdf_batch(req: QueryBatchRequest, request: Request):
+    return await run_with_deadline(request, "query-pdf-batch", admitted(
+        "query-pdf-batch", rag_pipeline.aquery_pdf_batch(req.questions)
+    ))
 
 @app.delete("/delete-pdf")
 async def delete_pdf():
     return rag_pipeline.delete_pdf()
 
 
+# API Routes for semantic note search (called by the notes service on save / delete)
+
+@app.post("/notes/upsert")
+async def upsert_note(req: NoteUpsertRequest):
+    count = await asyncio.to_thread(notes_index.upsert, req.user_id, req.note_id, req.title, req.desc)
+    note_artifacts.note_changed(req.user_id, req.note_id, req.title, req.desc)
+    return {"message": "Note indexed", "indexed_notes": count}
+
+
+@app.post("/notes/delete")
+async def delete_note(req: NoteDeleteRequest):
+    removed = await asyncio.to_thread(notes_index.delete, req.user_id, req.note_id)
+    await note_artifacts.note_deleted(req.user_id, req.note_id)
+    return {"message": "Note removed" if removed else "Note not indexed"}
+
+
+@app.post("/notes/semantic-search")
+async def semantic_search(req: NoteSearchRequest):
+    results = await asyncio.to_thread(notes_index.search, req.user_id, req.query, req.k)
+    # Lets the notes service notice notes missing from the index and call /notes/reindex
+    indexed = await asyncio.to_thread(notes_index.count, req.user_id)
+    return {"results": results, "indexed_notes": indexed}
+
+
+@app.post("/notes/reindex")
+async def reindex_notes(req: NoteReindexRequest):
+    count = await asyncio.to_thread(
+        notes_index.reindex, req.user_id, [(note.note_id, note.title, note.desc) for note in req.notes]
+    )
+    return {"message": "Notes reindexed", "indexed_notes": count}
+
+
+ARTIFACT_ENDPOINTS = {"summary": "summarize_text", "keypoints": "keypoints"}
+
+
+@app.post("/notes/artifact")
+async def note_artifact(req: NoteArtifactRequest, request: Request):
+    artifact = await note_artifacts.lookup(req.user_id, req.note_id, req.kind, req.title, req.desc)
+    if artifact is not None:
+        return artifact
+    if not (req.title or req.desc):
+        raise HTTPException(status_code=404, detail=f"No precomputed {req.kind} for this note")
+    # Not ready yet (or the note changed since): generate now, under the same limits as the direct endpoint
+    endpoint = ARTIFACT_ENDPOINTS[req.kind]
+    return await run_with_deadline(request, endpoint, admitted(endpoint, note_artifacts.generate(
+        req.user_id, req.note_id, req.kind, req.title, req.desc
+    )))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    from utils.config import AI_SERVICE_HOST, AI_SERVICE_PORT, AI_SERVICE_WORKERS
+
+    # Safe to fan out: PDF indexes are shared through the on-disk index store
+    uvicorn.run("main:app", host=AI_SERVICE_HOST, port=AI_SERVICE_PORT, workers=AI_SERVICE_WORKERS)
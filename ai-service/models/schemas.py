@@ -1,7 +1,9 @@
+from typing import List, Literal
 from pydantic import BaseModel, Field
 
 class TextRequest(BaseModel):
     text: str 
+    mode: Literal["auto", "fast", "llm"] = "auto"
 
 class Options(BaseModel):
     length: str = "medium"
@@ -10,4 +12,39 @@ class Options(BaseModel):
 class stylizeRequest(BaseModel):
     text: str
     style: str
-    options: Options = Field(default=Options(length="medium", creativity="low"))
\ No newline at end of file
+    options: Options = Field(default=Options(length="medium", creativity="low"))
+
+class NoteUpsertRequest(BaseModel):
+    user_id: str
+    note_id: str
+    title: str = ""
+    desc: str = ""
+
+class NoteDeleteRequest(BaseModel):
+    user_id: str
+    note_id: str
+
+class NoteContent(BaseModel):
+    note_id: str
+    title: str = ""
+    desc: str = ""
+
+class NoteReindexRequest(BaseModel):
+    user_id: str
+    notes: List[NoteContent]
+
+class NoteSearchRequest(BaseModel):
+    user_id: str
+    query: str
+    k: int = Field(default=10, ge=1, le=100)
+
+class QueryBatchRequest(BaseModel):
+    questions: List[str] = Field(min_length=1, max_length=50)
+
+class NoteArtifactRequest(BaseModel):
+    user_id: str
+    note_id: str
+    kind: Literal["summary", "keypoints"]
+    # Optional current content: stale artifacts are ignored and a miss is generated on demand
+    title: str = ""
+    desc: str = ""
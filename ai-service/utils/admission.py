@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+from utils.config import ADMISSION_CAPACITY, ADMISSION_LANES
+from utils.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_IN_FLIGHT, ADMISSION_WAIT_SECONDS, ADMISSION_SHED
+from utils.tracing import span
+
+
+class Lane:
+    """Concurrency limit and bounded wait queue for one endpoint"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, priority: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.priority = priority
+        self.active = 0
+        self.waiting = 0
+        self.avg_service_time = 1.0
+
+
+class AdmissionController:
+    """
+    Admits requests up to each lane's limit and a shared capacity.
+    Excess requests wait in bounded queues; when a slot frees up, waiters are
+    admitted in priority order (interactive before batch / ingest). A full
+    queue is shed immediately with 429 + Retry-After instead of piling up.
+    Runs on the event loop only, so the bookkeeping needs no locks.
+    """
+
+    def __init__(self, capacity: int = ADMISSION_CAPACITY, lanes: dict = ADMISSION_LANES):
+        self.capacity = capacity
+        self.active = 0
+        self.lanes = {
+            name: Lane(name, limit, queue_size, priority)
+            for name, (limit, queue_size, priority) in lanes.items()
+        }
+        self._waiters = []  # [priority, seq, lane, future]
+        self._seq = itertools.count()
+
+    def _can_run(self, lane: Lane) -> bool:
+        return lane.active < lane.limit and self.active < self.capacity
+
+    def _admit(self, lane: Lane):
+        lane.active += 1
+        self.active += 1
+        ADMISSION_IN_FLIGHT.labels(endpoint=lane.name).set(lane.active)
+
+    def _release(self, lane: Lane):
+        lane.active -= 1
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.labels(endpoint=lane.name).set(lane.active)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Waiters left in the list are only those blocked by a lane or global limit,
+        # so a scan in priority order after every release is enough.
+        for entry in sorted(self._waiters, key=lambda e: (e[0], e[1])):
+            if self.active >= self.capacity:
+                break
+            _, _, lane, future = entry
+            if future.done():
+                self._dequeue(entry)
+            elif self._can_run(lane):
+                self._dequeue(entry)
+                self._admit(lane)
+                future.set_result(True)
+
+    def _dequeue(self, entry):
+        self._waiters.remove(entry)
+        lane = entry[2]
+        lane.waiting -= 1
+        ADMISSION_QUEUE_DEPTH.labels(endpoint=lane.name).set(lane.waiting)
+
+    def retry_after(self, lane: Lane) -> int:
+        backlog = (lane.waiting + 1) / max(1, lane.limit)
+        return max(1, math.ceil(backlog * lane.avg_service_time))
+
+    async def _acquire(self, lane: Lane, shed: bool = True):
+        if self._can_run(lane):
+            self._admit(lane)
+            ADMISSION_WAIT_SECONDS.labels(endpoint=lane.name).observe(0.0)
+            return
+
+        if shed and lane.waiting >= lane.queue_size:
+            ADMISSION_SHED.labels(endpoint=lane.name).inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"{lane.name} is overloaded, please retry shortly",
+                headers={"Retry-After": str(self.retry_after(lane))},
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [lane.priority, next(self._seq), lane, future]
+        self._waiters.append(entry)
+        lane.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(endpoint=lane.name).set(lane.waiting)
+
+        enqueued_at = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: hand the slot back
+                self._release(lane)
+            elif entry in self._waiters:
+                self._dequeue(entry)
+            raise
+        finally:
+            ADMISSION_WAIT_SECONDS.labels(endpoint=lane.name).observe(time.monotonic() - enqueued_at)
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str, shed: bool = True):
+        """Hold one of the endpoint's slots; shed=False waits even when the queue is full (background work)"""
+        lane = self.lanes[endpoint]
+        with span("admission.wait", endpoint=endpoint, queued=lane.waiting):
+            await self._acquire(lane, shed)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            lane.avg_service_time = 0.8 * lane.avg_service_time + 0.2 * (time.monotonic() - started)
+            self._release(lane)
+
+
+admission = AdmissionController()
+
+
+class Admitted:
+    """
+    Awaitable that runs `work` once the endpoint's lane admits it. Unlike a wrapper
+    coroutine, closing it before it ever ran (a request rejected up front, such as a
+    bad timeout header) closes `work` too, so nothing is left un-awaited.
+    """
+
+    def __init__(self, endpoint: str, work):
+        self.endpoint = endpoint
+        self.work = work
+
+    async def _run(self):
+        try:
+            async with admission.slot(self.endpoint):
+                return await self.work
+        finally:
+            self.work.close()
+
+    def __await__(self):
+        return self._run().__await__()
+
+    def close(self):
+        self.work.close()
+
+
+def admitted(endpoint: str, work) -> Admitted:
+    """Await the `work` coroutine once the endpoint's lane admits it"""
+    return Admitted(endpoint, work)
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class CassetteMiss(LookupError):
+    """Replay mode was asked for a prompt that was never recorded"""
+
+
+class Cassette:
+    """prompt hash -> completion, kept in one JSON file and rewritten atomically on every new entry"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, entry: dict):
+        with self._lock:
+            self.entries[key] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def prompt_key(model: str, messages: List[BaseMessage], stop: Optional[List[str]]) -> str:
+    # Per-call kwargs such as the deadline timeout are deliberately left out of the key
+    payload = {
+        "model": model,
+        "messages": [[message.type, message.content] for message in messages],
+        "stop": stop,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Record/replay wrapper at the LLM boundary, selected with LLM_BACKEND=record
+    or LLM_BACKEND=replay. Recording serves known prompts from the cassette and
+    calls the wrapped model for new ones; replay never touches the network and
+    fails loudly on an unrecorded prompt. Prompt building and retrieval still
+    run for real, only the completion is canned.
+    """
+
+    mode: str = "replay"
+    cassette_path: str
+    model_name: str
+    inner: Optional[BaseChatModel] = None
+    latency: float = 0.0
+
+    _cassette: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    @property
+    def cassette(self) -> Cassette:
+        if self._cassette is None:
+            self._cassette = Cassette(self.cassette_path)
+        return self._cassette
+
+    def _lookup(self, key: str) -> Optional[ChatResult]:
+        entry = self.cassette.get(key)
+        if entry is None:
+            if self.mode == "replay":
+                raise CassetteMiss(
+                    f"No recorded completion for prompt {key[:12]} in {self.cassette_path}; "
+                    "re-run with LLM_BACKEND=record"
+                )
+            return None
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _store(self, key: str, result: ChatResult):
+        message = result.generations[0].message
+        self.cassette.put(key, {"content": message.content, "usage": getattr(message, "usage_metadata", None)})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        key = prompt_key(self.model_name, messages, stop)
+        cached = self._lookup(key)
+        if cached is not None:
+            time.sleep(self.latency)
+            return cached
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self._store(key, result)
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        key = prompt_key(self.model_name, messages, stop)
+        cached = self._lookup(key)
+        if cached is not None:
+            await asyncio.sleep(self.latency)
+            return cached
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self._store(key, result)
+        return result
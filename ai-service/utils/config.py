@@ -2,17 +2,164 @@ from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEmbeddings
 import os
 from dotenv import load_dotenv
+from utils.metrics import LLMMetricsHandler
 load_dotenv()
 
 groq_api_key = os.getenv("GROQ_API_KEY")
 
 ## LLM Model
-llm_model = ChatGroq(model="openai/gpt-oss-20b", 
-                     temperature=0.1, 
-                     groq_api_key=groq_api_key)
+LLM_MODEL_NAME = "openai/gpt-oss-20b"
+# "fake" swaps in a local model with configurable latency for offline load tests;
+# "record" / "replay" put a prompt -> completion cassette in front of Groq for evaluation runs
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "500"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "evaluation", "cassettes", "llm.json"))
+LLM_CASSETTE_LATENCY_MS = float(os.getenv("LLM_CASSETTE_LATENCY_MS", "0"))
+
+if LLM_BACKEND == "fake":
+    from utils.fake_llm import FakeChatModel
+    LLM_MODEL_NAME = "fake"
+    llm_model = FakeChatModel(latency=FAKE_LLM_LATENCY_MS / 1000,
+                              jitter=FAKE_LLM_JITTER_MS / 1000,
+                              callbacks=[LLMMetricsHandler(LLM_MODEL_NAME)])
+elif LLM_BACKEND in ("record", "replay"):
+    from utils.cassette import CassetteChatModel
+    llm_model = CassetteChatModel(mode=LLM_BACKEND,
+                                  cassette_path=LLM_CASSETTE_PATH,
+                                  model_name=LLM_MODEL_NAME,
+                                  inner=ChatGroq(model=LLM_MODEL_NAME, temperature=0.1, groq_api_key=groq_api_key)
+                                  if LLM_BACKEND == "record" else None,
+                                  latency=LLM_CASSETTE_LATENCY_MS / 1000,
+                                  callbacks=[LLMMetricsHandler(LLM_MODEL_NAME)])
+else:
+    llm_model = ChatGroq(model=LLM_MODEL_NAME, 
+                         temperature=0.1, 
+                         groq_api_key=groq_api_key,
+                         callbacks=[LLMMetricsHandler(LLM_MODEL_NAME)])
 
 ## Vector Embedding Model
+EMBED_MODEL_NAME = "intfloat/e5-small-v2"
+EMBED_MAX_TOKENS = 512  # e5-small-v2 truncates anything longer
 hf_embeddings = HuggingFaceEmbeddings(
-    model_name = "intfloat/e5-small-v2",
+    model_name = EMBED_MODEL_NAME,
     encode_kwargs = {'normalize_embeddings':True},
-    )
\ No newline at end of file
+    )
+
+# Micro-batch concurrent embedding calls (queries and ingestion) into shared forward passes
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() == "true"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+if EMBED_BATCHING:
+    from utils.embedding_batcher import BatchingEmbeddings
+    hf_embeddings = BatchingEmbeddings(hf_embeddings, max_batch=EMBED_MAX_BATCH, max_wait=EMBED_MAX_WAIT_MS / 1000)
+
+## Local extractive fast path for short notes (keypoints / summaries)
+FAST_PATH_MAX_CHARS = int(os.getenv("FAST_PATH_MAX_CHARS", "600"))
+FAST_PATH_EMBEDDINGS = os.getenv("FAST_PATH_EMBEDDINGS", "false").lower() == "true"
+# mode=fast runs the extractive engine in-process, so it is capped; longer texts go to the LLM instead
+FAST_PATH_HARD_MAX_CHARS = int(os.getenv("FAST_PATH_HARD_MAX_CHARS", "20000"))
+
+
+## Request deadlines (seconds); clients may lower/raise them via the header, capped at MAX_REQUEST_TIMEOUT
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("DEFAULT_REQUEST_TIMEOUT", "30"))
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", "120"))
+REQUEST_TIMEOUTS = {
+    "keypoints": float(os.getenv("KEYPOINTS_TIMEOUT", "30")),
+    "stylize": float(os.getenv("STYLIZE_TIMEOUT", "30")),
+    "summarize_text": float(os.getenv("SUMMARIZE_TIMEOUT", "45")),
+    "query-pdf": float(os.getenv("QUERY_PDF_TIMEOUT", "30")),
+    "query-pdf-batch": float(os.getenv("QUERY_PDF_BATCH_TIMEOUT", "120")),
+}
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.25"))
+
+
+## Admission control: per-endpoint concurrency and bounded priority queues (lower priority value runs first)
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "16"))
+ADMISSION_LANES = {
+    # endpoint: (max concurrent, max queued, priority)
+    "query-pdf": (int(os.getenv("QUERY_PDF_CONCURRENCY", "8")), int(os.getenv("QUERY_PDF_QUEUE", "32")), 0),
+    "query-pdf-batch": (int(os.getenv("QUERY_PDF_BATCH_CONCURRENCY", "2")), int(os.getenv("QUERY_PDF_BATCH_QUEUE", "4")), 1),
+    "keypoints": (int(os.getenv("KEYPOINTS_CONCURRENCY", "4")), int(os.getenv("KEYPOINTS_QUEUE", "16")), 0),
+    "stylize": (int(os.getenv("STYLIZE_CONCURRENCY", "4")), int(os.getenv("STYLIZE_QUEUE", "16")), 0),
+    "summarize_text": (int(os.getenv("SUMMARIZE_CONCURRENCY", "2")), int(os.getenv("SUMMARIZE_QUEUE", "8")), 1),
+    "process-pdf": (int(os.getenv("PROCESS_PDF_CONCURRENCY", "1")), int(os.getenv("PROCESS_PDF_QUEUE", "4")), 2),
+}
+
+
+## Shared, versioned RAG index store (published by the ingesting worker, mmapped read-only by all)
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "indexes"))
+RAG_INDEX_KEEP_VERSIONS = int(os.getenv("RAG_INDEX_KEEP_VERSIONS", "3"))
+# tracemalloc diff around each PDF build (slows ingestion; for capacity planning / leak hunting)
+RAG_TRACEMALLOC = os.getenv("RAG_TRACEMALLOC", "false").lower() == "true"
+# Progressive ingestion: the first pages are published before /process-pdf returns, the rest are appended
+# in background batches (a large RAG_FIRST_BATCH_PAGES indexes everything up front, as before).
+# Each batch republishes the whole index, so batches double in size (at least RAG_BATCH_PAGES pages each)
+# to keep the total rebuild work linear in the document length
+RAG_FIRST_BATCH_PAGES = int(os.getenv("RAG_FIRST_BATCH_PAGES", "8"))
+RAG_BATCH_PAGES = int(os.getenv("RAG_BATCH_PAGES", "32"))
+# Chunking: "token" cuts chunks by embedding-model tokens in one pass; "recursive" is the old 800-character splitter
+RAG_CHUNKER = os.getenv("RAG_CHUNKER", "token")
+RAG_CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "192"))  # About the old 800 characters of English
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "32"))
+# Hybrid retrieval: BM25 and FAISS hits per question, fused by weighted reciprocal rank (BM25 gets 1 - RAG_DENSE_WEIGHT).
+# evaluation/tune_rag.py sweeps these together with the chunk sizes
+RAG_K_SPARSE = int(os.getenv("RAG_K_SPARSE", "4"))
+RAG_K_DENSE = int(os.getenv("RAG_K_DENSE", "3"))
+RAG_DENSE_WEIGHT = float(os.getenv("RAG_DENSE_WEIGHT", "0.55"))
+# Ingestion cleanup: header / footer lines repeated on this share of pages are stripped as boilerplate, and
+# chunks sharing at least NEAR_DUPLICATE_MIN_JACCARD of their word 3-grams (MinHash estimate) with an earlier one are dropped
+RAG_DEDUP = os.getenv("RAG_DEDUP", "true").lower() == "true"
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+BOILERPLATE_MIN_PAGE_FRACTION = float(os.getenv("BOILERPLATE_MIN_PAGE_FRACTION", "0.5"))
+NEAR_DUPLICATE_MIN_JACCARD = float(os.getenv("NEAR_DUPLICATE_MIN_JACCARD", "0.8"))
+# Resident vector codes: fp32 (exact), fp16 or int8 (scalar-quantized, top candidates rescored from mmapped fp32)
+RAG_VECTOR_PRECISION = os.getenv("RAG_VECTOR_PRECISION", "fp32")
+RAG_RESCORE_FACTOR = int(os.getenv("RAG_RESCORE_FACTOR", "4"))
+# Retrieval-confidence gate: questions whose best dense AND best sparse hits both score below these thresholds
+# get a "not found in the document" answer without an LLM call. "shadow" only logs what the gate would do
+# (calibrate with evaluation/calibrate_gate.py before switching to "enforce"); "off" skips the scoring log too
+RAG_CONFIDENCE_GATE = os.getenv("RAG_CONFIDENCE_GATE", "shadow")
+RAG_GATE_MIN_DENSE_SIMILARITY = float(os.getenv("RAG_GATE_MIN_DENSE_SIMILARITY", "0.78"))
+RAG_GATE_MIN_SPARSE_SCORE = float(os.getenv("RAG_GATE_MIN_SPARSE_SCORE", "0.3"))
+RAG_GATE_PASSAGES = int(os.getenv("RAG_GATE_PASSAGES", "2"))  # Nearest passages returned with a gated answer
+# Semantic answer cache: a question within RAG_ANSWER_CACHE_MIN_SIMILARITY (cosine) of an earlier one about the
+# same index version, whose top RAG_ANSWER_CACHE_MATCH_CHUNKS retrieved chunks are the same, reuses its answer
+RAG_ANSWER_CACHE = os.getenv("RAG_ANSWER_CACHE", "true").lower() == "true"
+RAG_ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "256"))
+RAG_ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("RAG_ANSWER_CACHE_MIN_SIMILARITY", "0.9"))
+RAG_ANSWER_CACHE_MATCH_CHUNKS = int(os.getenv("RAG_ANSWER_CACHE_MATCH_CHUNKS", "3"))
+# LLM calls in flight for batch questions, shared by all batches in a worker (keeps us under the provider's rate limit)
+QUERY_PDF_BATCH_LLM_CONCURRENCY = int(os.getenv("QUERY_PDF_BATCH_LLM_CONCURRENCY", "8"))
+AI_SERVICE_HOST = os.getenv("AI_SERVICE_HOST", "0.0.0.0")
+AI_SERVICE_PORT = int(os.getenv("AI_SERVICE_PORT", "8000"))
+AI_SERVICE_WORKERS = int(os.getenv("AI_SERVICE_WORKERS", str(os.cpu_count() or 1)))
+
+
+## Per-user semantic index over notes
+NOTES_INDEX_DIR = os.getenv("NOTES_INDEX_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "notes"))
+NOTES_INDEX_CACHE_USERS = int(os.getenv("NOTES_INDEX_CACHE_USERS", "256"))
+# Saves are journaled; the journal is folded into a fresh snapshot once it has this many records (or one per note)
+NOTES_JOURNAL_MIN_RECORDS = int(os.getenv("NOTES_JOURNAL_MIN_RECORDS", "64"))
+# e5 cosine scores sit in a narrow high band; unrelated notes typically score below this
+NOTES_MIN_SIMILARITY = float(os.getenv("NOTES_MIN_SIMILARITY", "0.78"))
+# Summaries / keypoints precomputed on note save, once the note has been quiet for the debounce window
+NOTE_ARTIFACTS_DB = os.getenv("NOTE_ARTIFACTS_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "note_artifacts.sqlite"))
+NOTE_ARTIFACT_DEBOUNCE_SECONDS = float(os.getenv("NOTE_ARTIFACT_DEBOUNCE_SECONDS", "5"))
+NOTE_ARTIFACT_CONCURRENCY = int(os.getenv("NOTE_ARTIFACT_CONCURRENCY", "2"))
+# How long a deleted note keeps other workers' in-flight precomputation from writing it back
+NOTE_ARTIFACT_TOMBSTONE_SECONDS = float(os.getenv("NOTE_ARTIFACT_TOMBSTONE_SECONDS", "3600"))
+
+
+## Tracing: fraction of new traces to record (incoming sampled traceparents are always honoured)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.0"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "traces.jsonl"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")  # e.g. http://localhost:4318/v1/traces
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "morphnote-ai-service")
+
+
+## Opt-in per-request profiling: requests carrying PROFILE_HEADER: <PROFILE_TOKEN> are profiled (disabled when unset)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "profiles"))
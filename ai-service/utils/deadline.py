@@ -0,0 +1,144 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from langchain_core.callbacks import BaseCallbackHandler
+from utils.config import REQUEST_TIMEOUT_HEADER, REQUEST_TIMEOUTS, DEFAULT_REQUEST_TIMEOUT, MAX_REQUEST_TIMEOUT, DISCONNECT_POLL_INTERVAL
+from utils.metrics import REQUEST_TIMEOUTS as TIMEOUT_COUNTER, CLIENT_DISCONNECTS
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time before reaching a stage"""
+
+
+class Deadline:
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.timeout:g}s exceeded before {stage}")
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def check_deadline(stage: str):
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def bind_deadline(llm):
+    """Cap the LLM request timeout to whatever is left of the current deadline"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return llm
+    deadline.check("llm call")
+    return llm.bind(timeout=deadline.remaining())
+
+
+class DeadlineGuard(BaseCallbackHandler):
+    """Fails fast at the start of each retrieval / LLM step once the deadline has passed"""
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, deadline: Deadline):
+        self.deadline = deadline
+
+    def on_retriever_start(self, serialized, query, **kwargs):
+        self.deadline.check("retrieval")
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.deadline.check("llm call")
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.deadline.check("llm call")
+
+
+def deadline_config() -> dict:
+    """RunnableConfig that propagates the current deadline into every chain step"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return {}
+    return {"callbacks": [DeadlineGuard(deadline)]}
+
+
+def request_timeout(request: Request, endpoint: str) -> float:
+    default = REQUEST_TIMEOUTS.get(endpoint, DEFAULT_REQUEST_TIMEOUT)
+    header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if not header:
+        return default
+    try:
+        timeout = float(header)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {REQUEST_TIMEOUT_HEADER} header: {header!r}")
+    if timeout <= 0:
+        raise HTTPException(status_code=400, detail=f"{REQUEST_TIMEOUT_HEADER} must be positive")
+    return min(timeout, MAX_REQUEST_TIMEOUT)
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_with_deadline(request: Request, endpoint: str, work):
+    """
+    Run the `work` coroutine under the endpoint's deadline.
+    The task is cancelled if the deadline passes (504) or the client disconnects (499),
+    so abandoned requests stop holding LLM quota and worker capacity.
+    """
+    try:
+        deadline = Deadline(request_timeout(request, endpoint))
+    except HTTPException:
+        work.close()
+        raise
+    token = _current_deadline.set(deadline)
+    try:
+        task = asyncio.ensure_future(work)
+    finally:
+        _current_deadline.reset(token)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED
+        )
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task not in done:
+        task.cancel()
+        if watcher in done:
+            CLIENT_DISCONNECTS.labels(endpoint=endpoint).inc()
+            raise HTTPException(status_code=499, detail="Client closed request")
+        TIMEOUT_COUNTER.labels(endpoint=endpoint).inc()
+        raise HTTPException(status_code=504, detail=f"Request exceeded its deadline of {deadline.timeout:g}s")
+
+    try:
+        return task.result()
+    except Exception as e:
+        if isinstance(e, DeadlineExceeded) or deadline.expired:
+            TIMEOUT_COUNTER.labels(endpoint=endpoint).inc()
+            raise HTTPException(status_code=504, detail=str(e) or "Request exceeded its deadline")
+        raise
@@ -0,0 +1,95 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from utils.metrics import EMBED_BATCH_SIZE, EMBED_QUEUE_WAIT_SECONDS
+
+
+QUERY_PRIORITY = 0
+DOCUMENT_PRIORITY = 1
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Funnels every embedding call in the process through one worker thread, which
+    gathers whatever arrives within max_wait (up to max_batch texts) into a single
+    forward pass and hands each caller its rows. Concurrent queries then share one
+    batched pass instead of contending with many single-row ones. Ingestion is fed
+    in max_batch slices at lower priority, so queries never wait behind a whole PDF.
+
+    Queries and documents share a batch because e5 is configured here without a
+    query prompt: embed_query and embed_documents encode text the same way.
+    """
+
+    def __init__(self, inner: Embeddings, max_batch: int = 32, max_wait: float = 0.005):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO within a priority, and never compares futures
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def _submit(self, texts: List[str], priority: int) -> Future:
+        future = Future()
+        self._queue.put((priority, next(self._seq), texts, future, time.perf_counter()))
+        return future
+
+    def _embed(self, texts: List[str], priority: int) -> List[List[float]]:
+        futures = [
+            self._submit(texts[start:start + self.max_batch], priority)
+            for start in range(0, len(texts), self.max_batch)
+        ]
+        return [vector for future in futures for vector in future.result()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit([text], QUERY_PRIORITY).result()[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Several interactive queries at once, ahead of any queued ingestion slices"""
+        return self._embed(texts, QUERY_PRIORITY)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, DOCUMENT_PRIORITY)
+
+    def _collect(self) -> list:
+        requests = [self._queue.get()]
+        rows = len(requests[0][2])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if rows + len(request[2]) > self.max_batch:
+                self._queue.put(request)  # Starts the next batch, keeping its place in line
+                break
+            requests.append(request)
+            rows += len(request[2])
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect()
+            started = time.perf_counter()
+            texts = [text for _, _, request_texts, _, _ in requests for text in request_texts]
+            EMBED_BATCH_SIZE.observe(len(texts))
+            for _, _, _, _, enqueued_at in requests:
+                EMBED_QUEUE_WAIT_SECONDS.observe(started - enqueued_at)
+            try:
+                vectors = self.inner.embed_documents(texts)
+            except Exception as e:
+                for _, _, _, future, _ in requests:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for _, _, request_texts, future, _ in requests:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
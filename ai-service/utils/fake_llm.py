@@ -0,0 +1,58 @@
+import asyncio
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Groq model, selected with LLM_BACKEND=fake.
+    Sleeps for a configurable latency (plus seeded jitter) and answers with the
+    first sentences of the prompt, so load tests are reproducible without a network.
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.0
+    seed: int = 0
+    answer_sentences: int = 3
+
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _delay(self) -> float:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _answer(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = " ".join(str(message.content) for message in messages)
+        sentences = [s.strip() for s in SENTENCE_PATTERN.split(prompt) if s.strip()]
+        content = "\n".join(f"- {s}" for s in sentences[: self.answer_sentences])
+        usage = {
+            "input_tokens": len(prompt.split()),
+            "output_tokens": len(content.split()),
+            "total_tokens": len(prompt.split()) + len(content.split()),
+        }
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        return self._answer(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return self._answer(messages)
@@ -0,0 +1,54 @@
+import os
+import resource
+import tracemalloc
+from contextlib import contextmanager
+
+
+def rss_bytes() -> int:
+    """Current resident set size, falling back to the peak where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (FileNotFoundError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def nltk_cache_stats() -> dict:
+    """Entries in NLTK's cached Punkt tokenizers (one per language, loaded on first word_tokenize)"""
+    import nltk.tokenize
+
+    cached = getattr(nltk.tokenize, "_get_punkt_tokenizer", None)
+    if cached is None or not hasattr(cached, "cache_info"):
+        return {}
+    return {"punkt_tokenizers": cached.cache_info().currsize}
+
+
+@contextmanager
+def allocation_diff(top: int = 10):
+    """
+    tracemalloc snapshot diff around a block; the yielded dict is filled on exit.
+    Tracing slows every allocation in the process, so only use it when asked to.
+    """
+    report = {}
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield report
+    finally:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_here:
+            tracemalloc.stop()
+        stats = after.compare_to(before, "lineno")
+        report["allocated_bytes"] = sum(stat.size_diff for stat in stats)
+        report["peak_traced_bytes"] = peak
+        report["top"] = [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:top]
+        ]
@@ -0,0 +1,283 @@
+import os
+import time
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST,
+)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+## HTTP requests
+REQUESTS = Counter(
+    "morphnote_requests_total",
+    "HTTP requests by endpoint and status code",
+    ["endpoint", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "morphnote_request_latency_seconds",
+    "End-to-end HTTP request latency",
+    ["endpoint", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+## Pipeline stages (process_pdf / query_pdf phases)
+STAGE_LATENCY = Histogram(
+    "morphnote_stage_latency_seconds",
+    "Latency of each pipeline stage",
+    ["operation", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+## LLM calls
+LLM_LATENCY = Histogram(
+    "morphnote_llm_latency_seconds",
+    "Full LLM call latency",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "morphnote_llm_time_to_first_token_seconds",
+    "Time until the first token arrives (whole response when not streaming)",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "morphnote_llm_tokens_total",
+    "LLM tokens consumed",
+    ["model", "kind"],
+)
+
+
+## Embedding micro-batches
+EMBED_BATCH_SIZE = Histogram(
+    "morphnote_embed_batch_size",
+    "Texts per embedding forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBED_QUEUE_WAIT_SECONDS = Histogram(
+    "morphnote_embed_queue_wait_seconds",
+    "Time an embedding request waited to join a batch",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+## Precomputed note artifacts (summaries / keypoints)
+NOTE_ARTIFACTS = Counter(
+    "morphnote_note_artifacts_total",
+    "Note artifact precomputations (computed / unchanged / error) and lookups (hit / miss)",
+    ["kind", "outcome"],
+)
+
+
+## Retrieval-confidence gate
+RETRIEVAL_GATE = Counter(
+    "morphnote_retrieval_gate_total",
+    "Gate decisions per question (answer / not_found, or shadow_not_found when only logging)",
+    ["operation", "decision"],
+)
+RETRIEVAL_CONFIDENCE = Histogram(
+    "morphnote_retrieval_confidence",
+    "Best-hit retrieval scores per question, by signal and whether the gate let the question through",
+    ["signal", "answerable"],
+    buckets=tuple(round(0.05 * i, 2) for i in range(1, 21)),
+)
+
+
+## Semantic answer cache
+ANSWER_CACHE = Counter(
+    "morphnote_answer_cache_total",
+    "Semantic answer cache lookups (hit / miss)",
+    ["operation", "outcome"],
+)
+ANSWER_CACHE_SAVED_SECONDS = Counter(
+    "morphnote_answer_cache_saved_seconds_total",
+    "LLM time the cached answers originally took, i.e. saved by serving them from the cache",
+    ["operation"],
+)
+
+
+## Loaded RAG indexes
+LOADED_INDEXES = Gauge(
+    "morphnote_loaded_indexes",
+    "RAG index versions currently loaded by this worker",
+    multiprocess_mode="liveall",
+)
+INDEX_MEMORY_BYTES = Gauge(
+    "morphnote_index_memory_bytes",
+    "Approximate memory held by the loaded RAG index (vectors, text, chunk_arrays, bm25)",
+    ["component"],
+    multiprocess_mode="liveall",
+)
+INGEST_FAILURES = Counter(
+    "morphnote_ingest_failures_total",
+    "Progressive ingests that stopped before the last page batch (queries stay at partial coverage)",
+)
+
+
+## Deadlines / cancellation
+REQUEST_TIMEOUTS = Counter(
+    "morphnote_request_timeouts_total",
+    "Requests that exceeded their deadline and returned 504",
+    ["endpoint"],
+)
+CLIENT_DISCONNECTS = Counter(
+    "morphnote_client_disconnects_total",
+    "Requests cancelled because the client went away",
+    ["endpoint"],
+)
+
+
+## Admission control
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "morphnote_admission_queue_depth",
+    "Requests waiting for an admission slot",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "morphnote_admission_in_flight",
+    "Requests currently holding an admission slot",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "morphnote_admission_wait_seconds",
+    "Time spent queued before admission",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_SHED = Counter(
+    "morphnote_admission_shed_total",
+    "Requests rejected with 429 because the endpoint queue was full",
+    ["endpoint"],
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, status and latency per route.
+    Labels use the route template (not the raw path) to keep cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.labels(endpoint=endpoint, method=method).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint=endpoint, method=method, status=str(status["code"])).inc()
+
+
+class StageMetricsHandler(BaseCallbackHandler):
+    """Times each retriever and LLM step of a chain run as a stage of `operation`"""
+
+    run_inline = True
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._runs = {}  # run_id -> (stage, started)
+
+    def on_retriever_start(self, serialized, query, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = (kwargs.get("name") or "retriever", time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = ("llm", time.perf_counter())
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = ("llm", time.perf_counter())
+
+    def _finish(self, run_id: UUID):
+        run = self._runs.pop(run_id, None)
+        if run:
+            STAGE_LATENCY.labels(operation=self.operation, stage=run[0]).observe(time.perf_counter() - run[1])
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs):
+        self._finish(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._finish(run_id)
+
+    def on_retriever_error(self, error, *, run_id: UUID, **kwargs):
+        self._runs.pop(run_id, None)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._runs.pop(run_id, None)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Records latency, time-to-first-token and token usage for every LLM call"""
+
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._runs = {}  # run_id -> [started, first_token_seen]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = [time.perf_counter(), False]
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = [time.perf_counter(), False]
+
+    def on_llm_new_token(self, token, *, run_id: UUID, **kwargs):
+        run = self._runs.get(run_id)
+        if run and not run[1]:
+            run[1] = True
+            LLM_TIME_TO_FIRST_TOKEN.labels(model=self.model).observe(time.perf_counter() - run[0])
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run:
+            elapsed = time.perf_counter() - run[0]
+            LLM_LATENCY.labels(model=self.model).observe(elapsed)
+            if not run[1]:
+                LLM_TIME_TO_FIRST_TOKEN.labels(model=self.model).observe(elapsed)
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        LLM_TOKENS.labels(model=self.model, kind="prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(model=self.model, kind="completion").inc(completion_tokens)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._runs.pop(run_id, None)
+
+
+def _token_usage(response):
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def render_metrics():
+    """Prometheus text exposition of every registered metric"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Several uvicorn workers: aggregate the per-process metric files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
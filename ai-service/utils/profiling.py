@@ -0,0 +1,102 @@
+import cProfile
+import hmac
+import os
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from utils.config import PROFILE_TOKEN, PROFILE_DIR, PROFILE_HEADER
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # Optional: fall back to cProfile
+    Profiler = None
+
+
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class _SamplingProfile:
+    """pyinstrument in async mode: only the profiled request's task is attributed"""
+
+    def __init__(self):
+        self.profiler = Profiler(interval=0.001, async_mode="enabled")
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self, path: str):
+        self.profiler.stop()
+        with open(path + ".html", "w") as f:
+            f.write(self.profiler.output_html())
+        # Open in https://www.speedscope.app for a flamegraph
+        with open(path + ".speedscope.json", "w") as f:
+            f.write(self.profiler.output(renderer=SpeedscopeRenderer()))
+
+
+class _DeterministicProfile:
+    """
+    cProfile fallback. It records every call on the event-loop thread while the
+    request runs, so requests served concurrently show up too, and work handed to
+    worker threads does not.
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self, path: str):
+        self.profiler.disable()
+        # pstats format: snakeviz / flameprof / `python -m pstats` read it directly
+        self.profiler.dump_stats(path + ".prof")
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request when it carries the PROFILE_HEADER header (or a
+    `profile` query parameter) equal to PROFILE_TOKEN. The profile goes to
+    PROFILE_DIR and its id comes back in X-Profile-Id. Only registered when a
+    token is configured; untriggered requests pay one header lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()  # One profiler at a time, they can't nest
+        self.header = PROFILE_HEADER.lower().encode()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    def _triggered(self, scope) -> bool:
+        supplied = None
+        for name, value in scope.get("headers") or []:
+            if name == self.header:
+                supplied = value.decode("latin-1")
+                break
+        if supplied is None and b"profile=" in scope.get("query_string", b""):
+            supplied = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [None])[0]
+        return supplied is not None and hmac.compare_digest(supplied, PROFILE_TOKEN)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._triggered(scope) or not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(PROFILE_DIR, profile_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        profile = _SamplingProfile() if Profiler is not None else _DeterministicProfile()
+        try:
+            profile.start()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profile.stop(path)
+        finally:
+            self._busy.release()
@@ -0,0 +1,330 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from utils.config import TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME
+from utils.metrics import STAGE_LATENCY, _token_usage
+
+
+class Span:
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: BaseException = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        _exporter.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when the current request is not sampled, so call sites never branch"""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of the current one; a no-op unless the request is being traced"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace_id, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(error=e)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def stage_timer(operation: str, stage: str, **attributes):
+    """Time a pipeline stage into the stage histogram and, when sampled, a span"""
+    started = time.perf_counter()
+    try:
+        with span(f"{operation}.{stage}", **attributes) as stage_span:
+            yield stage_span
+    finally:
+        STAGE_LATENCY.labels(operation=operation, stage=stage).observe(time.perf_counter() - started)
+
+
+def parse_traceparent(header: Optional[str]):
+    """W3C trace-context: 00-<trace id>-<parent span id>-<flags>"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes) -> Optional[Span]:
+    """Root span for a request, or None when neither the caller nor our sampler wants it recorded"""
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if not sampled:
+        return None
+    return Span(name, trace_id, parent_id, attributes)
+
+
+class TracingMiddleware:
+    """Opens the root span for each sampled HTTP request, continuing the gateway's trace"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent")
+        root = start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent.decode("latin-1") if traceparent else None,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            return await self.app(scope, receive, send)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"traceparent", f"00-{root.trace_id}-{root.span_id}-01".encode())
+                ]
+            await send(message)
+
+        token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            root.end(error=e)
+            raise
+        else:
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            root.end()
+        finally:
+            _current_span.reset(token)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns every chain, retriever and LLM run of a LangChain invocation into a child span"""
+
+    run_inline = True
+
+    def __init__(self, root: Span):
+        self.root = root
+        self._spans = {}  # run_id -> Span
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], **attributes):
+        parent = self._spans.get(parent_run_id, self.root)
+        self._spans[run_id] = Span(name, parent.trace_id, parent.span_id, attributes)
+
+    def _end(self, run_id: UUID, error: BaseException = None, **attributes):
+        child = self._spans.pop(run_id, None)
+        if child is not None:
+            child.attributes.update(attributes)
+            child.end(error=error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(f"chain.{kwargs.get('name') or 'chain'}", run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(f"retriever.{kwargs.get('name') or 'retriever'}", run_id, parent_run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, **{"retrieval.documents": len(documents)})
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", run_id, parent_run_id, **{"llm.messages": sum(len(m) for m in messages)})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", run_id, parent_run_id, **{"llm.prompts": len(prompts)})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens = _token_usage(response)
+        self._end(run_id, **{"llm.prompt_tokens": prompt_tokens, "llm.completion_tokens": completion_tokens})
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+def traced_config(config: dict) -> dict:
+    """Add span recording to a RunnableConfig when the current request is sampled"""
+    root = _current_span.get()
+    if root is None:
+        return config
+    return {**config, "callbacks": list(config.get("callbacks", [])) + [TracingCallbackHandler(root)]}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_payload(spans) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "morphnote"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class SpanExporter:
+    """
+    Finished spans go onto a queue; a daemon thread batches them out to a JSONL
+    file or an OTLP/HTTP (JSON) collector, keeping I/O off the request path.
+    """
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH, otlp_endpoint: str = TRACE_OTLP_ENDPOINT,
+                 batch_size: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.otlp_endpoint = otlp_endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, finished: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            pass  # Drop rather than block a request on a slow exporter
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        batch = self._drain()
+        while batch:
+            try:
+                self._export(batch)
+            except Exception as e:
+                print("Span export failed:", e)
+            batch = self._drain()
+
+    def _export(self, batch):
+        if self.otlp_endpoint:
+            request = urllib.request.Request(
+                self.otlp_endpoint,
+                data=json.dumps(_otlp_payload(batch)).encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(s.to_dict()) + "\n" for s in batch))
+
+
+_exporter = SpanExporter()
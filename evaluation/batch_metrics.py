@@ -0,0 +1,145 @@
+from typing import Callable, Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+class BatchMetrics:
+    """
+    Array versions of the AccuracyMetrics / MetricsCalculator scores.
+    Every text is tokenized once (same lowercase whitespace split as the scalar
+    versions) into a shared binary term matrix, and set overlaps become sparse
+    row-wise products, so a thousand-sample run costs a few matrix ops.
+    """
+
+    @staticmethod
+    def _term_sets(left: Sequence[str], right: Sequence[str]):
+        if len(left) != len(right):
+            raise ValueError("Both sides need the same number of samples")
+        vectorizer = CountVectorizer(tokenizer=str.split, token_pattern=None, lowercase=True, binary=True)
+        try:
+            matrix = vectorizer.fit_transform(list(left) + list(right)).tocsr()
+        except ValueError:
+            # No tokens anywhere
+            empty = np.zeros(len(left))
+            return empty, empty, empty
+        a, b = matrix[:len(left)], matrix[len(left):]
+        overlap = np.asarray(a.multiply(b).sum(axis=1)).ravel()
+        a_size = np.asarray(a.sum(axis=1)).ravel()
+        b_size = np.asarray(b.sum(axis=1)).ravel()
+        return overlap, a_size, b_size
+
+    @staticmethod
+    def _ratio(numerator: np.ndarray, denominator: np.ndarray, empty: float) -> np.ndarray:
+        out = np.full(len(numerator), empty, dtype=np.float64)
+        np.divide(numerator, denominator, out=out, where=denominator > 0)
+        return out
+
+    @classmethod
+    def coverage(cls, originals: Sequence[str], processed: Sequence[str]) -> np.ndarray:
+        """Share of each original's distinct words that survive in the processed text"""
+        overlap, original_size, _ = cls._term_sets(originals, processed)
+        return cls._ratio(overlap, original_size, 0.0)
+
+    @classmethod
+    def jaccard(cls, texts1: Sequence[str], texts2: Sequence[str]) -> np.ndarray:
+        overlap, size1, size2 = cls._term_sets(texts1, texts2)
+        union = size1 + size2 - overlap
+        scores = cls._ratio(overlap, union, 0.0)
+        scores[(size1 == 0) | (size2 == 0)] = 0.0
+        return scores
+
+    @classmethod
+    def faithfulness(cls, contexts: Sequence[str], answers: Sequence[str]) -> np.ndarray:
+        """Share of each answer's distinct words found in its context; empty answers count as faithful"""
+        overlap, _, answer_size = cls._term_sets(contexts, answers)
+        return cls._ratio(overlap, answer_size, 1.0)
+
+    @staticmethod
+    def conciseness(originals: Sequence[str], processed: Sequence[str]) -> np.ndarray:
+        original_length = np.fromiter((len(t) for t in originals), dtype=np.float64, count=len(originals))
+        processed_length = np.fromiter((len(t) for t in processed), dtype=np.float64, count=len(processed))
+        reduction = np.zeros(len(originals))
+        np.divide(processed_length, original_length, out=reduction, where=original_length > 0)
+        return np.where(original_length > 0, np.maximum(0.0, 1 - reduction), 0.0)
+
+    @staticmethod
+    def keyword_preservation(processed: Sequence[str], keywords: Sequence[Sequence[str]]) -> np.ndarray:
+        """Share of each sample's keywords appearing (as substrings, case-insensitive) in its text"""
+        counts = np.fromiter((len(k) for k in keywords), dtype=np.int64, count=len(keywords))
+        if counts.sum() == 0:
+            return np.zeros(len(processed))
+        owners = np.repeat(np.arange(len(processed)), counts)
+        texts = np.char.lower(np.asarray(processed, dtype=str))[owners]
+        flat_keywords = np.char.lower(np.asarray([kw for sample in keywords for kw in sample], dtype=str))
+        found = np.char.find(texts, flat_keywords) >= 0
+        hits = np.bincount(owners, weights=found, minlength=len(processed))
+        out = np.zeros(len(processed))
+        np.divide(hits, counts, out=out, where=counts > 0)
+        return out
+
+    @staticmethod
+    def summarize(values: Iterable[float]) -> Dict[str, float]:
+        """mean / mse (spread around the mean) / rmse / mae / std in one pass over an array"""
+        values = np.asarray(list(values), dtype=np.float64)
+        if values.size == 0:
+            return {"mean": 0, "mse": 0, "rmse": 0, "mae": 0, "std_dev": 0}
+        deviation = values - values.mean()
+        mse = float(np.mean(deviation ** 2))
+        return {
+            "mean": round(float(values.mean()), 4),
+            "mse": round(mse, 4),
+            "rmse": round(mse ** 0.5, 4),
+            "mae": round(float(np.mean(np.abs(deviation))), 4),
+            "std_dev": round(mse ** 0.5, 4),
+        }
+
+
+class RetrievalMetrics:
+    """Recall@k, MRR and nDCG@k of ranked chunk ids against gold chunk sets, with binary relevance"""
+
+    @staticmethod
+    def hit_matrix(retrieved: Sequence[Sequence], gold: Sequence[Set], k: int) -> np.ndarray:
+        hits = np.zeros((len(retrieved), k), dtype=bool)
+        for i, (ranked, relevant) in enumerate(zip(retrieved, gold)):
+            for rank, chunk_id in enumerate(ranked[:k]):
+                hits[i, rank] = chunk_id in relevant
+        return hits
+
+    @classmethod
+    def evaluate(cls, retrieved: Sequence[Sequence], gold: Sequence[Set], k: int = 3) -> Dict[str, float]:
+        if len(retrieved) != len(gold):
+            raise ValueError("Need one gold set per query")
+        if not retrieved:
+            return {f"recall@{k}": 0.0, "mrr": 0.0, f"ndcg@{k}": 0.0, "queries": 0}
+
+        hits = cls.hit_matrix(retrieved, gold, k)
+        gold_sizes = np.fromiter((len(g) for g in gold), dtype=np.float64, count=len(gold))
+
+        recall = np.zeros(len(gold))
+        np.divide(hits.sum(axis=1), gold_sizes, out=recall, where=gold_sizes > 0)
+
+        # Reciprocal rank of the first hit; argmax finds it, rows without a hit score 0
+        first_hit = hits.argmax(axis=1)
+        reciprocal_rank = np.where(hits.any(axis=1), 1.0 / (first_hit + 1), 0.0)
+
+        discounts = 1.0 / np.log2(np.arange(2, k + 2))
+        dcg = hits @ discounts
+        ideal_hits = np.minimum(gold_sizes, k).astype(int)
+        ideal = np.concatenate([[0.0], np.cumsum(discounts)])[ideal_hits]
+        ndcg = np.zeros(len(gold))
+        np.divide(dcg, ideal, out=ndcg, where=ideal > 0)
+
+        return {
+            f"recall@{k}": round(float(recall.mean()), 4),
+            "mrr": round(float(reciprocal_rank.mean()), 4),
+            f"ndcg@{k}": round(float(ndcg.mean()), 4),
+            "queries": len(retrieved),
+        }
+
+    @classmethod
+    def evaluate_retriever(cls, retriever, queries: Sequence[str], gold: Sequence[Set], k: int = 3,
+                           doc_key: Callable = lambda doc: doc.page_content) -> Dict[str, float]:
+        """Run a LangChain retriever over the queries (no LLM involved) and score its rankings"""
+        retrieved: List[List] = [[doc_key(doc) for doc in retriever.invoke(query)] for query in queries]
+        return cls.evaluate(retrieved, gold, k)
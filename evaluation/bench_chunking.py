@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import PyMuPDFLoader
+from chains import chunker
+from utils.config import EMBED_MAX_TOKENS, RAG_CHUNK_TOKENS, RAG_CHUNK_OVERLAP_TOKENS
+from bench_rag import DEFAULT_PDF, make_synthetic_pdf
+
+
+def recursive_split(docs):
+    """The character splitter ingestion used before the token chunker"""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=800,
+        chunk_overlap=150,
+        separators=["\n\n", "\n", ".", "!", "?", " ", ""],
+        length_function=len
+    )
+    return splitter.split_documents(docs)
+
+
+def measure(split, docs, tokenizer, rounds: int) -> dict:
+    seconds = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        chunks = split(docs)
+        seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    chunks = split(docs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Token lengths as the embedding model sees them (+2 for [CLS] / [SEP])
+    tokens = np.array([len(chunker.token_starts_ends(c.page_content, tokenizer)[0]) + 2 for c in chunks])
+    best = min(seconds)
+    return {
+        "chunks": len(chunks),
+        "seconds": round(best, 4),
+        "chunks_per_s": round(len(chunks) / best, 1),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "chunk_text_mb": round(sum(len(c.page_content) for c in chunks) / 2**20, 3),
+        "tokens_p50": int(np.percentile(tokens, 50)) if len(tokens) else 0,
+        "tokens_max": int(tokens.max()) if len(tokens) else 0,
+        "truncated_chunks": int((tokens > EMBED_MAX_TOKENS).sum()),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Token chunker vs RecursiveCharacterTextSplitter")
+    parser.add_argument("--pages", type=int, nargs="*", default=[10, 100, 1000])
+    parser.add_argument("--pdf", nargs="*", default=[DEFAULT_PDF])
+    parser.add_argument("--rounds", type=int, default=3, help="Timed runs per splitter; the fastest counts")
+    parser.add_argument("--output", default="chunking_benchmark_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tokenizer = chunker.load_tokenizer()
+    splitters = {
+        "recursive_chars": recursive_split,
+        "token_chunker": lambda docs: chunker.split_documents(docs, tokenizer),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = [(os.path.basename(path), path) for path in args.pdf]
+        for pages in args.pages:
+            path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(path, pages)
+            documents.append((f"synthetic_{pages}_pages", path))
+
+        for name, path in documents:
+            docs = PyMuPDFLoader(path).load()
+            result = {"document": name, "pages": len(docs)}
+            for splitter_name, split in splitters.items():
+                result[splitter_name] = measure(split, docs, tokenizer, args.rounds)
+            print(json.dumps(result))
+            results.append(result)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "chunk_tokens": RAG_CHUNK_TOKENS,
+            "overlap_tokens": RAG_CHUNK_OVERLAP_TOKENS,
+            "tokenizer": "model" if tokenizer is not None else "approximate",
+        },
+        "documents": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nChunking benchmark report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
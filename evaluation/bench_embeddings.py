@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from utils.config import hf_embeddings, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS
+from utils.embedding_batcher import BatchingEmbeddings
+
+
+QUERIES = [
+    "What is the main purpose of this document?",
+    "Which research areas are described?",
+    "What results were reported for renewable energy?",
+    "How does the team measure accuracy?",
+    "Which facilities support protein folding work?",
+    "Who funds the public health programme?",
+]
+
+
+def run_load(embeddings, concurrency: int, seconds: float) -> dict:
+    """`concurrency` threads each embedding one query after another, like concurrent /query-pdf calls"""
+    latencies = [[] for _ in range(concurrency)]
+    stop_at = time.perf_counter() + seconds
+
+    def user(slot):
+        i = slot
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            embeddings.embed_query(QUERIES[i % len(QUERIES)])
+            latencies[slot].append(time.perf_counter() - started)
+            i += 1
+
+    threads = [threading.Thread(target=user, args=(slot,)) for slot in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ms = np.array([latency for slot in latencies for latency in slot]) * 1000
+    return {
+        "queries": len(ms),
+        "queries_per_s": round(len(ms) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query embedding throughput with and without micro-batching")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Load duration per concurrency level")
+    parser.add_argument("--max-batch", type=int, default=EMBED_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBED_MAX_WAIT_MS)
+    parser.add_argument("--output", default="embedding_benchmark_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    model = hf_embeddings.inner if isinstance(hf_embeddings, BatchingEmbeddings) else hf_embeddings
+    variants = {
+        "direct": model,
+        "batched": BatchingEmbeddings(model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000),
+    }
+    model.embed_query("warmup")
+
+    results = {}
+    for concurrency in args.concurrency:
+        results[concurrency] = {}
+        for name, embeddings in variants.items():
+            results[concurrency][name] = run_load(embeddings, concurrency, args.seconds)
+            print(f"concurrency={concurrency} {name}: {json.dumps(results[concurrency][name])}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {"seconds": args.seconds, "max_batch": args.max_batch, "max_wait_ms": args.max_wait_ms},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nEmbedding benchmark report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
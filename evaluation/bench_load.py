@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+
+AI_SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service'))
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "Global Research Hub.pdf")
+ENDPOINTS = ["keypoints", "stylize", "summarize_text", "process-pdf", "query-pdf"]
+
+NOTE_TEXT = """
+Photosynthesis is the process where plants convert sunlight into chemical energy stored in glucose.
+This occurs in two main stages: light-dependent reactions in the thylakoid membrane and light-independent
+reactions (Calvin cycle) in the stroma. The light-dependent reactions use chlorophyll to absorb photons,
+splitting water molecules and releasing oxygen as a byproduct. The Calvin cycle uses ATP and NADPH from
+the light reactions to fix carbon dioxide into organic molecules. Factors like light intensity, carbon
+dioxide concentration and temperature all affect the rate of photosynthesis. Understanding this process
+is essential for agriculture, since crop yields depend directly on how efficiently plants capture light.
+"""
+
+QUESTIONS = [
+    "What is the main purpose of this document?",
+    "Which research areas are described?",
+    "Who is the intended audience?",
+    "What facilities or resources are mentioned?",
+]
+
+
+class EndpointStats:
+    """Latencies and status codes collected for one endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.dropped = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, status, latency):
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status == 200:
+            self.latencies.append(latency)
+
+    def summary(self):
+        elapsed = (self.finished - self.started) if self.started else 0.0
+        total = sum(self.statuses.values())
+        ok = self.statuses.get("200", 0)
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "requests": total,
+            "ok": ok,
+            "errors": {status: n for status, n in self.statuses.items() if status != "200"},
+            "dropped": self.dropped,
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(ok / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(float(latencies.mean()), 2),
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+                "max": round(float(latencies.max()), 2),
+            } if len(latencies) else None,
+        }
+
+
+def build_request(endpoint, rng, pdf_bytes):
+    """(method, path, httpx kwargs) for one request to the endpoint"""
+    if endpoint == "keypoints":
+        return "POST", "/keypoints", {"json": {"text": NOTE_TEXT, "mode": "llm"}}
+    if endpoint == "stylize":
+        style = rng.choice(["formal", "professional", "creative", "concise", "casual"])
+        return "POST", "/stylize", {"json": {"text": NOTE_TEXT, "style": style}}
+    if endpoint == "summarize_text":
+        return "POST", "/summarize_text", {"json": {"text": NOTE_TEXT, "mode": "llm"}}
+    if endpoint == "process-pdf":
+        return "POST", "/process-pdf", {"files": {"file": ("bench.pdf", pdf_bytes, "application/pdf")}}
+    if endpoint == "query-pdf":
+        return "POST", "/query-pdf", {"json": {"text": rng.choice(QUESTIONS)}}
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+async def send(client, endpoint, rng, pdf_bytes, stats, scheduled_at):
+    method, path, kwargs = build_request(endpoint, rng, pdf_bytes)
+    try:
+        response = await client.request(method, path, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    # Measured from the scheduled arrival, so a backed-up client doesn't hide queueing delay
+    stats.record(status, time.perf_counter() - scheduled_at)
+
+
+async def closed_loop(client, endpoint, args, rng, pdf_bytes, stats):
+    """`concurrency` virtual users, each sending its next request as soon as the last returns"""
+    deadline = time.perf_counter() + args.duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, endpoint, rng, pdf_bytes, stats, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(args.concurrency)))
+
+
+async def open_loop(client, endpoint, args, rng, pdf_bytes, stats):
+    """Poisson arrivals at `rate` req/s; at most `concurrency` in flight, extra arrivals are dropped"""
+    deadline = time.perf_counter() + args.duration
+    in_flight = set()
+    next_at = time.perf_counter()
+    while True:
+        next_at += rng.expovariate(args.rate)
+        if next_at >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if len(in_flight) >= args.concurrency:
+            stats.dropped += 1
+            continue
+        task = asyncio.create_task(send(client, endpoint, rng, pdf_bytes, stats, next_at))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_endpoint(base_url, endpoint, args, pdf_bytes):
+    rng = random.Random(args.seed)
+    stats = EndpointStats()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if endpoint == "query-pdf":
+            # Queries need a document to answer from
+            response = await client.post("/process-pdf", files={"file": ("bench.pdf", pdf_bytes, "application/pdf")})
+            response.raise_for_status()
+
+        for _ in range(args.warmup):
+            await send(client, endpoint, rng, pdf_bytes, EndpointStats(), time.perf_counter())
+
+        stats.started = time.perf_counter()
+        if args.rate > 0:
+            await open_loop(client, endpoint, args, rng, pdf_bytes, stats)
+        else:
+            await closed_loop(client, endpoint, args, rng, pdf_bytes, stats)
+        stats.finished = time.perf_counter()
+    return stats.summary()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(args, workdir):
+    """Launch the ai-service against an offline LLM backend in isolated data dirs"""
+    port = free_port()
+    env = {
+        **os.environ,
+        "LLM_BACKEND": args.llm_backend,
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.llm_jitter_ms),
+        "LLM_CASSETTE_LATENCY_MS": str(args.llm_latency_ms),
+        "RAG_INDEX_DIR": os.path.join(workdir, "indexes"),
+        "NOTES_INDEX_DIR": os.path.join(workdir, "notes"),
+        "TRACE_SAMPLE_RATE": "0",
+    }
+    if args.workers > 1:
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "prometheus")
+        os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=AI_SERVICE_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"ai-service exited with code {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("ai-service did not start in time")
+
+
+def check_regressions(report, baseline, max_regression):
+    """Endpoints whose p99 grew, or throughput fell, by more than max_regression (a fraction)"""
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous or not previous.get("latency_ms") or not current.get("latency_ms"):
+            continue
+        p99, old_p99 = current["latency_ms"]["p99"], previous["latency_ms"]["p99"]
+        if p99 > old_p99 * (1 + max_regression):
+            regressions.append(f"{endpoint}: p99 {old_p99}ms -> {p99}ms")
+        rps, old_rps = current["throughput_rps"], previous["throughput_rps"]
+        if rps < old_rps * (1 - max_regression):
+            regressions.append(f"{endpoint}: throughput {old_rps} -> {rps} req/s")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test for the ai-service")
+    parser.add_argument("--url", help="Benchmark an already running service instead of starting one")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users, or max in flight with --rate")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open-loop arrivals per second (0 = closed loop)")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per endpoint")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-backend", choices=["fake", "replay"], default="fake",
+                        help="Canned responses, or completions replayed from the recorded cassette")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--pdf", default=DEFAULT_PDF)
+    parser.add_argument("--output", default="load_test_report.json")
+    parser.add_argument("--baseline", help="Previous report to compare against; exit 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.pdf, "rb") as f:
+        pdf_bytes = f.read()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process, base_url = (None, args.url) if args.url else start_service(args, workdir)
+        try:
+            results = {}
+            for endpoint in args.endpoints:
+                print(f"Benchmarking /{endpoint} ...")
+                results[endpoint] = asyncio.run(run_endpoint(base_url, endpoint, args, pdf_bytes))
+                print(json.dumps(results[endpoint]))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "workers": args.workers,
+            "llm_backend": "external" if args.url else args.llm_backend,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "seed": args.seed,
+        },
+        "endpoints": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nLoad test report saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = check_regressions(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
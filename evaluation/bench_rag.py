@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import fitz
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from langchain_community.document_loaders import PyMuPDFLoader
+from nltk.tokenize import word_tokenize
+from chains.chunk_store import ChunkStore
+from chains.chunk_retrievers import BM25Index, build_dense_index
+from chains.index_store import LoadedIndex
+from chains.rag_components import RAGPipeline
+from utils.config import hf_embeddings
+
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "Global Research Hub.pdf")
+
+TOPICS = [
+    "climate modelling", "renewable energy", "protein folding", "urban mobility", "quantum sensing",
+    "soil microbiology", "battery chemistry", "public health", "ocean circulation", "machine translation",
+]
+VERBS = ["improves", "reduces", "measures", "predicts", "accelerates", "stabilises", "extends", "limits"]
+NOUNS = ["efficiency", "throughput", "accuracy", "emissions", "costs", "resilience", "coverage", "yield"]
+
+QUERIES = [
+    "What is the main purpose of this document?",
+    "Which research areas are described?",
+    "What results were reported for renewable energy?",
+    "How does the team measure accuracy?",
+    "Which facilities support protein folding work?",
+    "What limits battery chemistry efficiency?",
+    "Who funds the public health programme?",
+    "What are the findings on ocean circulation?",
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size, from /proc where available, else the peak"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (FileNotFoundError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_synthetic_pdf(path: str, pages: int, seed: int = 0):
+    """Report-like pages of seeded prose, about 12 paragraphs each"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_number in range(pages):
+        paragraphs = [f"Global Research Hub Annual Report - page {page_number + 1}"]
+        for _ in range(12):
+            topic = rng.choice(TOPICS)
+            sentences = [
+                f"Work on {topic} {rng.choice(VERBS)} {rng.choice(NOUNS)} by {rng.randint(2, 60)} percent "
+                f"across {rng.randint(3, 40)} sites."
+                for _ in range(rng.randint(2, 4))
+            ]
+            paragraphs.append(" ".join(sentences))
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), "\n\n".join(paragraphs), fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def latency_summary(latencies: list) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def compare_precisions(vectors, query_vectors: np.ndarray, precisions: list, k: int = 3) -> dict:
+    """Resident vector bytes, recall@k against exact fp32 search and search latency per precision"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    exact_distances, _ = build_dense_index(vectors, "fp32").search(query_vectors, k)
+    results = {}
+    for precision in precisions:
+        dense = build_dense_index(vectors, precision)
+        _, ids = dense.search(query_vectors, k)
+        latencies = [timed(lambda: dense.search(query_vectors[i:i + 1], k))[1] for i in range(len(query_vectors))]
+        result = {
+            "vector_bytes": dense.nbytes(),
+            f"recall_at_{k}": round(recall_at_k(ids, exact_distances, vectors, query_vectors), 4),
+            "search_latency": latency_summary(latencies),
+        }
+        if dense.full is not None:
+            # What the compressed codes alone would return, to show what rescoring buys
+            _, unrescored = dense.index.search(query_vectors, k)
+            result[f"recall_at_{k}_without_rescore"] = round(
+                recall_at_k(unrescored, exact_distances, vectors, query_vectors), 4
+            )
+        results[precision] = result
+    return results
+
+
+def recall_at_k(ids: np.ndarray, exact_distances: np.ndarray, vectors: np.ndarray, query_vectors: np.ndarray) -> float:
+    """
+    Share of returned chunks within the exact k-th nearest distance. Judged by distance
+    rather than id so duplicate chunks (identical vectors) count as equally correct.
+    """
+    hits = 0
+    for row, kth, query in zip(ids, exact_distances[:, -1], query_vectors):
+        found = ((vectors[row[row >= 0]] - query) ** 2).sum(axis=1)
+        hits += int((found <= kth * (1 + 1e-5) + 1e-6).sum())
+    return hits / exact_distances.size
+
+
+def benchmark_document(name: str, path: str, query_rounds: int, precisions: list) -> dict:
+    rss_before = rss_mb()
+
+    docs, extract_seconds = timed(lambda: PyMuPDFLoader(path).load())
+    (chunks, dedup), split_seconds = timed(lambda: RAGPipeline.prepare_chunks(docs))
+    texts = [chunk.page_content for chunk in chunks]
+    store = ChunkStore.from_documents(chunks)
+    vectors, embed_seconds = timed(lambda: hf_embeddings.embed_documents(texts))
+    dense, faiss_seconds = timed(lambda: build_dense_index(vectors))
+    bm25_index, bm25_seconds = timed(lambda: BM25Index.build(texts, word_tokenize))
+    rss_after = rss_mb()
+
+    index = LoadedIndex(0, store, dense, bm25_index, {"chunks": len(chunks)})
+    bm25, faiss_retriever, hybrid = RAGPipeline.build_retrievers(index)
+    retrievers = {"faiss": faiss_retriever, "bm25": bm25, "hybrid": hybrid}
+
+    # The query embedding is part of FAISS / hybrid latency, as it is in the service
+    queries = {name: [] for name in retrievers}
+    for _ in range(query_rounds):
+        for query in QUERIES:
+            for retriever_name, retriever in retrievers.items():
+                _, seconds = timed(lambda: retriever.invoke(query))
+                queries[retriever_name].append(seconds)
+
+    return {
+        "document": name,
+        "pages": len(docs),
+        "chunks": len(chunks),
+        "characters": sum(len(doc.page_content) for doc in docs),
+        "extraction": {"seconds": round(extract_seconds, 4), "pages_per_s": round(len(docs) / extract_seconds, 2)},
+        "splitting": {"seconds": round(split_seconds, 4), "chunks_per_s": round(len(chunks) / split_seconds, 2)},
+        "dedup": dedup,
+        "embedding": {"seconds": round(embed_seconds, 4), "embeddings_per_s": round(len(chunks) / embed_seconds, 2)},
+        "index_build": {
+            "faiss_seconds": round(faiss_seconds, 4),
+            "bm25_seconds": round(bm25_seconds, 4),
+        },
+        "memory": {
+            "rss_before_mb": round(rss_before, 1),
+            "rss_after_mb": round(rss_after, 1),
+            "rss_delta_mb": round(rss_after - rss_before, 1),
+            "index_mb": {
+                component: round(size / 2**20, 3) for component, size in index.memory_usage().items()
+            },
+        },
+        "query_latency": {name: latency_summary(latencies) for name, latencies in queries.items()},
+        "vector_precision": compare_precisions(
+            vectors, np.asarray([hf_embeddings.embed_query(q) for q in QUERIES], dtype=np.float32), precisions
+        ),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RAG ingestion and retrieval scaling benchmark")
+    parser.add_argument("--pages", type=int, nargs="*", default=[10, 100, 1000],
+                        help="Synthetic document sizes to generate")
+    parser.add_argument("--pdf", nargs="*", default=[DEFAULT_PDF], help="Real PDFs to include")
+    parser.add_argument("--query-rounds", type=int, default=5, help="Passes over the query set per retriever")
+    parser.add_argument("--precisions", nargs="*", default=["fp32", "fp16", "int8"],
+                        help="Vector storage precisions to compare for memory and recall")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="rag_benchmark_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Load the embedding model once up front so it isn't billed to the first document
+    hf_embeddings.embed_query("warmup")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = [(os.path.basename(path), path) for path in args.pdf]
+        for pages in args.pages:
+            path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(path, pages, args.seed)
+            documents.append((f"synthetic_{pages}_pages", path))
+
+        for name, path in documents:
+            print(f"Benchmarking {name} ...")
+            result = benchmark_document(name, path, args.query_rounds, args.precisions)
+            print(json.dumps(result))
+            results.append(result)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "query_rounds": args.query_rounds, "queries": len(QUERIES), "seed": args.seed,
+            "precisions": args.precisions,
+        },
+        "documents": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRAG benchmark report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from chains.rag_components import RAGPipeline
+from chains.index_store import IndexStore
+from chains.confidence_gate import is_answerable
+from utils.config import RAG_GATE_MIN_DENSE_SIMILARITY, RAG_GATE_MIN_SPARSE_SCORE
+from bench_rag import DEFAULT_PDF
+from eval_rag_pdf import QUERIES
+
+
+# Questions the sample PDF answers: the evaluation suite's generic ones plus specific ones
+ANSWERABLE = QUERIES + [
+    "What research areas does the Global Research Hub cover?",
+    "How are projects funded?",
+    "What facilities are available to researchers?",
+    "How is project risk managed?",
+]
+# Questions it doesn't
+UNANSWERABLE = [
+    "How do I bake sourdough bread at home?",
+    "Who won the 1998 football world cup final?",
+    "What is the capital of Australia?",
+    "How many calories are in a banana?",
+    "Explain the rules of chess castling.",
+    "What's the weather forecast for tomorrow?",
+    "Translate good morning into Japanese.",
+    "Which programming language should I learn first?",
+]
+
+
+def load_questions(path):
+    """JSON file: {"answerable": [...], "unanswerable": [...]}"""
+    if path is None:
+        return ANSWERABLE, UNANSWERABLE
+    with open(path) as f:
+        labelled = json.load(f)
+    return labelled["answerable"], labelled["unanswerable"]
+
+
+def evaluate(scores, labels, min_dense, min_sparse) -> dict:
+    passed = np.array([is_answerable(s, min_dense, min_sparse) for s in scores])
+    labels = np.array(labels)
+    return {
+        "min_dense_similarity": round(float(min_dense), 4),
+        "min_sparse_score": round(float(min_sparse), 4),
+        # Share of answerable questions still sent to the LLM: a miss here is a wrong "not found"
+        "answerable_kept": round(float(passed[labels].mean()), 4),
+        # Share of unanswerable questions that skip the LLM
+        "unanswerable_gated": round(float((~passed[~labels]).mean()), 4),
+    }
+
+
+def calibrate(scores, labels, min_kept: float) -> dict:
+    """Thresholds gating the most unanswerable questions while keeping at least min_kept of the answerable ones"""
+    # Candidates are the observed scores, plus 0 (gate everything) and 1.01 (never pass on that signal)
+    dense = sorted({s["dense_similarity"] for s in scores} | {0.0, 1.01})
+    sparse = sorted({s["sparse_score"] for s in scores} | {0.0, 1.01})
+    best = None
+    for min_dense in dense:
+        for min_sparse in sparse:
+            result = evaluate(scores, labels, min_dense, min_sparse)
+            if result["answerable_kept"] < min_kept:
+                continue
+            # Prefer more gating, then the lowest (least aggressive) thresholds
+            key = (result["unanswerable_gated"], -min_dense - min_sparse)
+            if best is None or key > best[0]:
+                best = (key, result)
+    return best[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Calibrate the retrieval-confidence gate thresholds")
+    parser.add_argument("--pdf", default=DEFAULT_PDF)
+    parser.add_argument("--questions", help="JSON with answerable / unanswerable question lists for the PDF")
+    parser.add_argument("--min-kept", type=float, default=1.0,
+                        help="Share of answerable questions that must still reach the LLM")
+    parser.add_argument("--output", default="gate_calibration_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    answerable, unanswerable = load_questions(args.questions)
+    questions = answerable + unanswerable
+    labels = [True] * len(answerable) + [False] * len(unanswerable)
+
+    index_dir = tempfile.mkdtemp()
+    try:
+        rag = RAGPipeline(store=IndexStore(index_dir))
+
+        async def ingest():
+            with open(args.pdf, "rb") as f:
+                await rag.process_pdf(UploadFile(file=f, filename=os.path.basename(args.pdf)))
+            await rag.wait_for_ingestion()
+
+        asyncio.run(ingest())
+        _, _, hybrid_retriever = rag.build_retrievers(rag.current_index())
+        scores = [confidence for _, confidence in hybrid_retriever.search_batch(questions)]
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    for question, label, score in zip(questions, labels, scores):
+        print(f"{'answerable  ' if label else 'unanswerable'} {json.dumps(score)} {question}")
+
+    current = evaluate(scores, labels, RAG_GATE_MIN_DENSE_SIMILARITY, RAG_GATE_MIN_SPARSE_SCORE)
+    recommended = calibrate(scores, labels, args.min_kept)
+    print(f"\nCurrent thresholds:     {json.dumps(current)}")
+    print(f"Recommended thresholds: {json.dumps(recommended)}")
+    print(f"  RAG_GATE_MIN_DENSE_SIMILARITY={recommended['min_dense_similarity']} "
+          f"RAG_GATE_MIN_SPARSE_SCORE={recommended['min_sparse_score']}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "pdf": os.path.basename(args.pdf),
+        "min_kept": args.min_kept,
+        "current": current,
+        "recommended": recommended,
+        "questions": [
+            {"question": q, "answerable": label, **score} for q, label, score in zip(questions, labels, scores)
+        ],
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nGate calibration report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
 import unittest
 import sys
 import os
+import io
 import json
 import re
+import time
+import asyncio
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from unittest.mock import Mock
+from fastapi import UploadFile
 from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
 import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
 
 from chains.rag_components import RAGPipeline
+from chains.index_store import IndexStore
+from batch_metrics import BatchMetrics
 
 
 class MetricsCalculator:
@@ -89,37 +97,24 @@ class MetricsCalculator:
 
     @staticmethod
     def calculate_mse(values: list) -> float:
-        if not values:
-            return 0
-        mean = sum(values) / len(values)
-        mse = sum((x - mean) ** 2 for x in values) / len(values)
-        return round(mse, 4)
+        return BatchMetrics.summarize(values)["mse"]
 
     @staticmethod
     def calculate_rmse(values: list) -> float:
-        mse = MetricsCalculator.calculate_mse(values)
-        return round(mse ** 0.5, 4)
+        return BatchMetrics.summarize(values)["rmse"]
 
     @staticmethod
     def calculate_mae(values: list) -> float:
-        if not values:
-            return 0
-        mean = sum(values) / len(values)
-        mae = sum(abs(x - mean) for x in values) / len(values)
-        return round(mae, 4)
+        return BatchMetrics.summarize(values)["mae"]
 
     @staticmethod
     def calculate_variance(values: list) -> float:
-        if not values:
-            return 0
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return round(variance, 4)
+        # Population variance is the spread around the mean, i.e. the same number as the MSE above
+        return BatchMetrics.summarize(values)["mse"]
 
     @staticmethod
     def calculate_std_dev(values: list) -> float:
-        variance = MetricsCalculator.calculate_variance(values)
-        return round(variance ** 0.5, 4)
+        return BatchMetrics.summarize(values)["std_dev"]
 
     @staticmethod
     def calculate_r2_score(actual: list, predicted: list) -> float:
@@ -166,6 +161,33 @@ class MetricsCalculator:
         }
 
 
+QUERY_WORKERS = int(os.getenv("RAG_EVAL_WORKERS", "4"))
+
+QUERIES = [
+    "What is the main topic?",
+    "What is this document about?",
+    "Key information?",
+    "Main topic",
+    "Summarize this",
+    "Key points?",
+    "What is in this document?",
+    "Tell me about the content",
+]
+# Queries whose answers also feed the per-answer quality metrics
+METRIC_QUERIES = ["What is the main topic?", "Summarize this", "Key points?"]
+
+
+def run_queries(rag, queries, workers=QUERY_WORKERS):
+    """Answer every query on a thread pool; returns {query: {"answer", "latency"}}"""
+    def run(query):
+        started = time.perf_counter()
+        result = rag.query_pdf(query)
+        return query, {"answer": result.get("answer", ""), "latency": time.perf_counter() - started}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(run, queries))
+
+
 class TestRAGWithPDF(unittest.TestCase):
     
     metrics_data = {
@@ -178,44 +200,69 @@ class TestRAGWithPDF(unittest.TestCase):
         "response_relevance": [],
         "context_faithfulness": [],
     }
+    latency_data = {
+        "workers": QUERY_WORKERS,
+        "ingest_seconds": None,
+        "query_seconds": {},
+        "wall_seconds": None,
+    }
     
-    def setUp(self):
-        self.metrics = MetricsCalculator()
-        self.rag = RAGPipeline()
-        self.pdf_path = "evaluation/Global Research Hub.pdf"
-        
-        if not os.path.exists(self.pdf_path):
-            self.skipTest(f"PDF not found at {self.pdf_path}")
+    @classmethod
+    async def ingest(cls):
+        # Evaluate against the whole document, not the first pages of a progressive ingest
+        result = await cls.rag.process_pdf(cls.load_pdf())
+        await cls.rag.wait_for_ingestion()
+        return result
+
+    @classmethod
+    def setUpClass(cls):
+        cls.metrics = MetricsCalculator()
+        cls.pdf_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Global Research Hub.pdf")
+        if not os.path.exists(cls.pdf_path):
+            raise unittest.SkipTest(f"PDF not found at {cls.pdf_path}")
+
+        # Ingest once into a private store, then answer every query concurrently up front
+        cls.index_dir = tempfile.mkdtemp()
+        # No answer cache: concurrent paraphrases would otherwise race for the same entry,
+        # making answers, latencies and cassette replay depend on scheduling order
+        cls.rag = RAGPipeline(store=IndexStore(cls.index_dir), answer_cache=False)
+        started = time.perf_counter()
+        cls.process_result = asyncio.run(cls.ingest())
+        cls.latency_data["ingest_seconds"] = round(time.perf_counter() - started, 4)
+
+        started = time.perf_counter()
+        cls.results = run_queries(cls.rag, QUERIES)
+        cls.latency_data["wall_seconds"] = round(time.perf_counter() - started, 4)
+        cls.latency_data["query_seconds"] = {
+            query: round(result["latency"], 4) for query, result in cls.results.items()
+        }
 
-    def load_pdf(self):
-        with open(self.pdf_path, 'rb') as f:
-            mock_file = Mock()
-            mock_file.file.read.return_value = f.read()
-            return mock_file
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.index_dir, ignore_errors=True)
+
+    @classmethod
+    def load_pdf(cls):
+        with open(cls.pdf_path, 'rb') as f:
+            return UploadFile(file=io.BytesIO(f.read()), filename=os.path.basename(cls.pdf_path))
+
+    def answer(self, query):
+        return self.results[query]["answer"]
 
     def test_01_pdf_loads_successfully(self):
-        mock_file = self.load_pdf()
-        result = self.rag.process_pdf(mock_file)
+        result = self.process_result
         
         self.assertIn("message", result)
         self.assertEqual(result["message"], "PDF processed successfully")
         self.assertIsNotNone(self.rag.vectorstore)
 
     def test_02_query_response_structure(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("What is the main topic?")
+        answer = self.answer("What is the main topic?")
         
-        self.assertIn("answer", result)
-        self.assertGreater(len(result["answer"]), 0)
+        self.assertGreater(len(answer), 0)
 
     def test_03_query_returns_information(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("What is this document about?")
-        answer = result["answer"]
+        answer = self.answer("What is this document about?")
         
         self.assertGreater(len(answer), 10)
         coherence = self.metrics.calculate_coherence(answer)
@@ -223,34 +270,20 @@ class TestRAGWithPDF(unittest.TestCase):
         self.metrics_data["coherence_scores"].append(coherence)
 
     def test_04_context_retrieved(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("Key information?")
+        answer = self.answer("Key information?")
         
-        self.assertIn("answer", result)
-        self.assertGreater(len(result["answer"]), 0)
+        self.assertGreater(len(answer), 0)
 
     def test_05_context_quality(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("Main topic")
-        answer = result["answer"]
+        answer = self.answer("Main topic")
         
         self.assertGreater(len(answer), 50)
         self.metrics_data["response_lengths"].append(len(answer))
 
     def test_06_multiple_queries(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        queries = ["What is the main topic?", "Summarize this", "Key points?"]
-        
-        for query in queries:
+        for query in METRIC_QUERIES:
             with self.subTest(query=query):
-                result = self.rag.query_pdf(query)
-                answer = result["answer"]
+                answer = self.answer(query)
                 self.assertGreater(len(answer), 0)
                 
                 coherence = self.metrics.calculate_coherence(answer)
@@ -278,11 +311,7 @@ class TestRAGWithPDF(unittest.TestCase):
                 self.metrics_data["context_faithfulness"].append(faithfulness)
 
     def test_07_response_coherence(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("What is in this document?")
-        answer = result["answer"]
+        answer = self.answer("What is in this document?")
         coherence = self.metrics.calculate_coherence(answer)
         
         self.assertGreater(coherence, 0.3)
@@ -290,27 +319,42 @@ class TestRAGWithPDF(unittest.TestCase):
         self.metrics_data["response_lengths"].append(self.metrics.calculate_response_length(answer))
 
     def test_08_answer_length(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
-        result = self.rag.query_pdf("Tell me about the content")
-        answer = result["answer"]
+        answer = self.answer("Tell me about the content")
         
         self.assertGreater(len(answer), 30)
         self.assertLess(len(answer), 10000)
 
     def test_09_retriever_components(self):
-        mock_file = self.load_pdf()
-        self.rag.process_pdf(mock_file)
-        
         self.assertIsNotNone(self.rag.vectorstore)
+        self.assertIsNotNone(self.rag.syntactic_retriever)
 
     def test_10_error_handling(self):
-        try:
-            result = self.rag.query_pdf("test")
-            self.assertIsInstance(result, dict)
-        except Exception as e:
-            self.fail(f"RAG raised exception: {str(e)}")
+        # A pipeline with nothing ingested must answer with an error, not raise
+        with tempfile.TemporaryDirectory() as empty_dir:
+            try:
+                result = RAGPipeline(store=IndexStore(empty_dir)).query_pdf("test")
+                self.assertIsInstance(result, dict)
+            except Exception as e:
+                self.fail(f"RAG raised exception: {str(e)}")
+
+
+def calculate_latency_metrics(test_class):
+    data = test_class.latency_data
+    latencies = list(data["query_seconds"].values())
+    if not latencies:
+        return {}
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "workers": data["workers"],
+        "ingest_seconds": data["ingest_seconds"],
+        "queries": len(latencies),
+        "wall_seconds": data["wall_seconds"],
+        "mean_ms": round(float(latencies_ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+        "max_ms": round(float(latencies_ms.max()), 2),
+        "per_query_ms": {query: round(seconds * 1000, 2) for query, seconds in data["query_seconds"].items()},
+    }
 
 
 def calculate_overall_metrics(test_class):
@@ -396,6 +440,7 @@ def generate_report(result, test_class):
             "success_rate": round(success_rate, 2),
         },
         "overall_metrics": overall_metrics,
+        "latency": calculate_latency_metrics(test_class),
     }
     
     with open("pdf_rag_evaluation_report.json", "w") as f:
@@ -0,0 +1,30 @@
+# Objective -> True when higher is better
+OBJECTIVES = {
+    "context_hit_rate": True,
+    "mrr": True,
+    "packed_tokens": False,
+    "query_p50_ms": False,
+    "index_bytes": False,
+    "ingest_seconds": False,
+}
+# Timings are noisy: within this relative margin two settings count as equally fast
+TIMING_OBJECTIVES = {"query_p50_ms", "ingest_seconds"}
+
+
+def dominates(a: dict, b: dict, objectives: list, tolerance: float) -> bool:
+    """a is at least as good as b on every objective and better on one (timings within tolerance are ties)"""
+    better = False
+    for name in objectives:
+        x, y = a[name], b[name]
+        if not OBJECTIVES[name]:
+            x, y = -x, -y
+        margin = tolerance * abs(y) if name in TIMING_OBJECTIVES else 1e-9
+        if x < y - margin:
+            return False
+        if x > y + margin:
+            better = True
+    return better
+
+
+def pareto_frontier(results: list, objectives: list, tolerance: float) -> list:
+    return [r for r in results if not any(dominates(other, r, objectives, tolerance) for other in results)]
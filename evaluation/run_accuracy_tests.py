@@ -10,6 +10,7 @@ def run_accuracy_evaluation():
     from test_keypoints_accuracy import TestKeypointsAccuracy
     from test_summarization_accuracy import TestSummarizationAccuracy
     from test_stylization_accuracy import TestStylizationAccuracy
+    from test_extractive_accuracy import TestExtractiveAccuracy
 
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
@@ -17,6 +18,7 @@ def run_accuracy_evaluation():
     suite.addTests(loader.loadTestsFromTestCase(TestKeypointsAccuracy))
     suite.addTests(loader.loadTestsFromTestCase(TestSummarizationAccuracy))
     suite.addTests(loader.loadTestsFromTestCase(TestStylizationAccuracy))
+    suite.addTests(loader.loadTestsFromTestCase(TestExtractiveAccuracy))
 
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
@@ -28,6 +30,7 @@ def run_accuracy_evaluation():
 
 def generate_accuracy_report(result):
     """Generate accuracy evaluation report"""
+    from test_extractive_accuracy import TestExtractiveAccuracy
     
     passed = result.testsRun - len(result.failures) - len(result.errors)
     success_rate = (passed / result.testsRun * 100) if result.testsRun > 0 else 0
@@ -39,6 +42,7 @@ def generate_accuracy_report(result):
         "failed": len(result.failures),
         "errors": len(result.errors),
         "success_rate": round(success_rate, 2),
+        "fast_path_quality_gap": TestExtractiveAccuracy.quality_gap,
     }
     
     report_path = "accuracy_evaluation_report.json"
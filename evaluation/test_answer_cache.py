@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from chains.answer_cache import SemanticAnswerCache
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """Paraphrases retrieving the same chunks reuse an answer; anything else goes to the LLM"""
+
+    def setUp(self):
+        self.cache = SemanticAnswerCache(size=4, min_similarity=0.9, match_chunks=3)
+        self.question = unit([1.0, 0.0, 0.0])
+        self.paraphrase = unit([1.0, 0.2, 0.0])  # Cosine ~0.98
+        self.cache.lookup(1, self.question, [5, 2, 9, 7])
+        self.cache.store(1, self.question, [5, 2, 9, 7], "the answer", llm_seconds=2.0)
+
+    def test_paraphrase_with_same_top_chunks_hits(self):
+        # Order within the top chunks and anything past them don't matter
+        self.assertEqual(self.cache.lookup(1, self.paraphrase, [9, 5, 2, 1]), "the answer")
+        self.assertEqual(self.cache.stats()["llm_seconds_saved"], 2.0)
+
+    def test_different_top_chunks_miss(self):
+        self.assertIsNone(self.cache.lookup(1, self.paraphrase, [5, 2, 8]))
+
+    def test_dissimilar_question_misses(self):
+        self.assertIsNone(self.cache.lookup(1, unit([0.0, 1.0, 0.0]), [5, 2, 9]))
+
+    def test_new_index_version_invalidates(self):
+        self.assertIsNone(self.cache.lookup(2, self.question, [5, 2, 9]))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+        # A late store for the replaced version is ignored
+        self.cache.store(1, self.question, [5, 2, 9], "stale", llm_seconds=1.0)
+        self.assertIsNone(self.cache.lookup(2, self.question, [5, 2, 9]))
+
+    def test_oldest_entry_is_overwritten_when_full(self):
+        for i in range(4):
+            vector = unit([0.0, 1.0, float(i)])
+            self.cache.store(1, vector, [i], f"answer {i}", llm_seconds=1.0)
+        self.assertEqual(self.cache.stats()["entries"], 4)
+        self.assertIsNone(self.cache.lookup(1, self.question, [5, 2, 9]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import random
+
+import numpy as np
+
+from accuracy_metrics import AccuracyMetrics
+from batch_metrics import BatchMetrics, RetrievalMetrics
+
+
+class TestBatchMetrics(unittest.TestCase):
+    """Batch scores must match the per-string AccuracyMetrics they replace"""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(0)
+        vocabulary = ["Plants", "light", "energy", "glucose", "cycle", "water", "oxygen", "carbon", "the", "a"]
+        cls.originals = [" ".join(rng.choices(vocabulary, k=rng.randint(0, 30))) for _ in range(200)]
+        cls.processed = [" ".join(rng.choices(vocabulary, k=rng.randint(0, 12))) for _ in range(200)]
+        cls.keywords = [rng.sample(vocabulary, rng.randint(0, 4)) for _ in range(200)]
+
+    def test_coverage_matches_scalar(self):
+        expected = [AccuracyMetrics.calculate_coverage(o, p) for o, p in zip(self.originals, self.processed)]
+        np.testing.assert_allclose(np.round(BatchMetrics.coverage(self.originals, self.processed), 3), expected)
+
+    def test_jaccard_matches_scalar(self):
+        expected = [AccuracyMetrics.calculate_similarity_score(o, p) for o, p in zip(self.originals, self.processed)]
+        np.testing.assert_allclose(np.round(BatchMetrics.jaccard(self.originals, self.processed), 3), expected)
+
+    def test_conciseness_matches_scalar(self):
+        expected = [AccuracyMetrics.calculate_conciseness(o, p) for o, p in zip(self.originals, self.processed)]
+        np.testing.assert_allclose(np.round(BatchMetrics.conciseness(self.originals, self.processed), 3), expected)
+
+    def test_keyword_preservation_matches_scalar(self):
+        expected = [
+            AccuracyMetrics.calculate_keyword_preservation(o, p, k)
+            for o, p, k in zip(self.originals, self.processed, self.keywords)
+        ]
+        actual = BatchMetrics.keyword_preservation(self.processed, self.keywords)
+        np.testing.assert_allclose(np.round(actual, 3), expected)
+
+    def test_faithfulness(self):
+        scores = BatchMetrics.faithfulness(["a b c", "x y", "a"], ["a b", "a b", ""])
+        np.testing.assert_allclose(scores, [1.0, 0.0, 1.0])
+
+
+class TestRetrievalMetrics(unittest.TestCase):
+
+    def test_known_rankings(self):
+        retrieved = [["c1", "c2", "c3"], ["c4", "c1", "c9"], ["c7", "c8", "c9"]]
+        gold = [{"c1"}, {"c1", "c9"}, {"c2"}]
+        result = RetrievalMetrics.evaluate(retrieved, gold, k=3)
+
+        self.assertAlmostEqual(result["recall@3"], round((1 + 1 + 0) / 3, 4))
+        self.assertAlmostEqual(result["mrr"], round((1 + 0.5 + 0) / 3, 4))
+        ideal_two = 1 + 1 / np.log2(3)
+        second = (1 / np.log2(3) + 1 / np.log2(4)) / ideal_two
+        self.assertAlmostEqual(result["ndcg@3"], round((1 + second + 0) / 3, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
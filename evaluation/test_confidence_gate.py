@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+from nltk.tokenize import word_tokenize
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from chains.chunk_retrievers import BM25Index, retrieval_confidence
+from chains.confidence_gate import is_answerable, skip_llm
+
+
+class TestRetrievalConfidence(unittest.TestCase):
+    """Confidence scores must separate covered questions from ones the document never mentions"""
+
+    @classmethod
+    def setUpClass(cls):
+        texts = [
+            "protein folding simulations run on the campus gpu cluster",
+            "the renewable energy lab measures solar panel efficiency",
+            "public health surveys are funded by the city council",
+            "graduate students present research results every spring",
+        ]
+        cls.bm25 = BM25Index.build(texts, str.split)
+
+    def sparse_score(self, query):
+        scores = self.bm25.scores(query)
+        return retrieval_confidence(np.array([]), float(scores.max()), self.bm25.reference_score(query))["sparse_score"]
+
+    def test_covered_question_scores_higher_than_unrelated_one(self):
+        covered = self.sparse_score("solar panel efficiency")
+        unrelated = self.sparse_score("sourdough bread recipe")
+        self.assertGreaterEqual(covered, 0.9)
+        self.assertEqual(unrelated, 0.0)
+
+    def test_terms_missing_from_the_index_dilute_the_score(self):
+        self.assertLess(self.sparse_score("solar panel cost in euros"), self.sparse_score("solar panel"))
+
+    def test_naturally_phrased_questions_about_covered_topics_pass(self):
+        # The tokenizer the PDF index uses; preserve_line skips sentence splitting, which
+        # doesn't change the tokens of a single question and needs no punkt data
+        bm25 = BM25Index.build([
+            "Plants rely on photosynthesis to convert light energy into chemical energy.",
+            "Chlorophyll in the leaves absorbs mostly red and blue light.",
+            "The city council funds public health surveys every year.",
+            "Graduate students present their research results in the spring.",
+        ], lambda text: word_tokenize(text, preserve_line=True))
+
+        def sparse_score(query):
+            return retrieval_confidence(np.array([]), float(bm25.scores(query).max()),
+                                        bm25.reference_score(query))["sparse_score"]
+
+        self.assertGreaterEqual(sparse_score("What is photosynthesis?"), 0.3)
+        self.assertGreaterEqual(sparse_score("How do plants convert light energy into chemical energy?"), 0.3)
+        self.assertLess(sparse_score("How do I bake sourdough bread at home?"), 0.3)
+
+    def test_dense_similarity_is_cosine_of_nearest_hit(self):
+        # Squared L2 between unit vectors at cosine 0.8 is 2 - 2 * 0.8
+        confidence = retrieval_confidence(np.array([0.4, 0.9]), 0.0, 0.0)
+        self.assertAlmostEqual(confidence["dense_similarity"], 0.8)
+        self.assertEqual(confidence["sparse_score"], 0.0)
+
+    def test_either_signal_lets_a_question_through(self):
+        self.assertTrue(is_answerable({"dense_similarity": 0.9, "sparse_score": 0.0}, 0.8, 0.3))
+        self.assertTrue(is_answerable({"dense_similarity": 0.1, "sparse_score": 0.5}, 0.8, 0.3))
+        self.assertFalse(is_answerable({"dense_similarity": 0.1, "sparse_score": 0.1}, 0.8, 0.3))
+
+    def test_only_enforce_mode_skips_the_llm(self):
+        low = {"dense_similarity": 0.0, "sparse_score": 0.0}
+        self.assertFalse(skip_llm(low, "test", mode="shadow"))
+        self.assertFalse(skip_llm(low, "test", mode="off"))
+        self.assertTrue(skip_llm(low, "test", mode="enforce"))
+
+
+if __name__ == "__main__":
+    unittest.main()
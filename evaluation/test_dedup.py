@@ -0,0 +1,52 @@
+import unittest
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from langchain_core.documents import Document
+from chains.dedup import strip_boilerplate, drop_near_duplicates
+
+
+class TestIngestionDedup(unittest.TestCase):
+    """Boilerplate stripping and near-duplicate removal must not touch distinct content"""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(0)
+        vocabulary = [f"term{i}" for i in range(3000)]
+        cls.paragraphs = [" ".join(rng.choices(vocabulary, k=130)) for _ in range(40)]
+
+    def make_pages(self, count):
+        return [
+            Document(
+                page_content=f"CS101 Lecture 4 - Graph Algorithms\n{self.paragraphs[i]}\nPage {i + 1} of {count}\n"
+                             f"(c) 2024 University of Somewhere",
+                metadata={"page": i},
+            )
+            for i in range(count)
+        ]
+
+    def test_repeated_header_and_footer_lines_are_stripped(self):
+        cleaned, report = strip_boilerplate(self.make_pages(10))
+        self.assertEqual(report["boilerplate_lines"], 3)
+        for page, paragraph in zip(cleaned, self.paragraphs):
+            self.assertEqual(page.page_content, paragraph)
+
+    def test_short_documents_are_left_alone(self):
+        pages = self.make_pages(2)
+        cleaned, report = strip_boilerplate(pages)
+        self.assertEqual(report["boilerplate_lines"], 0)
+        self.assertEqual([p.page_content for p in cleaned], [p.page_content for p in pages])
+
+    def test_near_duplicates_dropped_distinct_chunks_kept(self):
+        edited = self.paragraphs[0].replace(self.paragraphs[0].split()[60], "changed", 1)
+        chunks = [Document(page_content=text) for text in self.paragraphs + [self.paragraphs[3], edited]]
+        kept, report = drop_near_duplicates(chunks)
+        self.assertEqual(report["near_duplicate_chunks"], 2)
+        self.assertEqual([c.page_content for c in kept], self.paragraphs)
+
+
+if __name__ == "__main__":
+    unittest.main()
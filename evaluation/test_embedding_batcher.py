@@ -0,0 +1,45 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from utils.embedding_batcher import BatchingEmbeddings
+
+
+class RecordingEmbeddings:
+    """Slow stand-in model that records which texts went into each forward pass"""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        time.sleep(0.02)
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class TestBatchingEmbeddings(unittest.TestCase):
+    """Interactive queries are embedded ahead of ingestion slices already in the queue"""
+
+    def setUp(self):
+        self.model = RecordingEmbeddings()
+        self.batcher = BatchingEmbeddings(self.model, max_batch=4, max_wait=0.001)
+
+    def test_query_batches_overtake_queued_documents(self):
+        ingest = threading.Thread(target=self.batcher.embed_documents, args=(["doc"] * 40,))
+        ingest.start()
+        time.sleep(0.01)
+        self.assertEqual(self.batcher.embed_queries(["q1", "q22"]), [[2.0], [3.0]])
+        ingest.join()
+
+        query_batch = next(i for i, batch in enumerate(self.model.batches) if "q1" in batch)
+        # At most the slice already being embedded (and one collected with it) ran first
+        self.assertLessEqual(query_batch, 2)
+        self.assertEqual(sum(len(batch) for batch in self.model.batches), 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
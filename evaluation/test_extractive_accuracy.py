@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from chains.extractive_chain import extract_keypoints_fast, summarize_text_fast, should_use_fast_path
+from chains.keypoints_chain import extract_keypoints
+from chains.summarization_chain import summarize_text_notes
+from utils.config import LLM_BACKEND, LLM_CASSETTE_PATH, FAST_PATH_HARD_MAX_CHARS, groq_api_key
+from accuracy_metrics import AccuracyMetrics
+import test_keypoints_accuracy
+import test_summarization_accuracy
+
+
+def llm_available() -> bool:
+    """Whether the LLM chains can answer here: a local backend, a recorded cassette, or a Groq key"""
+    if LLM_BACKEND == "fake":
+        return True
+    if LLM_BACKEND == "replay":
+        return os.path.exists(LLM_CASSETTE_PATH)
+    return bool(groq_api_key)
+
+
+class TestExtractiveAccuracy(unittest.TestCase):
+    """Test the local extractive fast path against the same bars as the LLM chains"""
+
+    # Filled by test_quality_gap: {sample: {metric: {"llm": x, "extractive": y, "gap": x - y}}}
+    quality_gap = {}
+
+    def setUp(self):
+        self.metrics = AccuracyMetrics()
+
+        keypoints_fixture = test_keypoints_accuracy.TestKeypointsAccuracy()
+        keypoints_fixture.setUp()
+        summarization_fixture = test_summarization_accuracy.TestSummarizationAccuracy()
+        summarization_fixture.setUp()
+
+        self.keypoint_samples = {
+            "biology": (keypoints_fixture.biology_text, keypoints_fixture.biology_keywords),
+            "history": (keypoints_fixture.history_text, keypoints_fixture.history_keywords),
+            "technical": (keypoints_fixture.tech_text, keypoints_fixture.tech_keywords),
+        }
+        self.summary_samples = {
+            "ml": (summarization_fixture.sample_ml, summarization_fixture.keywords_ml),
+            "covid": (summarization_fixture.sample_covid, summarization_fixture.keywords_covid),
+        }
+
+    def test_extractive_keypoints_accuracy(self):
+        """Extractive keypoints meet the LLM keypoints thresholds"""
+        for name, (text, keywords) in self.keypoint_samples.items():
+            with self.subTest(sample=name):
+                result = extract_keypoints_fast(text)
+
+                coverage = self.metrics.calculate_coverage(text, result)
+                keyword_preservation = self.metrics.calculate_keyword_preservation(text, result, keywords)
+
+                self.assertGreater(coverage, 0.2)
+                self.assertGreater(keyword_preservation, 0.3)
+
+    def test_extractive_summary_accuracy(self):
+        """Extractive summaries meet the LLM summarization thresholds"""
+        for name, (text, keywords) in self.summary_samples.items():
+            with self.subTest(sample=name):
+                result = summarize_text_fast(text)
+
+                coverage = self.metrics.calculate_coverage(text, result)
+                conciseness = self.metrics.calculate_conciseness(text, result)
+                keyword_preservation = self.metrics.calculate_keyword_preservation(text, result, keywords)
+
+                self.assertGreater(conciseness, 0.2)
+                self.assertGreater(keyword_preservation, 0.3)
+                self.assertGreater(coverage, 0.25)
+
+    def test_fast_mode_is_capped(self):
+        """mode=fast runs in-process only up to the hard cap; longer texts go to the LLM"""
+        self.assertTrue(should_use_fast_path("x" * FAST_PATH_HARD_MAX_CHARS, "fast"))
+        self.assertFalse(should_use_fast_path("x" * (FAST_PATH_HARD_MAX_CHARS + 1), "fast"))
+        self.assertFalse(should_use_fast_path("short note", "llm"))
+
+    @unittest.skipUnless(llm_available(), "needs GROQ_API_KEY or LLM_BACKEND=replay with a recorded cassette")
+    def test_quality_gap(self):
+        """Measure coverage / keyword preservation of extractive vs LLM output on the same samples"""
+        runs = [(name, sample, extract_keypoints, extract_keypoints_fast)
+                for name, sample in self.keypoint_samples.items()]
+        runs += [(name, sample, summarize_text_notes, summarize_text_fast)
+                 for name, sample in self.summary_samples.items()]
+
+        for name, (text, keywords), llm_fn, fast_fn in runs:
+            llm_result = llm_fn(text)
+            fast_result = fast_fn(text)
+
+            gap = {}
+            for metric, score in [
+                ("coverage", lambda r: self.metrics.calculate_coverage(text, r)),
+                ("keyword_preservation", lambda r: self.metrics.calculate_keyword_preservation(text, r, keywords)),
+            ]:
+                llm_score, fast_score = score(llm_result), score(fast_result)
+                gap[metric] = {
+                    "llm": llm_score,
+                    "extractive": fast_score,
+                    "gap": round(llm_score - fast_score, 3),
+                }
+            self.quality_gap[name] = gap
+
+        self.assertEqual(len(self.quality_gap), len(runs))
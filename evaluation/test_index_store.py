@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from chains.index_store import IndexStore
+
+
+class TestBuildTickets(unittest.TestCase):
+    """Two IndexStore instances on one directory stand in for two workers"""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.worker_a = IndexStore(root)
+        self.worker_b = IndexStore(root)
+
+    def test_superseded_build_cannot_publish(self):
+        upload = self.worker_a.begin_build()
+        first = self.worker_a.publish_empty(upload)
+        self.assertEqual(self.worker_b.current_version(), first["version"])
+
+        # Worker B deletes while A is still indexing later page batches
+        delete = self.worker_b.begin_build()
+        deleted = self.worker_b.publish_empty(delete)
+        self.assertIsNone(self.worker_a.publish_empty(upload))
+        self.assertEqual(self.worker_a.current_version(), deleted["version"])
+        self.assertEqual(sorted(os.listdir(self.worker_a.root)).count(f"v{deleted['version'] + 1}"), 0)
+
+    def test_current_build_keeps_publishing(self):
+        upload = self.worker_a.begin_build()
+        for _ in range(3):
+            meta = self.worker_a.publish_empty(upload)
+        self.assertEqual(self.worker_b.current_version(), meta["version"])
+        # Publishing without a ticket is unconditional
+        self.assertIsNotNone(self.worker_b.publish_empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
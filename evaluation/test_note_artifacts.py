@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+import chains.note_artifacts as note_artifacts
+from chains.note_artifacts import ArtifactStore, NoteArtifacts
+
+
+class TestNoteArtifacts(unittest.TestCase):
+    """A deleted note's artifacts stay deleted, whichever worker was precomputing them"""
+
+    def setUp(self):
+        self.store = ArtifactStore(os.path.join(tempfile.mkdtemp(), "artifacts.sqlite"))
+
+    def test_writes_for_a_deleted_note_are_dropped(self):
+        self.store.put("u1", "n1", "summary", "h1", {"summary": "before"})
+        self.store.delete("u1", "n1")
+        self.store.put("u1", "n1", "summary", "h1", {"summary": "late"})
+        self.assertIsNone(self.store.get("u1", "n1", "summary"))
+        self.store.put("u1", "n2", "summary", "h2", {"summary": "other note"})
+        self.assertIsNotNone(self.store.get("u1", "n2", "summary"))
+
+    def test_old_tombstones_are_pruned(self):
+        self.store.tombstone_seconds = 0
+        self.store.delete("u1", "n1")
+        self.store.delete("u1", "n2")
+        self.store.put("u1", "n1", "summary", "h1", {"summary": "after the tombstone expired"})
+        self.assertIsNotNone(self.store.get("u1", "n1", "summary"))
+
+    def test_delete_during_precompute_wins(self):
+        started = asyncio.Event()
+
+        async def slow_artifact(kind, text):
+            started.set()
+            await asyncio.sleep(0.2)
+            return {kind: text, "engine": "extractive"}
+
+        async def scenario():
+            artifacts = NoteArtifacts(self.store, debounce=0)
+            artifacts.note_changed("u1", "n1", "Title", "<p>body</p>")
+            await started.wait()
+            await artifacts.note_deleted("u1", "n1")
+            await asyncio.sleep(0.3)
+            return artifacts
+
+        with mock.patch.object(note_artifacts, "generate_artifact", slow_artifact):
+            artifacts = asyncio.run(scenario())
+        self.assertEqual(artifacts._tasks, {})
+        for kind in note_artifacts.KINDS:
+            self.assertIsNone(self.store.get("u1", "n1", kind))
+
+    def test_precompute_failures_are_logged(self):
+        async def failing_artifact(kind, text):
+            raise RuntimeError("LLM unavailable")
+
+        async def scenario():
+            artifacts = NoteArtifacts(self.store, debounce=0)
+            await artifacts._precompute("u1", "n1", "Title\nbody")
+
+        with mock.patch.object(note_artifacts, "generate_artifact", failing_artifact), \
+                self.assertLogs("chains.note_artifacts", level="ERROR") as logs:
+            asyncio.run(scenario())
+        self.assertEqual(len(logs.records), len(note_artifacts.KINDS))
+        self.assertIn("RuntimeError: LLM unavailable", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
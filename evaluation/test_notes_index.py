@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+import chains.notes_index as notes_index
+from chains.notes_index import NotesIndex, tokenize
+
+
+class WordEmbeddings:
+    """Bag-of-words vectors over a fixed vocabulary, so related notes land close together"""
+
+    VOCAB = ["photosynthesis", "plants", "light", "energy", "budget", "invoice", "travel", "recipe", "bread"]
+
+    def embed_query(self, text):
+        words = set(tokenize(text))
+        return [1.0 if term in words else 0.0 for term in self.VOCAB] + [0.1]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class TestNotesIndex(unittest.TestCase):
+    """Two NotesIndex instances on one directory stand in for two workers"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.writer = NotesIndex(self.root, WordEmbeddings())
+        self.reader = NotesIndex(self.root, WordEmbeddings())
+
+    def ids(self, index, query):
+        return [result["note_id"] for result in index.search("u1", query)]
+
+    def test_saves_and_deletes_reach_other_workers(self):
+        self.writer.upsert("u1", "n1", "Photosynthesis", "<p>How plants turn light into energy</p>")
+        self.writer.upsert("u1", "n2", "Budget", "<p>Travel invoice totals</p>")
+        self.assertEqual(self.ids(self.reader, "photosynthesis")[0], "n1")
+
+        self.assertTrue(self.reader.delete("u1", "n1"))
+        self.assertFalse(self.reader.delete("u1", "n1"))
+        self.assertNotIn("n1", self.ids(self.writer, "photosynthesis"))
+        self.assertEqual(self.writer.count("u1"), 1)
+
+    def test_saves_append_to_the_journal_until_it_is_compacted(self):
+        path = self.writer._path("u1")
+        with mock.patch.object(notes_index, "NOTES_JOURNAL_MIN_RECORDS", 4):
+            for i in range(3):
+                self.writer.upsert("u1", f"n{i}", "Recipe", f"<p>bread number {i}</p>")
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(self.reader.count("u1"), 3)
+
+            self.writer.upsert("u1", "n3", "Photosynthesis", "<p>plants and light</p>")
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(os.path.getsize(path + ".journal"), 0)
+
+        # The reader picks up the compacted snapshot and keeps replaying later saves
+        self.writer.upsert("u1", "n4", "Budget", "<p>travel invoice</p>")
+        self.assertEqual(self.reader.count("u1"), 5)
+        self.assertEqual(self.ids(self.reader, "photosynthesis")[0], "n3")
+
+    def test_reindex_replaces_the_users_notes(self):
+        self.writer.upsert("u1", "stale", "Recipe", "<p>bread</p>")
+        self.reader.count("u1")
+        self.writer.reindex("u1", [("n1", "Photosynthesis", "<p>plants</p>"), ("n2", "Budget", "<p>invoice</p>")])
+        self.assertEqual(self.reader.count("u1"), 2)
+        self.assertNotIn("stale", self.ids(self.reader, "bread recipe"))
+
+        self.writer.reindex("u1", [])
+        self.assertEqual(self.reader.count("u1"), 0)
+        self.assertEqual(self.reader.search("u1", "plants"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from pareto import dominates, pareto_frontier
+
+
+def setting(name, hit_rate, tokens, latency_ms):
+    return {"name": name, "context_hit_rate": hit_rate, "packed_tokens": tokens, "query_p50_ms": latency_ms}
+
+
+OBJECTIVES = ["context_hit_rate", "packed_tokens", "query_p50_ms"]
+
+
+class TestParetoFrontier(unittest.TestCase):
+    """The frontier keeps every trade-off and drops settings beaten on all objectives"""
+
+    def test_better_on_one_objective_and_equal_elsewhere_dominates(self):
+        self.assertTrue(dominates(setting("a", 0.9, 800, 1.0), setting("b", 0.9, 900, 1.0), OBJECTIVES, 0.1))
+        self.assertFalse(dominates(setting("a", 0.9, 800, 1.0), setting("a", 0.9, 800, 1.0), OBJECTIVES, 0.1))
+
+    def test_timing_differences_within_tolerance_are_ties(self):
+        fast = setting("fast", 0.9, 800, 1.0)
+        noisy = setting("noisy", 0.9, 800, 1.05)
+        self.assertFalse(dominates(fast, noisy, OBJECTIVES, 0.1))
+        self.assertTrue(dominates(fast, setting("slow", 0.9, 800, 1.5), OBJECTIVES, 0.1))
+
+    def test_frontier_keeps_trade_offs(self):
+        results = [
+            setting("accurate", 0.95, 1500, 1.0),
+            setting("cheap", 0.85, 600, 1.0),
+            setting("worse", 0.85, 1600, 1.0),
+        ]
+        names = {r["name"] for r in pareto_frontier(results, OBJECTIVES, 0.1)}
+        self.assertEqual(names, {"accurate", "cheap"})
+
+
+if __name__ == "__main__":
+    unittest.main()
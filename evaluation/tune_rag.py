@@ -0,0 +1,225 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import fitz
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-service')))
+
+from langchain_community.document_loaders import PyMuPDFLoader
+from nltk.tokenize import word_tokenize
+from chains import chunker
+from chains.chunk_store import ChunkStore
+from chains.chunk_retrievers import BM25Index, HybridChunkRetriever, build_dense_index, embed_queries
+from chains.dedup import strip_boilerplate, drop_near_duplicates
+from chains.index_store import LoadedIndex
+from utils.config import (hf_embeddings, RAG_DEDUP, RAG_CHUNK_TOKENS, RAG_CHUNK_OVERLAP_TOKENS,
+                          RAG_K_SPARSE, RAG_K_DENSE, RAG_DENSE_WEIGHT)
+from batch_metrics import RetrievalMetrics
+from bench_rag import DEFAULT_PDF, make_synthetic_pdf, timed
+from pareto import OBJECTIVES, dominates, pareto_frontier
+
+
+DEFAULT_GOLD = os.path.join(os.path.dirname(__file__), "rag_gold_questions.json")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_gold(path: str) -> list:
+    """[{"question": ..., "evidence": [phrase, ...]}]; a chunk is relevant when it contains any evidence phrase"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def synthetic_gold(path: str, questions: int, seed: int = 0) -> list:
+    """Questions about individual sentences of a bench_rag synthetic PDF, each sentence being its own evidence"""
+    sentence = re.compile(r"Work on ([a-z ]+?) (\w+) (\w+) by (\d+) percent across (\d+) sites\.")
+    text = " ".join(page.get_text() for page in fitz.open(path))
+    matches = {m.group(0): m for m in sentence.finditer(re.sub(r"\s+", " ", text))}
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(sorted(matches), size=min(questions, len(matches)), replace=False)
+    gold = []
+    for key in picked:
+        topic, verb, noun, _, sites = matches[key].groups()
+        gold.append({"question": f"By how much did work on {topic} {verb} {noun} across {sites} sites?",
+                     "evidence": [key]})
+    return gold
+
+
+def prepare_chunks(docs, chunk_tokens: int, overlap: int, tokenizer):
+    """RAGPipeline.prepare_chunks with the chunk size as a parameter"""
+    if RAG_DEDUP:
+        docs, _ = strip_boilerplate(docs)
+    chunks = chunker.split_documents(docs, tokenizer, chunk_tokens, overlap)
+    if RAG_DEDUP:
+        chunks, _ = drop_near_duplicates(chunks)
+    return chunks
+
+
+def build_index(docs, chunk_tokens: int, overlap: int, tokenizer):
+    """Index one document the way ingestion does; returns the index, per-chunk token counts and ingest seconds"""
+    started = time.perf_counter()
+    chunks = prepare_chunks(docs, chunk_tokens, overlap, tokenizer)
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = hf_embeddings.embed_documents(texts)
+    index = LoadedIndex(0, ChunkStore.from_documents(chunks), build_dense_index(vectors),
+                        BM25Index.build(texts, word_tokenize), {"chunks": len(chunks)})
+    ingest_seconds = time.perf_counter() - started
+    tokens = np.array([len(chunker.token_starts_ends(text, tokenizer)[0]) for text in texts])
+    return index, texts, tokens, ingest_seconds
+
+
+def evaluate_setting(document: dict, k_sparse: int, k_dense: int, dense_weight: float) -> dict:
+    index = document["index"]
+    hybrid = HybridChunkRetriever(store=index.chunks, bm25=index.bm25, index=index.dense, embeddings=hf_embeddings,
+                                  k_sparse=k_sparse, k_dense=k_dense, weights=[1 - dense_weight, dense_weight])
+    retrieved, latencies = [], []
+    for question, vector in zip(document["questions"], document["vectors"]):
+        # The query embedding costs the same in every setting, so it's computed once up front
+        (ids, _), seconds = timed(lambda: hybrid.search(question, vector))
+        retrieved.append(ids)
+        latencies.append(seconds)
+    return {"retrieved": retrieved, "latencies": latencies,
+            "packed_tokens": [int(document["tokens"][ids].sum()) for ids in retrieved]}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sweep chunking and hybrid retrieval parameters; report the Pareto frontier")
+    parser.add_argument("--pdf", default=DEFAULT_PDF)
+    parser.add_argument("--gold", default=DEFAULT_GOLD, help="Gold questions with evidence phrases for --pdf")
+    parser.add_argument("--synthetic-pages", type=int, nargs="*", default=[],
+                        help="Also tune on synthetic documents of these sizes, with generated questions")
+    parser.add_argument("--synthetic-questions", type=int, default=30)
+    parser.add_argument("--chunk-tokens", type=int, nargs="*", default=[128, 192, 256, 384])
+    parser.add_argument("--overlap-tokens", type=int, nargs="*", default=[0, 32, 64])
+    parser.add_argument("--k-sparse", type=int, nargs="*", default=[2, 4, 6])
+    parser.add_argument("--k-dense", type=int, nargs="*", default=[2, 3, 5])
+    parser.add_argument("--dense-weight", type=float, nargs="*", default=[0.35, 0.55, 0.75])
+    parser.add_argument("--objectives", nargs="*", default=list(OBJECTIVES), choices=list(OBJECTIVES))
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative margin for timing ties")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="rag_tuning_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tokenizer = chunker.load_tokenizer()
+    hf_embeddings.embed_query("warmup")
+    baseline = {"chunk_tokens": RAG_CHUNK_TOKENS, "overlap_tokens": RAG_CHUNK_OVERLAP_TOKENS,
+                "k_sparse": RAG_K_SPARSE, "k_dense": RAG_K_DENSE, "dense_weight": RAG_DENSE_WEIGHT}
+
+    chunkings = sorted({(t, o) for t in args.chunk_tokens for o in args.overlap_tokens if o <= t // 2}
+                       | {(baseline["chunk_tokens"], baseline["overlap_tokens"])})
+    retrievals = sorted(set(itertools.product(args.k_sparse, args.k_dense, args.dense_weight))
+                        | {(baseline["k_sparse"], baseline["k_dense"], baseline["dense_weight"])})
+    k = max(s + d for s, d, _ in retrievals)  # Scores everything the fused list can hold, i.e. the packed context
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = [(os.path.basename(args.pdf), args.pdf, load_gold(args.gold))]
+        for pages in args.synthetic_pages:
+            path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(path, pages, args.seed)
+            corpus.append((f"synthetic_{pages}_pages", path, synthetic_gold(path, args.synthetic_questions, args.seed)))
+        pages = {name: PyMuPDFLoader(path).load() for name, path, _ in corpus}
+
+    questions = {name: [g["question"] for g in gold] for name, _, gold in corpus}
+    vectors = {name: embed_queries(hf_embeddings, qs) for name, qs in questions.items()}
+
+    results = []
+    for chunk_tokens, overlap in chunkings:
+        documents = []
+        for name, _, gold in corpus:
+            index, texts, tokens, ingest_seconds = build_index(pages[name], chunk_tokens, overlap, tokenizer)
+            normalized = [normalize(text) for text in texts]
+            relevant = [
+                {i for i, text in enumerate(normalized) if any(normalize(e) in text for e in g["evidence"])}
+                for g in gold
+            ]
+            documents.append({"name": name, "index": index, "tokens": tokens, "ingest_seconds": ingest_seconds,
+                              "questions": questions[name], "vectors": vectors[name], "relevant": relevant})
+        print(f"chunk_tokens={chunk_tokens} overlap={overlap}: "
+              f"{sum(len(d['tokens']) for d in documents)} chunks, "
+              f"{sum(d['ingest_seconds'] for d in documents):.2f}s ingest")
+
+        for k_sparse, k_dense, dense_weight in retrievals:
+            retrieved, relevant, latencies, packed = [], [], [], []
+            for document in documents:
+                run = evaluate_setting(document, k_sparse, k_dense, dense_weight)
+                retrieved += run["retrieved"]
+                relevant += document["relevant"]
+                latencies += run["latencies"]
+                packed += run["packed_tokens"]
+            quality = RetrievalMetrics.evaluate(retrieved, relevant, k)
+            hits = RetrievalMetrics.hit_matrix(retrieved, relevant, k)
+            results.append({
+                "chunk_tokens": chunk_tokens,
+                "overlap_tokens": overlap,
+                "k_sparse": k_sparse,
+                "k_dense": k_dense,
+                "dense_weight": dense_weight,
+                # Share of questions with at least one evidence chunk in what the LLM would be given
+                "context_hit_rate": round(float(hits.any(axis=1).mean()), 4),
+                "mrr": quality["mrr"],
+                f"recall@{k}": quality[f"recall@{k}"],
+                # Evidence split across a chunk boundary leaves a question with no relevant chunk at all
+                "questions_without_evidence_chunk": sum(1 for r in relevant if not r),
+                "packed_tokens": round(float(np.mean(packed)), 1),
+                "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+                "query_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+                "index_bytes": int(sum(sum(d["index"].memory_usage().values()) for d in documents)),
+                "ingest_seconds": round(sum(d["ingest_seconds"] for d in documents), 4),
+            })
+
+    def key(r):
+        return tuple(r[name] for name in baseline)
+
+    baseline_result = next(r for r in results if key(r) == tuple(baseline.values()))
+    frontier = sorted(pareto_frontier(results, args.objectives, args.tolerance), key=lambda r: r["packed_tokens"])
+    # Settings at least as good as today's on quality that are also cheaper and no slower
+    improvements = [
+        r for r in frontier
+        if r["context_hit_rate"] >= baseline_result["context_hit_rate"] and r["mrr"] >= baseline_result["mrr"]
+        and dominates(r, baseline_result, args.objectives, args.tolerance)
+    ]
+
+    print(f"\nBaseline: {json.dumps(baseline_result)}")
+    print(f"\nPareto frontier ({len(frontier)} of {len(results)} settings, by packed tokens):")
+    columns = list(baseline) + args.objectives
+    print(" ".join(f"{c:>16}" for c in columns))
+    for r in frontier:
+        print(" ".join(f"{r[c]:>16}" for c in columns))
+    if improvements:
+        best = improvements[0]
+        print(f"\nCheapest setting that dominates the baseline: {json.dumps(best)}")
+        print(f"  RAG_CHUNK_TOKENS={best['chunk_tokens']} RAG_CHUNK_OVERLAP_TOKENS={best['overlap_tokens']} "
+              f"RAG_K_SPARSE={best['k_sparse']} RAG_K_DENSE={best['k_dense']} RAG_DENSE_WEIGHT={best['dense_weight']}")
+    else:
+        print("\nNo setting dominates the baseline")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "corpus": [{"document": name, "questions": len(gold)} for name, _, gold in corpus],
+        "config": {"objectives": args.objectives, "tolerance": args.tolerance, "k": k,
+                   "tokenizer": "model" if tokenizer is not None else "approximate"},
+        "baseline": baseline_result,
+        "frontier": frontier,
+        "dominating_baseline": improvements,
+        "settings": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRAG tuning report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import { Sparkles, Copy, Loader2, Check } from "lucide-react"
 interface AIToolbarProps {
   content: string
   onContentUpdate: (updates: { content: string }) => void
+  // Set for saved notes: summary / keypoints then come from what was precomputed on save
+  noteId?: string
+  title?: string
 }
 
 
@@ -16,7 +19,7 @@ interface RestyleOptions {
   creativity: "low" | "balanced" | "high"
 }
 
-export default function AIToolbar({ content, onContentUpdate }: AIToolbarProps) {
+export default function AIToolbar({ content, onContentUpdate, noteId, title }: AIToolbarProps) {
   const [isOpen, setIsOpen] = useState(false)
   const [loading, setLoading] = useState(false)
   const [showRestyleModal, setShowRestyleModal] = useState(false)
@@ -38,17 +41,32 @@ export default function AIToolbar({ content, onContentUpdate }: AIToolbarProps)
 
   const plainText = getPlainText(content)
 
+  // Same response shape as the direct endpoints; generated on the spot if the note changed since it was saved
+  const fetchNoteArtifact = (kind: "summary" | "keypoints") => {
+    const token = localStorage.getItem('token')
+    return fetch(`http://localhost:3001/api/notes/note/${noteId}/artifact`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ kind, title, desc: content }),
+    })
+  }
+
   const handleSummarize = async () => {
     if (!plainText.trim()) return;
     setLoading(true);
     setResultType("summarize");
 
     try {
-      const response = await fetch("http://localhost:8000/summarize_text", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text: plainText }),
-      });
+      const response = noteId
+        ? await fetchNoteArtifact("summary")
+        : await fetch("http://localhost:8000/summarize_text", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ text: plainText }),
+          });
 
       const data = await response.json();
       setResult(data.summary);
@@ -67,11 +85,13 @@ export default function AIToolbar({ content, onContentUpdate }: AIToolbarProps)
     setResultType("keypoints");
 
     try {
-      const response = await fetch("http://localhost:8000/keypoints", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text: plainText }),
-      });
+      const response = noteId
+        ? await fetchNoteArtifact("keypoints")
+        : await fetch("http://localhost:8000/keypoints", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ text: plainText }),
+          });
 
       if (!response.ok) {
         throw new Error(`Server error: ${response.status}`);
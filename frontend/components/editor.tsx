@@ -121,6 +121,8 @@ export default function Editor({ note, onUpdateNote, onCreateNote }: EditorProps
 
       <AIToolbar
         content={contentValue}
+        noteId={note.id}
+        title={note.title}
         onContentUpdate={(updates: any) => {
           const newContent = updates.content || updates.desc
           if (newContent) {
@@ -293,6 +293,8 @@ export default function RichTextEditor({ note, onUpdateNote, onCreateNote }: Edi
         {/* Right: AI Features */}
         <AIToolbar
           content={contentValue}
+          noteId={note.id}
+          title={note.title}
           onContentUpdate={(updates: any) => {
             const newContent = updates.content || updates.desc
             if (newContent) {
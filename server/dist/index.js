@@ -10,10 +10,12 @@ const auth_1 = __importDefault(require("./routes/auth"));
 const note_1 = __importDefault(require("./routes/note"));
 const user_1 = __importDefault(require("./routes/user"));
 const features_1 = __importDefault(require("./routes/features"));
+const tracing_1 = require("./lib/tracing");
 dotenv_1.default.config();
 const app = (0, express_1.default)();
 app.use((0, cors_1.default)());
 app.use(express_1.default.json());
+app.use(tracing_1.traceContext);
 app.use("/api/auth", auth_1.default);
 app.use("/api/notes", note_1.default);
 app.use('/api/user', user_1.default);
@@ -0,0 +1,30 @@
+type NoteLike = {
+    id: string;
+    title: string;
+    desc: string;
+    userId: string;
+};
+export type SemanticSearchResult = {
+    note_id: string;
+    score: number;
+    semantic_score: number;
+    lexical_score: number;
+};
+export type SemanticSearchResponse = {
+    results: SemanticSearchResult[];
+    // Notes in the user's index; fewer than the user has means some were never indexed
+    indexed_notes: number;
+};
+// Keep the ai-service note index in sync. Failures are logged, never surfaced to the user:
+// the note itself is already saved and search falls back to the lexical query.
+export declare const syncNote: (note: NoteLike) => void;
+export declare const removeNote: (userId: string, noteId: string) => void;
+export declare const semanticSearch: (userId: string, query: string, k?: number) => Promise<SemanticSearchResponse>;
+// Replace the user's index with exactly these notes (backfills notes saved before indexing existed)
+export declare const reindexNotes: (userId: string, notes: NoteLike[]) => Promise<any>;
+export type NoteArtifactKind = "summary" | "keypoints";
+// Precomputed summary / keypoints for a saved note; the ai-service generates it on a miss
+// or when the given content no longer matches what the artifact was computed from
+export declare const noteArtifact: (userId: string, noteId: string, kind: NoteArtifactKind, title: string, desc: string) => Promise<any>;
+export {};
+//# sourceMappingURL=aiService.d.ts.map
\ No newline at end of file
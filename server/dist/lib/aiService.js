@@ -0,0 +1,45 @@
+"use strict";
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.noteArtifact = exports.reindexNotes = exports.semanticSearch = exports.removeNote = exports.syncNote = void 0;
+const tracing_1 = require("./tracing");
+const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://localhost:8000";
+const post = async (path, body) => {
+    const response = await fetch(`${AI_SERVICE_URL}${path}`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", traceparent: (0, tracing_1.currentTraceparent)() },
+        body: JSON.stringify(body),
+    });
+    if (!response.ok) {
+        throw new Error(`AI service ${path} failed with status ${response.status}`);
+    }
+    return response.json();
+};
+// Keep the ai-service note index in sync. Failures are logged, never surfaced to the user:
+// the note itself is already saved and search falls back to the lexical query.
+const syncNote = (note) => {
+    post("/notes/upsert", {
+        user_id: note.userId,
+        note_id: note.id,
+        title: note.title,
+        desc: note.desc,
+    }).catch((err) => console.error("Error indexing note:", err instanceof Error ? err.message : err));
+};
+exports.syncNote = syncNote;
+const removeNote = (userId, noteId) => {
+    post("/notes/delete", { user_id: userId, note_id: noteId })
+        .catch((err) => console.error("Error removing note from index:", err instanceof Error ? err.message : err));
+};
+exports.removeNote = removeNote;
+const semanticSearch = (userId, query, k = 20) => post("/notes/semantic-search", { user_id: userId, query, k });
+exports.semanticSearch = semanticSearch;
+// Replace the user's index with exactly these notes (backfills notes saved before indexing existed)
+const reindexNotes = (userId, notes) => post("/notes/reindex", {
+    user_id: userId,
+    notes: notes.map((note) => ({ note_id: note.id, title: note.title, desc: note.desc })),
+});
+exports.reindexNotes = reindexNotes;
+// Precomputed summary / keypoints for a saved note; the ai-service generates it on a miss
+// or when the given content no longer matches what the artifact was computed from
+const noteArtifact = (userId, noteId, kind, title, desc) => post("/notes/artifact", { user_id: userId, note_id: noteId, kind, title, desc });
+exports.noteArtifact = noteArtifact;
+//# sourceMappingURL=aiService.js.map
\ No newline at end of file
@@ -0,0 +1,7 @@
+import { Request, Response, NextFunction } from "express";
+export declare const newTraceparent: () => string;
+// Keeps the caller's traceparent (or a new one) for the whole request, so every ai-service
+// call made while handling it joins the same trace
+export declare const traceContext: (req: Request, _res: Response, next: NextFunction) => void;
+export declare const currentTraceparent: () => string;
+//# sourceMappingURL=tracing.d.ts.map
\ No newline at end of file
@@ -0,0 +1,25 @@
+"use strict";
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.currentTraceparent = exports.traceContext = exports.newTraceparent = void 0;
+const async_hooks_1 = require("async_hooks");
+const crypto_1 = require("crypto");
+// W3C trace-context: 00-<trace id>-<parent span id>-<flags>
+const TRACEPARENT = /^[0-9a-f]{2}-[0-9a-f]{32}-[0-9a-f]{16}-[0-9a-f]{2}$/;
+// Fraction of traces started here that the ai-service records (same variable as the ai-service's own sampler)
+const TRACE_SAMPLE_RATE = Number(process.env.TRACE_SAMPLE_RATE || 0);
+const requestTrace = new async_hooks_1.AsyncLocalStorage();
+const newTraceparent = () => {
+    const flags = Math.random() < TRACE_SAMPLE_RATE ? "01" : "00";
+    return `00-${(0, crypto_1.randomBytes)(16).toString("hex")}-${(0, crypto_1.randomBytes)(8).toString("hex")}-${flags}`;
+};
+exports.newTraceparent = newTraceparent;
+// Keeps the caller's traceparent (or a new one) for the whole request, so every ai-service
+// call made while handling it joins the same trace
+const traceContext = (req, _res, next) => {
+    const incoming = req.header("traceparent")?.trim().toLowerCase();
+    requestTrace.run(incoming && TRACEPARENT.test(incoming) ? incoming : (0, exports.newTraceparent)(), next);
+};
+exports.traceContext = traceContext;
+const currentTraceparent = () => requestTrace.getStore() ?? (0, exports.newTraceparent)();
+exports.currentTraceparent = currentTraceparent;
+//# sourceMappingURL=tracing.js.map
\ No newline at end of file
@@ -6,6 +6,7 @@ Object.defineProperty(exports, "__esModule", { value: true });
 const express_1 = require("express");
 const client_1 = require("@prisma/client");
 const jsonwebtoken_1 = __importDefault(require("jsonwebtoken"));
+const aiService_1 = require("../lib/aiService");
 const featuresRouter = (0, express_1.Router)();
 const prisma = new client_1.PrismaClient();
 const authenticateToken = (req, res, next) => {
@@ -44,6 +45,65 @@ featuresRouter.get("/notes/search", authenticateToken, async (req, res) => {
         return res.status(500).json({ message: "Error searching notes" });
     }
 });
+const lexicalSearch = (userId, q) => prisma.note.findMany({
+    where: {
+        userId,
+        OR: [
+            { title: { contains: q, mode: "insensitive" } },
+            { desc: { contains: q, mode: "insensitive" } },
+        ],
+    },
+    orderBy: { updatedAt: "desc" },
+});
+// Users whose index is being rebuilt by this process, so repeated searches don't pile up reindexes
+const reindexing = new Set();
+const backfillIndex = (userId) => {
+    if (reindexing.has(userId))
+        return;
+    reindexing.add(userId);
+    prisma.note
+        .findMany({ where: { userId } })
+        .then((notes) => (0, aiService_1.reindexNotes)(userId, notes))
+        .catch((err) => console.error("Error reindexing notes:", err instanceof Error ? err.message : err))
+        .finally(() => reindexing.delete(userId));
+};
+featuresRouter.get("/notes/semantic-search", authenticateToken, async (req, res) => {
+    try {
+        const { q } = req.query;
+        const userId = req.userId;
+        if (!userId)
+            return res.status(401).json({ message: "Unauthorized" });
+        if (!q)
+            return res.json({ notes: [] });
+        let search;
+        try {
+            search = await (0, aiService_1.semanticSearch)(userId, q);
+        }
+        catch (err) {
+            // ai-service unavailable: degrade to the lexical search
+            console.error(err);
+            return res.json({ notes: await lexicalSearch(userId, q) });
+        }
+        // The index is missing notes saved before it existed (or whose sync failed):
+        // rebuild it in the background and answer lexically until it matches the database
+        const noteCount = await prisma.note.count({ where: { userId } });
+        if (search.indexed_notes !== noteCount) {
+            backfillIndex(userId);
+            return res.json({ notes: await lexicalSearch(userId, q) });
+        }
+        const ids = search.results.map((r) => r.note_id);
+        const found = await prisma.note.findMany({
+            where: { userId, id: { in: ids } },
+        });
+        const byId = new Map(found.map((note) => [note.id, note]));
+        const notes = ids.flatMap((id) => byId.get(id) ?? []);
+        return res.json({ notes });
+    }
+    catch (err) {
+        console.error(err);
+        return res.status(500).json({ message: "Error searching notes" });
+    }
+});
 featuresRouter.post("/folders/create", authenticateToken, async (req, res) => {
     try {
         const { name } = req.body;
@@ -7,6 +7,7 @@ const express_1 = require("express");
 const zod_1 = require("zod");
 const middleware_1 = __importDefault(require("../middlware/middleware"));
 const client_1 = require("@prisma/client");
+const aiService_1 = require("../lib/aiService");
 const prisma = new client_1.PrismaClient();
 const noteRouter = (0, express_1.Router)();
 noteRouter.post("/newnote", middleware_1.default, async (req, res) => {
@@ -31,6 +32,7 @@ noteRouter.post("/newnote", middleware_1.default, async (req, res) => {
                 userId
             }
         });
+        (0, aiService_1.syncNote)(newNote);
         return res.status(201).json({
             message: "Note created successfully",
             note: newNote
@@ -75,6 +77,7 @@ noteRouter.delete("/note/:id", middleware_1.default, async (req, res) => {
             return res.status(403).json({ message: "Unauthorized" });
         }
         await prisma.note.delete({ where: { id } });
+        (0, aiService_1.removeNote)(note.userId, id);
         res.json({ message: "Note deleted" });
     }
     catch (e) {
@@ -123,6 +126,7 @@ noteRouter.put("/note/:id", middleware_1.default, async (req, res) => {
             where: { id },
             data: { title, desc },
         });
+        (0, aiService_1.syncNote)(updatedNote);
         res.json({ message: "Note updated", note: updatedNote });
     }
     catch (e) {
@@ -200,5 +204,36 @@ noteRouter.get("/note/:id/export", middleware_1.default, async (req, res) => {
         return res.status(500).json({ message: "Error exporting note" });
     }
 });
+// ===== NOTE SUMMARY / KEYPOINTS =====
+noteRouter.post("/note/:id/artifact", middleware_1.default, async (req, res) => {
+    try {
+        const userId = req.userId;
+        const { id } = req.params;
+        const format = zod_1.z.object({
+            kind: zod_1.z.enum(["summary", "keypoints"]),
+            // The editor's current content, which may be ahead of the last autosave
+            title: zod_1.z.string().optional(),
+            desc: zod_1.z.string().optional()
+        });
+        const result = format.safeParse(req.body);
+        if (!result.success) {
+            return res.status(400).json({ message: result.error.message });
+        }
+        if (!id) {
+            return res.status(400).json({ message: "Note ID required" });
+        }
+        const note = await prisma.note.findUnique({ where: { id } });
+        if (!note || note.userId !== userId) {
+            return res.status(403).json({ message: "Unauthorized" });
+        }
+        const { kind, title = note.title, desc = note.desc } = result.data;
+        const artifact = await (0, aiService_1.noteArtifact)(userId, id, kind, title, desc);
+        res.json(artifact);
+    }
+    catch (e) {
+        console.error(e);
+        return res.status(502).json({ message: "Error fetching note artifact" });
+    }
+});
 exports.default = noteRouter;
 //# sourceMappingURL=note.js.map
\ No newline at end of file
@@ -5,6 +5,7 @@ import authRouter from "./routes/auth";
 import noteRouter from "./routes/note";
 import userRouter from './routes/user'
 import featuresRouter from './routes/features'
+import { traceContext } from "./lib/tracing";
 
 
 dotenv.config();
@@ -13,6 +14,7 @@ const app = express();
 
 app.use(cors());
 app.use(express.json());
+app.use(traceContext);
 app.use("/api/auth", authRouter);
 app.use("/api/notes", noteRouter)
 app.use('/api/user', userRouter)
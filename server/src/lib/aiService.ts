@@ -0,0 +1,63 @@
+import { currentTraceparent } from "./tracing"
+
+const AI_SERVICE_URL = process.env.AI_SERVICE_URL || "http://localhost:8000"
+
+type NoteLike = { id: string; title: string; desc: string; userId: string }
+
+export type SemanticSearchResult = {
+  note_id: string
+  score: number
+  semantic_score: number
+  lexical_score: number
+}
+
+export type SemanticSearchResponse = {
+  results: SemanticSearchResult[]
+  // Notes in the user's index; fewer than the user has means some were never indexed
+  indexed_notes: number
+}
+
+const post = async (path: string, body: unknown) => {
+  const response = await fetch(`${AI_SERVICE_URL}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", traceparent: currentTraceparent() },
+    body: JSON.stringify(body),
+  })
+  if (!response.ok) {
+    throw new Error(`AI service ${path} failed with status ${response.status}`)
+  }
+  return response.json()
+}
+
+// Keep the ai-service note index in sync. Failures are logged, never surfaced to the user:
+// the note itself is already saved and search falls back to the lexical query.
+export const syncNote = (note: NoteLike) => {
+  post("/notes/upsert", {
+    user_id: note.userId,
+    note_id: note.id,
+    title: note.title,
+    desc: note.desc,
+  }).catch((err) => console.error("Error indexing note:", err instanceof Error ? err.message : err))
+}
+
+export const removeNote = (userId: string, noteId: string) => {
+  post("/notes/delete", { user_id: userId, note_id: noteId })
+    .catch((err) => console.error("Error removing note from index:", err instanceof Error ? err.message : err))
+}
+
+export const semanticSearch = (userId: string, query: string, k = 20): Promise<SemanticSearchResponse> =>
+  post("/notes/semantic-search", { user_id: userId, query, k })
+
+// Replace the user's index with exactly these notes (backfills notes saved before indexing existed)
+export const reindexNotes = (userId: string, notes: NoteLike[]) =>
+  post("/notes/reindex", {
+    user_id: userId,
+    notes: notes.map((note) => ({ note_id: note.id, title: note.title, desc: note.desc })),
+  })
+
+export type NoteArtifactKind = "summary" | "keypoints"
+
+// Precomputed summary / keypoints for a saved note; the ai-service generates it on a miss
+// or when the given content no longer matches what the artifact was computed from
+export const noteArtifact = (userId: string, noteId: string, kind: NoteArtifactKind, title: string, desc: string) =>
+  post("/notes/artifact", { user_id: userId, note_id: noteId, kind, title, desc })
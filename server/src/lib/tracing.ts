@@ -0,0 +1,24 @@
+import { AsyncLocalStorage } from "async_hooks"
+import { randomBytes } from "crypto"
+import { Request, Response, NextFunction } from "express"
+
+// W3C trace-context: 00-<trace id>-<parent span id>-<flags>
+const TRACEPARENT = /^[0-9a-f]{2}-[0-9a-f]{32}-[0-9a-f]{16}-[0-9a-f]{2}$/
+// Fraction of traces started here that the ai-service records (same variable as the ai-service's own sampler)
+const TRACE_SAMPLE_RATE = Number(process.env.TRACE_SAMPLE_RATE || 0)
+
+const requestTrace = new AsyncLocalStorage<string>()
+
+export const newTraceparent = () => {
+  const flags = Math.random() < TRACE_SAMPLE_RATE ? "01" : "00"
+  return `00-${randomBytes(16).toString("hex")}-${randomBytes(8).toString("hex")}-${flags}`
+}
+
+// Keeps the caller's traceparent (or a new one) for the whole request, so every ai-service
+// call made while handling it joins the same trace
+export const traceContext = (req: Request, _res: Response, next: NextFunction) => {
+  const incoming = req.header("traceparent")?.trim().toLowerCase()
+  requestTrace.run(incoming && TRACEPARENT.test(incoming) ? incoming : newTraceparent(), next)
+}
+
+export const currentTraceparent = () => requestTrace.getStore() ?? newTraceparent()
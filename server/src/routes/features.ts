@@ -1,6 +1,7 @@
 import { Router, Request, Response } from "express"
 import { PrismaClient } from "@prisma/client"
 import jwt from "jsonwebtoken"
+import { semanticSearch, reindexNotes } from "../lib/aiService"
 
 const featuresRouter = Router()
 const prisma = new PrismaClient()
@@ -51,6 +52,70 @@ featuresRouter.get("/notes/search", authenticateToken, async (req: Request, res:
   }
 })
 
+const lexicalSearch = (userId: string, q: string) =>
+  prisma.note.findMany({
+    where: {
+      userId,
+      OR: [
+        { title: { contains: q, mode: "insensitive" } },
+        { desc: { contains: q, mode: "insensitive" } },
+      ],
+    },
+    orderBy: { updatedAt: "desc" },
+  })
+
+// Users whose index is being rebuilt by this process, so repeated searches don't pile up reindexes
+const reindexing = new Set<string>()
+
+const backfillIndex = (userId: string) => {
+  if (reindexing.has(userId)) return
+  reindexing.add(userId)
+  prisma.note
+    .findMany({ where: { userId } })
+    .then((notes) => reindexNotes(userId, notes))
+    .catch((err) => console.error("Error reindexing notes:", err instanceof Error ? err.message : err))
+    .finally(() => reindexing.delete(userId))
+}
+
+featuresRouter.get("/notes/semantic-search", authenticateToken, async (req: Request, res: Response) => {
+  try {
+    const { q } = req.query
+    const userId = req.userId
+
+    if (!userId) return res.status(401).json({ message: "Unauthorized" })
+    if (!q) return res.json({ notes: [] })
+
+    let search
+    try {
+      search = await semanticSearch(userId, q as string)
+    } catch (err) {
+      // ai-service unavailable: degrade to the lexical search
+      console.error(err)
+      return res.json({ notes: await lexicalSearch(userId, q as string) })
+    }
+
+    // The index is missing notes saved before it existed (or whose sync failed):
+    // rebuild it in the background and answer lexically until it matches the database
+    const noteCount = await prisma.note.count({ where: { userId } })
+    if (search.indexed_notes !== noteCount) {
+      backfillIndex(userId)
+      return res.json({ notes: await lexicalSearch(userId, q as string) })
+    }
+
+    const ids = search.results.map((r) => r.note_id)
+    const found = await prisma.note.findMany({
+      where: { userId, id: { in: ids } },
+    })
+    const byId = new Map(found.map((note) => [note.id, note]))
+    const notes = ids.flatMap((id) => byId.get(id) ?? [])
+
+    return res.json({ notes })
+  } catch (err) {
+    console.error(err)
+    return res.status(500).json({ message: "Error searching notes" })
+  }
+})
+
 featuresRouter.post("/folders/create", authenticateToken, async (req: Request, res: Response) => {
   try {
     const { name } = req.body
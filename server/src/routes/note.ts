@@ -2,6 +2,7 @@ import { Router, Request, Response } from "express";
 import { z } from "zod";
 import userMiddleware from "../middlware/middleware";
 import { PrismaClient } from "@prisma/client";
+import { syncNote, removeNote, noteArtifact } from "../lib/aiService";
 
 const prisma = new PrismaClient();
 const noteRouter = Router();
@@ -32,6 +33,7 @@ noteRouter.post("/newnote", userMiddleware, async (req: Request, res: Response)
                 userId
             }
         });
+        syncNote(newNote);
 
         return res.status(201).json({
             message: "Note created successfully",
@@ -86,6 +88,7 @@ noteRouter.delete("/note/:id", userMiddleware, async (req: Request, res: Respons
         }
 
         await prisma.note.delete({ where: { id } });
+        removeNote(note.userId, id);
         res.json({ message: "Note deleted" });
 
     } catch (e) {
@@ -143,6 +146,7 @@ noteRouter.put("/note/:id", userMiddleware, async (req: Request, res: Response)
       where: { id },
       data: { title, desc },
     });
+    syncNote(updatedNote);
 
     res.json({ message: "Note updated", note: updatedNote });
 
@@ -235,4 +239,42 @@ noteRouter.get("/note/:id/export", userMiddleware, async (req: Request, res: Res
   }
 });
 
+// ===== NOTE SUMMARY / KEYPOINTS =====
+noteRouter.post("/note/:id/artifact", userMiddleware, async (req: Request, res: Response) => {
+  try {
+    const userId = (req as any).userId;
+    const { id } = req.params;
+
+    const format = z.object({
+      kind: z.enum(["summary", "keypoints"]),
+      // The editor's current content, which may be ahead of the last autosave
+      title: z.string().optional(),
+      desc: z.string().optional()
+    });
+
+    const result = format.safeParse(req.body);
+    if (!result.success) {
+      return res.status(400).json({ message: result.error.message });
+    }
+
+    if (!id) {
+      return res.status(400).json({ message: "Note ID required" });
+    }
+
+    const note = await prisma.note.findUnique({ where: { id } });
+
+    if (!note || note.userId !== userId) {
+      return res.status(403).json({ message: "Unauthorized" });
+    }
+
+    const { kind, title = note.title, desc = note.desc } = result.data;
+    const artifact = await noteArtifact(userId, id, kind, title, desc);
+    res.json(artifact);
+
+  } catch (e) {
+    console.error(e);
+    return res.status(502).json({ message: "Error fetching note artifact" });
+  }
+});
+
 export default noteRouter;
\ No newline at end of file
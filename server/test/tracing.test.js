@@ -0,0 +1,57 @@
+// Runs against the compiled output: npm test builds first
+const { test, before, after } = require("node:test")
+const assert = require("node:assert")
+const http = require("http")
+const express = require("express")
+
+const received = []
+const aiService = http.createServer((req, res) => {
+  received.push(req.headers.traceparent)
+  res.setHeader("Content-Type", "application/json")
+  res.end(JSON.stringify({ results: [], indexed_notes: 0 }))
+})
+
+let gateway
+let gatewayUrl
+
+before(async () => {
+  await new Promise((resolve) => aiService.listen(0, resolve))
+  process.env.AI_SERVICE_URL = `http://127.0.0.1:${aiService.address().port}`
+  const { traceContext } = require("../dist/lib/tracing")
+  const { semanticSearch } = require("../dist/lib/aiService")
+
+  const app = express()
+  app.use(traceContext)
+  app.get("/search", async (_req, res) => {
+    await semanticSearch("u1", "first")
+    await semanticSearch("u1", "second")
+    res.json({ ok: true })
+  })
+  gateway = app.listen(0)
+  await new Promise((resolve) => gateway.once("listening", resolve))
+  gatewayUrl = `http://127.0.0.1:${gateway.address().port}/search`
+})
+
+after(() => {
+  gateway.close()
+  aiService.close()
+})
+
+test("forwards the caller's traceparent to the ai-service", async () => {
+  received.length = 0
+  const traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+  await fetch(gatewayUrl, { headers: { traceparent } })
+  assert.deepStrictEqual(received, [traceparent, traceparent])
+})
+
+test("starts one trace per request when the caller sent none", async () => {
+  received.length = 0
+  await fetch(gatewayUrl)
+  await fetch(gatewayUrl, { headers: { traceparent: "not-a-traceparent" } })
+  for (const header of received) {
+    assert.match(header, /^00-[0-9a-f]{32}-[0-9a-f]{16}-0[01]$/)
+  }
+  assert.strictEqual(received[0], received[1])
+  assert.notStrictEqual(received[1], received[2])
+  assert.strictEqual(received[2], received[3])
+})